@@ -0,0 +1,5 @@
+"""Utilities shared by the day_* examples.
+
+Entry points add the repository root to `sys.path` so `common` is importable
+when scripts are run directly (e.g. `python day_4/rag_chatbot.py`).
+"""
@@ -0,0 +1,114 @@
+"""Offline comparison of a model cascade against always calling the large model.
+
+Classifies `--inputs` synthetic log lines (ERROR/WARNING/INFO/DEBUG) with fake
+tiers that sleep to mimic model latency:
+
+- heuristic: the production log heuristic (`cascade.guess_log_level`), which
+  answers only lines carrying a literal level token; `--tagged` of the inputs
+  have one (e.g. "[ERROR]", "level=warn"), the rest are bare messages
+- small: `--small-ms` per call, answers in the wrong format for `--small-bad`
+  of the inputs (a sentence instead of the bare level)
+- large: `--large-ms` per call, always well formed
+
+Three setups run over the same inputs: the large model only, small then
+large, and heuristic then small then large. For each tier it prints calls,
+escalation rate, mean latency and p50 latency (bucketed, from the cascade's
+tracer spans), plus the wall time per input and accuracy of the setup.
+
+    python common/bench_cascade.py
+    python common/bench_cascade.py --inputs 500 --small-bad 0.3 --tagged 0.2
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for `common`
+
+from common.cascade import LOG_LEVELS, Cascade, Tier, guess_log_level, one_of
+from common.tracing import Tracer
+
+TEMPLATES = {
+    "ERROR": ["Database connection refused on {host}", "Unhandled exception in {svc}", "Job {n} failed: retries exhausted"],
+    "WARNING": ["Disk on {host} nearly full", "{svc} uses a deprecated API", "Slow response from {svc}: {n} ms"],
+    "INFO": ["User {n} logged in", "{svc} started on {host}", "Backup {n} completed"],
+    "DEBUG": ["Entering {svc}.handle()", "Payload size {n} bytes", "Cache key {n} computed for {svc}"],
+}
+# Ways a log line names its level; WARNING is often written WARN.
+TAGS = ["2025-12-15 10:31:02 {level} {line}", "[{level}] {line}", "level={lower} {line}", "{level}: {line}"]
+
+
+def workload(n: int, tagged: float, seed: int = 11) -> List[Tuple[str, str]]:
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(n):
+        level = rng.choice(LOG_LEVELS)
+        template = rng.choice(TEMPLATES[level])
+        line = template.format(
+            host=f"db{rng.randint(1, 9)}", svc=rng.choice(["auth", "billing", "search"]), n=rng.randint(1, 9999)
+        )
+        if rng.random() < tagged:
+            token = "WARN" if level == "WARNING" and rng.random() < 0.5 else level
+            line = rng.choice(TAGS).format(level=token, lower=token.lower(), line=line)
+        lines.append((line, level))
+    return lines
+
+
+def fake_model(truth: Dict[str, str], latency_s: float, bad_rate: float, seed: int) -> Callable[[str], str]:
+    rng = random.Random(seed)
+
+    def call(line: str) -> str:
+        time.sleep(latency_s)
+        level = truth[line]
+        return f"This looks like a {level.lower()} message." if rng.random() < bad_rate else level
+
+    return call
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline model cascade vs large-model-only benchmark")
+    parser.add_argument("--inputs", type=int, default=150)
+    parser.add_argument("--small-ms", type=float, default=20.0)
+    parser.add_argument("--large-ms", type=float, default=80.0)
+    parser.add_argument("--small-bad", type=float, default=0.15, help="Share of malformed small-model answers.")
+    parser.add_argument("--tagged", type=float, default=0.5, help="Share of log lines carrying a level token.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    lines = workload(args.inputs, args.tagged)
+    truth = dict(lines)
+    setups = {
+        "large only": ["large"],
+        "small -> large": ["small", "large"],
+        "heuristic -> small -> large": ["heuristic", "small", "large"],
+    }
+    print(f"{'setup':<30}{'tier':<11}{'calls':>7}{'escalated':>11}{'mean ms':>9}{'p50 ms':>9}")
+    for label, names in setups.items():
+        calls = {
+            "heuristic": guess_log_level,
+            "small": fake_model(truth, args.small_ms / 1000, args.small_bad, seed=1),
+            "large": fake_model(truth, args.large_ms / 1000, 0.0, seed=2),
+        }
+        tracer = Tracer()
+        cascade = Cascade("log_level", [Tier(name, calls[name]) for name in names], one_of(*LOG_LEVELS), tracer=tracer)
+        start = time.perf_counter()
+        correct = sum(cascade(line) == level for line, level in lines)
+        elapsed = time.perf_counter() - start
+        spans = tracer.snapshot()
+        for name, stats in cascade.stats().items():
+            p50_ms = spans[f"cascade:log_level/{name}"]["p50_seconds"] * 1000 if stats["calls"] else 0.0
+            print(
+                f"{label:<30}{name:<11}{stats['calls']:>7}{stats['escalation_rate']:>11.0%}"
+                f"{stats['mean_ms']:>9.1f}{p50_ms:>9.1f}"
+            )
+        print(f"{label:<30}{'total':<11}{elapsed * 1000 / len(lines):>7.1f} ms/input, accuracy {correct / len(lines):.0%}")
+
+
+if __name__ == "__main__":
+    main()
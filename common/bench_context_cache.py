@@ -0,0 +1,92 @@
+"""Offline check of prompt-prefix caching, with cached vs uncached token counts.
+
+Sends `--calls` requests that share a long system prompt (plus a tool schema)
+through `CachedPrefixChatModel`, backed by the local fake of the cached-content
+API, and compares the prompt tokens against the same calls without caching.
+Halfway through, the cache is dropped on the "provider" side to exercise the
+transparent fallback and re-creation. A final run with a short prompt shows
+that prefixes below the provider minimum are simply sent uncached.
+
+    python common/bench_context_cache.py
+    python common/bench_context_cache.py --prefix-tokens 8000 --calls 100
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.tools import tool
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for `common`
+
+from common.context_cache import CachedPrefixChatModel, ContextCache
+from common.fakes import FakeCachingChatModel, FakeContextCacheAPI
+from common.tracing import Tracer, TracingCallbackHandler
+
+
+@tool
+def check_weather(location: str) -> str:
+    """Return the weather for a city."""
+    return f"Weather in {location}: sunny"
+
+
+def run(prefix_tokens: int, calls: int, cached: bool, expire_midway: bool) -> Dict[str, int]:
+    api = FakeContextCacheAPI()
+    cache = ContextCache(api)
+    inner = FakeCachingChatModel(api=api)
+    model = CachedPrefixChatModel(inner=inner, context_cache=cache) if cached else inner
+    llm = model.bind_tools([check_weather])
+    tracer = Tracer()
+    system = SystemMessage(content="Follow the house style guide. " * (prefix_tokens * 4 // 30))
+
+    for i in range(calls):
+        if expire_midway and i == calls // 2:
+            for name in list(api.caches):
+                api.expire(name)
+        llm.invoke(
+            [system, HumanMessage(content=f"Question {i}: what should I wear in Paris today?")],
+            config={"callbacks": [TracingCallbackHandler(tracer)]},
+        )
+
+    totals = {"input": 0, "cached_input": 0}
+    for (_, _, direction), count in tracer.token_counts().items():
+        if direction in totals:
+            totals[direction] += count
+    return {
+        "calls": calls,
+        "input_tokens": totals["input"],
+        "cached_tokens": totals["cached_input"],
+        "uncached_tokens": totals["input"] - totals["cached_input"],
+        "caches_created": cache.stats["created"],
+        "cache_reused": cache.stats["reused"],
+        "invalidated": cache.stats["invalidated"],
+        "uncached_calls": cache.stats["uncached_calls"] if cached else calls,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline prompt-prefix caching check")
+    parser.add_argument("--prefix-tokens", type=int, default=4000, help="Approximate size of the system prompt.")
+    parser.add_argument("--calls", type=int, default=50)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    rows = {
+        "uncached": run(args.prefix_tokens, args.calls, cached=False, expire_midway=False),
+        "cached": run(args.prefix_tokens, args.calls, cached=True, expire_midway=False),
+        "cached, expired midway": run(args.prefix_tokens, args.calls, cached=True, expire_midway=True),
+        "cached, short prompt": run(200, args.calls, cached=True, expire_midway=False),
+    }
+    columns = list(next(iter(rows.values())))
+    print(f"{'run':<24}" + "".join(f"{c:>16}" for c in columns))
+    for label, row in rows.items():
+        print(f"{label:<24}" + "".join(f"{row[c]:>16}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
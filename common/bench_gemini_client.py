@@ -0,0 +1,128 @@
+"""Offline check of Gemini client reuse: TCP connections and per-call overhead.
+
+Runs `--calls` sequential `generateContent` calls against a local fake Gemini
+endpoint (`FakeGeminiServer`) that counts the connections clients open, once
+per client setup:
+
+- client per call: a new `genai.Client` for every call (worst case)
+- client per module: one `genai.Client` per module, as the day_1 scripts and
+  day_2-day_5 modules built them, with calls spread over `--modules` of them
+- shared client: `get_genai_client()` from `common.gemini_client`
+- model per chain: one `ChatGoogleGenerativeAI` per chain, two chains
+- shared chat model: `get_chat_model()` called once per chain
+
+`--connect-ms` adds a delay to every new connection on the server side, to
+approximate the TCP and TLS handshakes of the real endpoint.
+
+    python common/bench_gemini_client.py
+    python common/bench_gemini_client.py --calls 500 --connect-ms 30
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for `common`
+
+from common import gemini_client
+from common.fakes import FakeGeminiServer
+
+API_KEY = "fake-key"
+MODEL = "gemini-2.5-flash"
+PROMPT = "Classify this log line: disk almost full"
+
+
+def new_genai_client(url: str):
+    from google import genai
+    from google.genai import types
+
+    return genai.Client(api_key=API_KEY, http_options=types.HttpOptions(base_url=url))
+
+
+def new_chat_model(url: str):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(model=MODEL, google_api_key=API_KEY, base_url=url, temperature=0.0)
+
+
+def setups(url: str, modules: int) -> Dict[str, Callable[[], Callable[[int], None]]]:
+    def client_per_call():
+        def call(i: int) -> None:
+            client = new_genai_client(url)  # keep a reference: the client closes itself when collected
+            client.models.generate_content(model=MODEL, contents=PROMPT)
+
+        return call
+
+    def client_per_module():
+        clients = [new_genai_client(url) for _ in range(modules)]
+        return lambda i: clients[i % modules].models.generate_content(model=MODEL, contents=PROMPT)
+
+    def shared_client():
+        return lambda i: gemini_client.get_genai_client(API_KEY).models.generate_content(model=MODEL, contents=PROMPT)
+
+    def model_per_chain():
+        chains = [new_chat_model(url), new_chat_model(url)]
+        return lambda i: chains[i % 2].invoke(PROMPT)
+
+    def shared_chat_model():
+        chains = [gemini_client.get_chat_model(MODEL, API_KEY, temperature=0.0) for _ in range(2)]
+        return lambda i: chains[i % 2].invoke(PROMPT)
+
+    return {
+        "client per call": client_per_call,
+        "client per module": client_per_module,
+        "shared client": shared_client,
+        "model per chain": model_per_chain,
+        "shared chat model": shared_chat_model,
+    }
+
+
+def run(name: str, calls: int, modules: int, connect_delay: float) -> Dict[str, float]:
+    with FakeGeminiServer(connect_delay=connect_delay) as server:
+        gemini_client.configure(gemini_client.ClientSettings(base_url=server.url, http2=False))
+        t0 = time.perf_counter()
+        call = setups(server.url, modules)[name]()
+        setup_ms = (time.perf_counter() - t0) * 1000
+        latencies: List[float] = []
+        for i in range(calls):
+            t0 = time.perf_counter()
+            call(i)
+            latencies.append(time.perf_counter() - t0)
+        gemini_client.reset()
+        return {
+            "calls": calls,
+            "connections": server.connections,
+            "setup_ms": setup_ms,
+            "p50_us": statistics.median(latencies) * 1e6,
+            "mean_us": statistics.fmean(latencies) * 1e6,
+            "total_ms": (sum(latencies) * 1000) + setup_ms,
+        }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline Gemini client reuse check")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--modules", type=int, default=6, help="Separate clients in the 'client per module' run.")
+    parser.add_argument("--connect-ms", type=float, default=0.0, help="Server-side delay per new connection.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    names = list(setups("", args.modules))
+    rows = {name: run(name, args.calls, args.modules, args.connect_ms / 1000) for name in names}
+    print(f"HTTP/2 available: {gemini_client.http2_available()} (the fake server speaks HTTP/1.1)")
+    print(f"{'run':<20}{'calls':>8}{'connections':>13}{'setup ms':>10}{'p50 us':>10}{'mean us':>10}{'total ms':>10}")
+    for label, r in rows.items():
+        print(
+            f"{label:<20}{r['calls']:>8}{r['connections']:>13}{r['setup_ms']:>10.1f}"
+            f"{r['p50_us']:>10.0f}{r['mean_us']:>10.0f}{r['total_ms']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
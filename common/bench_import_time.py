@@ -0,0 +1,85 @@
+"""Import-time benchmark for the CLI and API entry points.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter (with
+GEMINI_API_KEY removed, to prove modules import without credentials) and
+compares the cumulative import time against the budgets in
+`import_budget.json`. Exits non-zero when a module is over budget:
+
+    python common/bench_import_time.py
+    python common/bench_import_time.py --show-top 10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_BUDGET_FILE = Path(__file__).resolve().parent / "import_budget.json"
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def measure(module: str, cwd: Path) -> Tuple[float, List[Tuple[float, str]]]:
+    """Return (cumulative ms for `module`, [(self ms, name)] for every import)."""
+    env = {k: v for k, v in os.environ.items() if k != "GEMINI_API_KEY"}
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+    cumulative = None
+    rows: List[Tuple[float, str]] = []
+    for line in proc.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        rows.append((int(self_us) / 1000, name))
+        if name == module and len(indent) == 1:
+            cumulative = int(cumulative_us) / 1000
+    if cumulative is None:
+        raise RuntimeError(f"No importtime entry found for {module}.")
+    return cumulative, rows
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check entry point import times against a budget")
+    parser.add_argument("--budget-file", type=Path, default=DEFAULT_BUDGET_FILE)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per module (best is kept).")
+    parser.add_argument("--show-top", type=int, default=0, help="Print the N slowest imports per module.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    budgets: Dict[str, Dict] = json.loads(args.budget_file.read_text())["modules"]
+    over_budget = []
+    print(f"{'module':<28} {'best ms':>9} {'budget ms':>10}  status")
+    for label, entry in budgets.items():
+        cwd = REPO_ROOT / entry["cwd"]
+        runs = [measure(entry["module"], cwd) for _ in range(args.repeat)]
+        best, rows = min(runs, key=lambda run: run[0])
+        status = "ok" if best <= entry["budget_ms"] else "OVER"
+        if status != "ok":
+            over_budget.append(label)
+        print(f"{label:<28} {best:>9.1f} {entry['budget_ms']:>10}  {status}")
+        for self_ms, name in sorted(rows, reverse=True)[: args.show_top]:
+            print(f"    {self_ms:>8.1f} ms  {name}")
+    if over_budget:
+        print(f"Over budget: {', '.join(over_budget)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Model cascades: try cheap tiers first and escalate only what they cannot answer.
+
+A `Cascade` runs an input through its tiers in order (e.g. a local heuristic,
+a small model, the large model). Each tier's output goes through the
+cascade's `accept` check, which returns the normalized answer or None (no
+confident answer, wrong format, ...). The first accepted answer wins; a tier
+that fails the check or raises hands the input to the next one. If the last
+tier raises, its exception propagates, so a broken deployment (bad API key,
+network down) fails loudly; if it answers but fails the check,
+`CascadeExhausted` is raised, chained to the last error of an earlier tier.
+
+    router = Cascade(
+        "log_level",
+        [
+            Tier("heuristic", guess_log_level),
+            genai_tier(SMALL_MODEL, client, SMALL_MODEL, config),
+            genai_tier(LARGE_MODEL, client, LARGE_MODEL, config),
+        ],
+        accept=one_of(*LOG_LEVELS),
+    )
+    level = router("Disk quota exceeded")
+
+Per-tier calls, accepts, escalations and latency are kept in `stats()` and, when
+a tracer is given, recorded as `cascade` spans named "<cascade>/<tier>".
+Tiers are plain callables, so fakes can stand in for models. The small and
+large model names default to gemini-2.5-flash-lite and gemini-2.5-flash
+(CASCADE_SMALL_MODEL, CASCADE_LARGE_MODEL).
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Sequence
+
+if TYPE_CHECKING:
+    from common.tracing import Tracer
+
+SMALL_MODEL = os.getenv("CASCADE_SMALL_MODEL", "gemini-2.5-flash-lite")
+LARGE_MODEL = os.getenv("CASCADE_LARGE_MODEL", "gemini-2.5-flash")
+
+
+@dataclass
+class Tier:
+    name: str
+    call: Callable[[Any], Any]
+
+
+class CascadeExhausted(Exception):
+    """The last tier answered, but no tier's answer passed the `accept` check."""
+
+
+def one_of(*labels: str) -> Callable[[Any], Optional[str]]:
+    """Accept a one-word answer from `labels` (case, spacing and punctuation ignored)."""
+    canonical = {label.casefold(): label for label in labels}
+
+    def accept(output: Any) -> Optional[str]:
+        if output is None:
+            return None
+        text = re.sub(r"[^\w\s]", "", str(output)).strip().casefold()
+        return canonical.get(text)
+
+    return accept
+
+
+LOG_LEVELS = ("ERROR", "WARNING", "INFO", "DEBUG")
+
+# Only a literal level token in the line (e.g. "[ERROR]", "level=warn", "INFO:");
+# keywords like "exception" or "default value" are too ambiguous, so the rest
+# goes to the models.
+LOG_LEVEL_PATTERNS = {
+    "ERROR": re.compile(r"(\bERROR\b|\bFATAL\b|\bCRITICAL\b|\blevel=(error|fatal|critical)\b)"),
+    "WARNING": re.compile(r"(\bWARN(ING)?\b|\blevel=warn(ing)?\b)"),
+    "INFO": re.compile(r"(\bINFO\b|\blevel=info\b)"),
+    "DEBUG": re.compile(r"(\bDEBUG\b|\bTRACE\b|\blevel=(debug|trace)\b)"),
+}
+
+
+def guess_log_level(log_message: str) -> Optional[str]:
+    """Local first tier for log levels: the level named by exactly one level token, else None."""
+    levels = [level for level, pattern in LOG_LEVEL_PATTERNS.items() if pattern.search(log_message)]
+    return levels[0] if len(levels) == 1 else None
+
+
+def genai_tier(name: str, client, model: str, config=None) -> Tier:
+    """A tier calling `client.models.generate_content` and returning the response text."""
+
+    def call(contents: Any) -> Optional[str]:
+        return client.models.generate_content(model=model, contents=contents, config=config).text
+
+    return Tier(name, call)
+
+
+def chat_tier(name: str, llm) -> Tier:
+    """A tier invoking a LangChain chat model (or runnable) and returning the message text."""
+
+    def call(prompt: Any) -> str:
+        result = llm.invoke(prompt)
+        return result.text if hasattr(result, "text") else str(result)
+
+    return Tier(name, call)
+
+
+class Cascade:
+    def __init__(
+        self,
+        name: str,
+        tiers: Sequence[Tier],
+        accept: Callable[[Any], Optional[Any]],
+        tracer: Optional["Tracer"] = None,
+    ):
+        if not tiers:
+            raise ValueError("a cascade needs at least one tier")
+        self.name = name
+        self.tiers = list(tiers)
+        self.accept = accept
+        self.tracer = tracer
+        self._counts: Counter = Counter()
+        self._latency_ms: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, value: Any) -> Any:
+        last_error: Optional[Exception] = None
+        for position, tier in enumerate(self.tiers):
+            start = time.perf_counter()
+            error = None
+            answer = None
+            try:
+                answer = self.accept(tier.call(value))
+            except Exception as exc:  # a failing tier escalates like a rejected answer
+                error = type(exc).__name__
+                last_error = exc
+            duration_ms = (time.perf_counter() - start) * 1000
+            outcome = "error" if error else "accepted" if answer is not None else "rejected"
+            with self._lock:
+                self._counts[(tier.name, outcome)] += 1
+                self._latency_ms[tier.name] += duration_ms
+            if self.tracer is not None:
+                self.tracer.observe("cascade", f"{self.name}/{tier.name}", duration_ms, outcome=outcome, error=error)
+            if answer is not None:
+                return answer
+            if error is not None and position == len(self.tiers) - 1:
+                raise last_error
+        raise CascadeExhausted(f"{self.name}: no tier accepted {value!r:.80}") from last_error
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per tier: calls, accepted, escalated (rejected or errored), escalation rate, mean latency."""
+        with self._lock:
+            rows = {}
+            for tier in self.tiers:
+                accepted = self._counts[(tier.name, "accepted")]
+                escalated = self._counts[(tier.name, "rejected")] + self._counts[(tier.name, "error")]
+                calls = accepted + escalated
+                rows[tier.name] = {
+                    "calls": calls,
+                    "accepted": accepted,
+                    "escalated": escalated,
+                    "escalation_rate": escalated / calls if calls else 0.0,
+                    "mean_ms": self._latency_ms[tier.name] / calls if calls else 0.0,
+                }
+            return rows
+
+    def as_runnable(self):
+        """The cascade as a LangChain runnable, for use inside chains."""
+        from langchain_core.runnables import RunnableLambda
+
+        return RunnableLambda(self, name=self.name)
+
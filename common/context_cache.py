@@ -0,0 +1,345 @@
+"""Provider-side caching of stable prompt prefixes (Gemini context caching).
+
+Agents and RAG chains resend the same system prompt (and tool schemas) on every
+call. `CachedPrefixChatModel` wraps a chat model and treats the leading system
+messages plus the bound tools as a stable prefix: the first call registers it
+with the provider's cached-content API, and later calls send only the rest of
+the conversation with the cache handle until the cache's TTL runs out.
+
+Caching is best effort. When the provider or model does not support it, the
+prefix is too short to be cached (Gemini requires ~1k tokens), cache creation
+fails, or the provider no longer knows the handle (deleted or expired early),
+the call is sent uncached as if no cache existed. A refused prefix is not
+offered again until the cache TTL has passed; after a transient creation
+failure (rate limit, server error, timeout) creation is retried within seconds. Other errors of a cached
+call (rate limits, timeouts, ...) are raised as they are, so that an
+overloaded API is not sent every request twice. Streaming calls follow the
+same rules; a stream only falls back while it has produced no output yet.
+
+Cache creation is a blocking network call: it runs outside the cache's lock,
+once per prefix however many calls need it at the same time, and off the
+event loop for async calls.
+
+    cache = ContextCache(GeminiContextCacheBackend())
+    llm = CachedPrefixChatModel(inner=build_llm(), context_cache=cache)
+    llm = maybe_cache_prefix(build_llm())  # same, when GEMINI_CONTEXT_CACHE=1
+
+Cached prompt tokens are reported in `usage_metadata["input_token_details"]["cache_read"]`,
+which `common.tracing` exports as the `cached_input` token direction.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import ConfigDict, Field
+
+
+def approx_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def split_prefix(messages: Sequence[BaseMessage]) -> Tuple[List[BaseMessage], List[BaseMessage]]:
+    """Split off the leading system messages, the part of a prompt that repeats across calls."""
+    index = 0
+    while index < len(messages) and isinstance(messages[index], SystemMessage):
+        index += 1
+    return list(messages[:index]), list(messages[index:])
+
+
+class CachingUnsupported(Exception):
+    """The provider cannot cache this prefix (model unsupported, prefix too small, ...)."""
+
+
+class ContextCacheBackend(ABC):
+    """A provider's cached-content API."""
+
+    @abstractmethod
+    def supports(self, model: BaseChatModel) -> bool:
+        """Whether requests to `model` can use this backend's caches."""
+
+    @abstractmethod
+    def create(
+        self, model: BaseChatModel, prefix: List[BaseMessage], tools: Sequence[Any], ttl_seconds: int
+    ) -> str:
+        """Register the prefix and return the cache handle, or raise CachingUnsupported."""
+
+    def is_stale_handle(self, error: Exception) -> bool:
+        """Whether a cached call failed because the handle is gone (not found or expired)."""
+        message = str(error).lower()
+        return "cache" in message and any(marker in message for marker in ("not found", "expired", "not exist"))
+
+
+class GeminiContextCacheBackend(ContextCacheBackend):
+    """Gemini cached contents, created through langchain-google-genai."""
+
+    def supports(self, model: BaseChatModel) -> bool:
+        return type(model).__name__ == "ChatGoogleGenerativeAI"
+
+    def create(
+        self, model: BaseChatModel, prefix: List[BaseMessage], tools: Sequence[Any], ttl_seconds: int
+    ) -> str:
+        from langchain_google_genai import create_context_cache
+
+        try:
+            return create_context_cache(model, prefix, ttl=f"{ttl_seconds}s", tools=list(tools) or None)
+        except Exception as exc:
+            # Rejected requests (model without caching, prefix below minimum size, ...)
+            # are refused for good; rate limits, server and network errors are raised.
+            if isinstance(exc, ValueError) or getattr(exc, "code", None) in (400, 403, 404):
+                raise CachingUnsupported(str(exc)) from exc
+            raise
+
+
+class ContextCache:
+    """Cache handles keyed by (model, prefix, tools), reused until shortly before they expire.
+
+    Prefixes estimated below `min_tokens` are never sent to the provider. A
+    prefix the provider refused is not retried for `ttl_seconds`, one whose
+    creation failed otherwise (rate limit, timeout, ...) for `retry_seconds`.
+    """
+
+    def __init__(
+        self,
+        backend: ContextCacheBackend,
+        ttl_seconds: int = 3600,
+        refresh_margin: float = 60.0,
+        min_tokens: int = 1024,
+        retry_seconds: float = 30.0,
+    ):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = retry_seconds
+        self.refresh_margin = refresh_margin
+        self.min_tokens = min_tokens
+        self.stats: Counter = Counter()
+        self._handles: Dict[str, Tuple[str, float]] = {}
+        self._refused: Dict[str, float] = {}
+        self._creating: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(model: BaseChatModel, prefix: Sequence[BaseMessage], tools: Sequence[Any]) -> str:
+        payload = json.dumps(
+            [getattr(model, "model", type(model).__name__), [m.content for m in prefix], list(tools)],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, model: BaseChatModel, prefix: List[BaseMessage], tools: Sequence[Any]) -> Optional[str]:
+        """Return a live cache handle for the prefix, creating one if possible."""
+        if not prefix or not self.backend.supports(model):
+            return None
+        tokens = sum(approx_tokens(str(m.content)) for m in prefix)
+        tokens += approx_tokens(json.dumps(list(tools), default=str))
+        if tokens < self.min_tokens:
+            self.stats["too_small"] += 1
+            return None
+        key = self.key_for(model, prefix, tools)
+        while True:
+            with self._lock:
+                now = time.time()
+                entry = self._handles.get(key)
+                if entry is not None and entry[1] - self.refresh_margin > now:
+                    self.stats["reused"] += 1
+                    return entry[0]
+                if self._refused.get(key, 0.0) > now:
+                    self.stats["refused"] += 1
+                    return None
+                creating = self._creating.get(key)
+                if creating is None:
+                    creating = self._creating[key] = threading.Event()
+                    break
+            # Another call is creating this prefix's cache: wait for it, then look again.
+            creating.wait()
+        handle: Optional[str] = None
+        failed = False
+        try:
+            handle = self.backend.create(model, prefix, tools, self.ttl_seconds)
+        except CachingUnsupported:
+            pass
+        except Exception:  # rate limit, timeout, ...: this call goes uncached, a later one retries
+            failed = True
+        finally:
+            with self._lock:
+                if handle is None:
+                    self._refused[key] = now + (self.retry_seconds if failed else self.ttl_seconds)
+                    self.stats["create_failed" if failed else "refused"] += 1
+                else:
+                    self._handles[key] = (handle, now + self.ttl_seconds)
+                    self.stats["created"] += 1
+                del self._creating[key]
+            creating.set()
+        return handle
+
+    def is_stale_handle(self, error: Exception) -> bool:
+        return self.backend.is_stale_handle(error)
+
+    def invalidate(self, handle: str) -> None:
+        """Forget a handle the provider rejected; the next lookup recreates it."""
+        with self._lock:
+            for key, (known, _) in list(self._handles.items()):
+                if known == handle:
+                    del self._handles[key]
+            self.stats["invalidated"] += 1
+
+
+class CachedPrefixChatModel(BaseChatModel):
+    """Chat model wrapper that serves the stable prompt prefix from a provider cache."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    inner: BaseChatModel
+    context_cache: ContextCache
+    tools: List[Any] = Field(default_factory=list)
+    tool_kwargs: Dict[str, Any] = Field(default_factory=dict)
+
+    @property
+    def _llm_type(self) -> str:
+        return f"cached-prefix-{self.inner._llm_type}"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "CachedPrefixChatModel":
+        return self.model_copy(update={"tools": list(tools), "tool_kwargs": kwargs})
+
+    def _plan(self, messages: List[BaseMessage]) -> Tuple[Optional[str], List[BaseMessage]]:
+        prefix, rest = split_prefix(messages)
+        schemas = [convert_to_openai_tool(t) for t in self.tools]
+        handle = self.context_cache.lookup(self.inner, prefix, schemas)
+        return handle, rest
+
+    async def _aplan(self, messages: List[BaseMessage]) -> Tuple[Optional[str], List[BaseMessage]]:
+        # A cache miss creates the cache over the network; keep that off the event loop.
+        return await asyncio.to_thread(self._plan, messages)
+
+    def _uncached_kwargs(self) -> Dict[str, Any]:
+        if not self.tools:
+            return {}
+        return dict(self.inner.bind_tools(self.tools, **self.tool_kwargs).kwargs)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        handle, rest = self._plan(messages)
+        if handle is not None:
+            try:
+                return self.inner._generate(rest, stop=stop, run_manager=run_manager, cached_content=handle, **kwargs)
+            except Exception as error:
+                if not self.context_cache.is_stale_handle(error):
+                    raise
+                self.context_cache.invalidate(handle)
+        self.context_cache.stats["uncached_calls"] += 1
+        return self.inner._generate(messages, stop=stop, run_manager=run_manager, **self._uncached_kwargs(), **kwargs)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        handle, rest = await self._aplan(messages)
+        if handle is not None:
+            try:
+                return await self.inner._agenerate(
+                    rest, stop=stop, run_manager=run_manager, cached_content=handle, **kwargs
+                )
+            except Exception as error:
+                if not self.context_cache.is_stale_handle(error):
+                    raise
+                self.context_cache.invalidate(handle)
+        self.context_cache.stats["uncached_calls"] += 1
+        return await self.inner._agenerate(
+            messages, stop=stop, run_manager=run_manager, **self._uncached_kwargs(), **kwargs
+        )
+
+    def _should_stream(self, *, async_api: bool, **kwargs: Any) -> bool:
+        return self.inner._should_stream(async_api=async_api, **kwargs)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        handle, rest = self._plan(messages)
+        if handle is not None:
+            chunks = self.inner._stream(rest, stop=stop, run_manager=run_manager, cached_content=handle, **kwargs)
+            try:
+                first = next(chunks, None)
+            except Exception as error:  # rejected before any output: fall back below
+                if not self.context_cache.is_stale_handle(error):
+                    raise
+                self.context_cache.invalidate(handle)
+            else:
+                if first is not None:
+                    yield first
+                    yield from chunks
+                return
+        self.context_cache.stats["uncached_calls"] += 1
+        yield from self.inner._stream(messages, stop=stop, run_manager=run_manager, **self._uncached_kwargs(), **kwargs)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        handle, rest = await self._aplan(messages)
+        if handle is not None:
+            chunks = self.inner._astream(rest, stop=stop, run_manager=run_manager, cached_content=handle, **kwargs)
+            try:
+                first = await anext(chunks, None)
+            except Exception as error:
+                if not self.context_cache.is_stale_handle(error):
+                    raise
+                self.context_cache.invalidate(handle)
+            else:
+                if first is not None:
+                    yield first
+                    async for chunk in chunks:
+                        yield chunk
+                return
+        self.context_cache.stats["uncached_calls"] += 1
+        async for chunk in self.inner._astream(
+            messages, stop=stop, run_manager=run_manager, **self._uncached_kwargs(), **kwargs
+        ):
+            yield chunk
+
+
+_shared_cache: Optional[ContextCache] = None
+
+
+def maybe_cache_prefix(llm: BaseChatModel) -> BaseChatModel:
+    """Wrap `llm` with the process-wide Gemini context cache when GEMINI_CONTEXT_CACHE=1.
+
+    GEMINI_CONTEXT_CACHE_TTL sets the cache lifetime in seconds (default 3600).
+    """
+    global _shared_cache
+    if os.getenv("GEMINI_CONTEXT_CACHE", "0") != "1":
+        return llm
+    if _shared_cache is None:
+        _shared_cache = ContextCache(
+            GeminiContextCacheBackend(),
+            ttl_seconds=int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600")),
+        )
+    return CachedPrefixChatModel(inner=llm, context_cache=_shared_cache)
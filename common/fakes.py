@@ -0,0 +1,501 @@
+"""Offline fakes of provider features, for benchmarks and local runs.
+
+`FakeContextCacheAPI` stands in for Gemini's cached-content API and
+`FakeCachingChatModel` for a Gemini chat model that accepts `cached_content`.
+The fake model enforces the same rules as the real service (no system
+instruction or tools next to a cache handle; unknown or expired handles are
+rejected) and reports cached prompt tokens the way langchain-google-genai does.
+
+`FakeGeminiServer` is a local HTTP endpoint for the Gemini generate, stream
+and embedding calls: synthetic replies, or responses recorded once from the
+real API and replayed from a cassette, with configurable latency, token rate
+and injected errors. It counts the TCP connections clients open.
+"""
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import ConfigDict
+
+from common.context_cache import CachingUnsupported, ContextCacheBackend, approx_tokens
+
+
+@dataclass
+class FakeCachedContent:
+    name: str
+    tokens: int
+    expires_at: float
+
+
+class FakeContextCacheAPI(ContextCacheBackend):
+    """In-memory cached-content store with a minimum cacheable size."""
+
+    def __init__(self, min_tokens: int = 1024):
+        self.min_tokens = min_tokens
+        self.caches: Dict[str, FakeCachedContent] = {}
+        self._ids = itertools.count(1)
+
+    def supports(self, model: BaseChatModel) -> bool:
+        return isinstance(model, FakeCachingChatModel)
+
+    def create(
+        self, model: BaseChatModel, prefix: List[BaseMessage], tools: Sequence[Any], ttl_seconds: int
+    ) -> str:
+        tokens = sum(approx_tokens(str(m.content)) for m in prefix) + approx_tokens(str(list(tools)))
+        if tokens < self.min_tokens:
+            raise CachingUnsupported(f"Cached content is too small: {tokens} < {self.min_tokens} tokens.")
+        name = f"cachedContents/fake-{next(self._ids)}"
+        self.caches[name] = FakeCachedContent(name, tokens, time.time() + ttl_seconds)
+        return name
+
+    def get(self, name: str) -> FakeCachedContent:
+        cached = self.caches.get(name)
+        if cached is None or cached.expires_at <= time.time():
+            raise ValueError(f"404 CachedContent not found (or expired): {name}")
+        return cached
+
+    def expire(self, name: str) -> None:
+        """Simulate the provider dropping a cache before its TTL."""
+        self.caches.pop(name, None)
+
+
+class FakeCachingChatModel(BaseChatModel):
+    """Replies "ok" and reports prompt tokens, counting cache hits as `cache_read`."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    api: FakeContextCacheAPI
+    model: str = "fake-gemini"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-caching-gemini"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        cached_content: Optional[str] = None,
+        tools: Optional[List[Any]] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt_tokens = sum(approx_tokens(str(m.content)) for m in messages)
+        cached_tokens = 0
+        if cached_content is not None:
+            if tools or any(isinstance(m, SystemMessage) for m in messages):
+                raise ValueError("CachedContent can not be used with system_instruction or tools.")
+            cached_tokens = self.api.get(cached_content).tokens
+        elif tools:
+            prompt_tokens += approx_tokens(str(tools))
+        input_tokens = prompt_tokens + cached_tokens
+        message = AIMessage(
+            content="ok",
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": 1,
+                "total_tokens": input_tokens + 1,
+                "input_token_details": {"cache_read": cached_tokens},
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+GEMINI_UPSTREAM = "https://generativelanguage.googleapis.com/"
+ERROR_STATUSES = {404: "NOT_FOUND", 429: "RESOURCE_EXHAUSTED", 500: "INTERNAL", 503: "UNAVAILABLE", 504: "DEADLINE_EXCEEDED"}
+
+
+def fake_embedding(text: str, dims: int) -> List[float]:
+    """Deterministic unit-length bag-of-words vector: texts sharing words are similar."""
+    vector = [0.0] * dims
+    for word in re.findall(r"\w+", text.lower()):
+        vector[zlib.crc32(word.encode("utf-8")) % dims] += 1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class Cassette:
+    """Recorded Gemini responses in a JSONL file, keyed by endpoint and request body."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]] = entry
+
+    @staticmethod
+    def key(path: str, body: bytes) -> str:
+        endpoint = path.split("?", 1)[0]
+        try:
+            canonical = json.dumps(json.loads(body or b"{}"), sort_keys=True)
+        except ValueError:
+            canonical = body.decode("utf-8", "replace")
+        return hashlib.sha256(f"{endpoint}\n{canonical}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.entries[entry["key"]] = entry
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+class FakeGeminiServer:
+    """Keep-alive HTTP/1.1 server on localhost speaking just enough of the Gemini REST API.
+
+    Serves `generateContent`, `streamGenerateContent`, `embedContent` and
+    `batchEmbedContents`. In the default "synthetic" mode it answers with
+    `reply` (or, for requests with a JSON response schema, a minimal value
+    matching it) and bag-of-words embeddings; with a `cassette` it can instead
+    "record" responses from `upstream` (the real API, using the caller's API
+    key) or "replay" them, failing with 404 on requests it has not seen.
+
+    Timing: `connect_delay` is slept once per new connection (TCP and TLS
+    handshakes), `latency` once per request (time to first byte), and
+    `token_delay` per word of generated text; streamed replies are sent as
+    server-sent events. `error_rate` of the requests fail with `error_status`
+    (seeded by `seed`, so runs are repeatable).
+
+        with FakeGeminiServer() as server:
+            configure(ClientSettings(base_url=server.url))
+
+    Setting GEMINI_FAKE makes `common.gemini_client` start one for the process;
+    see `fake_server_from_env`.
+    """
+
+    def __init__(
+        self,
+        reply: str = "ok",
+        connect_delay: float = 0.0,
+        token_delay: float = 0.0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: int = 0,
+        mode: str = "synthetic",
+        cassette: Optional[Path] = None,
+        upstream: str = GEMINI_UPSTREAM,
+        embedding_dims: int = 768,
+    ):
+        if mode not in ("synthetic", "record", "replay"):
+            raise ValueError(f"unknown fake Gemini mode: {mode!r}")
+        if mode != "synthetic" and cassette is None:
+            raise ValueError(f"{mode} mode needs a cassette path")
+        self.reply = reply
+        self.connect_delay = connect_delay
+        self.token_delay = token_delay
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.mode = mode
+        self.cassette = Cassette(cassette) if cassette is not None else None
+        self.upstream = upstream.rstrip("/") + "/"
+        self.embedding_dims = embedding_dims
+        self.connections = 0
+        self.requests = 0
+        self.errors = 0
+        self.misses = 0
+        self.request_bytes: List[int] = []
+        self._random = random.Random(seed)
+        self._upstream_client = None
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # else delayed ACKs add ~40 ms to keep-alive replies
+
+            def setup(self) -> None:
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+                if server.connect_delay:
+                    time.sleep(server.connect_delay)
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                stream = ":streamGenerateContent" in self.path
+                with server._lock:
+                    server.requests += 1
+                    server.request_bytes.append(len(body))
+                    failed = server.error_rate and server._random.random() < server.error_rate
+                if server.latency:
+                    time.sleep(server.latency)
+                if failed:
+                    with server._lock:
+                        server.errors += 1
+                    self._send_error(server.error_status, "Injected error from the fake Gemini server.")
+                elif server.mode == "record":
+                    self._record(body, stream)
+                elif server.mode == "replay":
+                    self._replay(body, stream)
+                elif stream:
+                    self._send_events(server._stream_events(server._reply_for(json.loads(body or b"{}")), len(body)))
+                else:
+                    self._send_json(server._synthetic(self.path, body))
+
+            def _send_json(self, payload: Dict[str, Any], status: int = 200) -> None:
+                if status == 200 and "candidates" in payload:
+                    server._pace(payload)
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_error(self, status: int, message: str) -> None:
+                error = {"code": status, "message": message, "status": ERROR_STATUSES.get(status, "UNKNOWN")}
+                self._send_json({"error": error}, status)
+
+            def _send_events(self, events: Iterable[Dict[str, Any]]) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for event in events:
+                    server._pace(event)
+                    data = f"data: {json.dumps(event)}\r\n\r\n".encode("utf-8")
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _replay(self, body: bytes, stream: bool) -> None:
+                entry = server.cassette.get(Cassette.key(self.path, body))
+                if entry is None:
+                    with server._lock:
+                        server.misses += 1
+                    self._send_error(404, f"No recorded response for {self.path.split('?', 1)[0]} in {server.cassette.path}.")
+                elif stream:
+                    self._send_events(entry["events"])
+                else:
+                    self._send_json(entry["body"])
+
+            def _record(self, body: bytes, stream: bool) -> None:
+                headers = {k: v for k, v in self.headers.items() if k.lower().startswith("x-goog-")}
+                headers["Content-Type"] = "application/json"
+                url = server.upstream + self.path.lstrip("/")
+                entry: Dict[str, Any] = {"key": Cassette.key(self.path, body), "path": self.path.split("?", 1)[0]}
+                client = server._upstream()
+                if stream:
+                    with client.stream("POST", url, content=body, headers=headers) as response:
+                        if response.status_code != 200:
+                            self._send_json(json.loads(response.read() or b"{}"), response.status_code)
+                            return
+                        events = [json.loads(line[5:]) for line in response.iter_lines() if line.startswith("data:")]
+                    entry["events"] = events
+                    self._send_events(events)
+                else:
+                    response = client.post(url, content=body, headers=headers)
+                    payload = response.json()
+                    if response.status_code != 200:
+                        self._send_json(payload, response.status_code)
+                        return
+                    entry["body"] = payload
+                    self._send_json(payload)
+                server.cassette.add(entry)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
+
+    def _upstream(self):
+        with self._lock:
+            if self._upstream_client is None:
+                import httpx
+
+                self._upstream_client = httpx.Client(timeout=httpx.Timeout(120.0, connect=10.0))
+            return self._upstream_client
+
+    def _pace(self, payload: Dict[str, Any]) -> None:
+        """Sleep `token_delay` per word of generated text in a response or stream event."""
+        if not self.token_delay:
+            return
+        words = 0
+        for candidate in payload.get("candidates") or []:
+            for part in (candidate.get("content") or {}).get("parts") or []:
+                words += len(str(part.get("text", "")).split())
+        time.sleep(self.token_delay * max(1, words))
+
+    def _synthetic(self, path: str, body: bytes) -> Dict[str, Any]:
+        request = json.loads(body or b"{}")
+        if ":batchEmbedContents" in path:
+            return {"embeddings": [self._embedding(r) for r in request.get("requests", [])]}
+        if ":embedContent" in path:
+            return {"embedding": self._embedding(request)}
+        return self._response(self._reply_for(request), len(body))
+
+    def _reply_for(self, request: Dict[str, Any]) -> str:
+        """`reply`, or when JSON output is requested a minimal JSON value matching the response schema.
+
+        A `reply` that is itself valid JSON is returned as is. Otherwise enums
+        take `reply` when it is one of their values (else their first value),
+        strings take `reply`, numbers 0, booleans false and arrays their
+        `minItems` count of elements.
+        """
+        config = request.get("generationConfig") or {}
+        schema = config.get("responseJsonSchema") or config.get("responseSchema")
+        if schema is None and config.get("responseMimeType") != "application/json":
+            return self.reply
+        try:
+            json.loads(self.reply)
+            return self.reply
+        except ValueError:
+            pass
+        return json.dumps(self._schema_value(schema or {}, schema or {}))
+
+    def _schema_value(self, schema: Dict[str, Any], root: Dict[str, Any]) -> Any:
+        # Both Gemini's OpenAPI subset (`responseSchema`, upper-case types) and
+        # JSON Schema (`responseJsonSchema`, with `$defs` references).
+        if "$ref" in schema:
+            target: Any = root
+            for key in schema["$ref"].lstrip("#/").split("/"):
+                target = target[key]
+            return self._schema_value(target, root)
+        if "const" in schema:
+            return schema["const"]
+        if schema.get("enum"):
+            return self.reply if self.reply in schema["enum"] else schema["enum"][0]
+        for key in ("anyOf", "oneOf", "allOf"):
+            options = [o for o in schema.get(key) or [] if str(o.get("type", "")).lower() != "null"]
+            if options:
+                return self._schema_value(options[0], root)
+        kind = schema.get("type", "object" if "properties" in schema else "string")
+        if isinstance(kind, list):
+            kind = next((k for k in kind if str(k).lower() != "null"), "null")
+        kind = str(kind).lower()
+        if kind == "object":
+            return {name: self._schema_value(prop, root) for name, prop in (schema.get("properties") or {}).items()}
+        if kind == "array":
+            return [self._schema_value(schema.get("items") or {}, root) for _ in range(int(schema.get("minItems") or 0))]
+        if kind in ("integer", "number"):
+            return schema.get("minimum", 0)
+        if kind == "boolean":
+            return False
+        if kind == "null":
+            return None
+        return self.reply
+
+    def _embedding(self, request: Dict[str, Any]) -> Dict[str, List[float]]:
+        text = " ".join(str(p.get("text", "")) for p in (request.get("content") or {}).get("parts") or [])
+        return {"values": fake_embedding(text, int(request.get("outputDimensionality") or self.embedding_dims))}
+
+    def _stream_events(self, reply: str, prompt_bytes: int) -> Iterator[Dict[str, Any]]:
+        words = reply.split(" ")
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            yield self._response(word if last else word + " ", prompt_bytes, last=last, reply=reply)
+
+    def _response(
+        self, text: str, prompt_bytes: int, last: bool = True, reply: Optional[str] = None
+    ) -> Dict[str, Any]:
+        candidate: Dict[str, Any] = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+        if last:
+            candidate["finishReason"] = "STOP"
+        prompt_tokens = max(1, prompt_bytes // 4)
+        reply_tokens = approx_tokens(text if reply is None else reply)
+        return {
+            "candidates": [candidate],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": reply_tokens,
+                "totalTokenCount": prompt_tokens + reply_tokens,
+            },
+        }
+
+    def start(self) -> "FakeGeminiServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._upstream_client is not None:
+            self._upstream_client.close()
+
+    def __enter__(self) -> "FakeGeminiServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def parse_fake_spec(spec: str) -> Dict[str, Any]:
+    """`FakeGeminiServer` options from a GEMINI_FAKE value.
+
+    "1" (or "synthetic") uses the defaults; otherwise a comma-separated list of
+    `record=PATH`, `replay=PATH`, `upstream=URL`, `latency_ms=`, `connect_ms=`,
+    `tokens_per_s=`, `error_rate=`, `error_status=`, `seed=`, `reply=` and
+    `embedding_dims=`, e.g. "replay=cassettes/rag.jsonl,latency_ms=300,tokens_per_s=40".
+    """
+    options: Dict[str, Any] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        if item in ("1", "true", "synthetic"):
+            continue
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"GEMINI_FAKE: expected name=value, got {item!r}")
+        if name in ("record", "replay"):
+            options["mode"], options["cassette"] = name, Path(value)
+        elif name in ("upstream", "reply"):
+            options[name] = value
+        elif name == "latency_ms":
+            options["latency"] = float(value) / 1000
+        elif name == "connect_ms":
+            options["connect_delay"] = float(value) / 1000
+        elif name == "tokens_per_s":
+            options["token_delay"] = 1 / float(value) if float(value) > 0 else 0.0
+        elif name == "error_rate":
+            options["error_rate"] = float(value)
+        elif name in ("error_status", "seed", "embedding_dims"):
+            options[name] = int(value)
+        else:
+            raise ValueError(f"GEMINI_FAKE: unknown option {name!r}")
+    return options
+
+
+def fake_server_from_env() -> Optional[FakeGeminiServer]:
+    """Start a `FakeGeminiServer` configured by GEMINI_FAKE, or None when it is unset."""
+    spec = os.getenv("GEMINI_FAKE", "").strip()
+    if not spec or spec == "0":
+        return None
+    return FakeGeminiServer(**parse_fake_spec(spec)).start()
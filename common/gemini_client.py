@@ -0,0 +1,225 @@
+"""Process-wide Gemini clients that share one pooled HTTP connection set.
+
+Building a `genai.Client` or `ChatGoogleGenerativeAI` creates a fresh httpx
+client, so every module (and every chain with its own model object) opens and
+TLS-handshakes its own connections. The factories here hand out one
+`genai.Client` per API key, backed by shared keep-alive httpx clients, and one
+chat model / embeddings object per (model, params):
+
+    client = get_genai_client()                       # day_1 style, raw SDK
+    llm = get_chat_model(temperature=0.2)              # LangChain chat model
+    embeddings = get_embeddings("gemini-embedding-001")
+
+Calling a factory twice with the same arguments returns the same object.
+Setting GEMINI_FAKE points every client at a local `FakeGeminiServer` started
+for the process (synthetic replies, or a record/replay cassette; see
+`common.fakes.parse_fake_spec`), so modules run without network access or a
+real API key.
+Connection settings come from the environment (see `ClientSettings.from_env`);
+HTTP/2 is used when the optional `h2` package is installed. The shared async
+httpx client belongs to the first event loop that uses it, which matches one
+uvicorn worker or one `asyncio.run` per process.
+"""
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import threading
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from google import genai
+    from langchain_core.embeddings import Embeddings
+    from langchain_core.language_models import BaseChatModel
+
+DEFAULT_CHAT_MODEL = "gemini-2.5-flash"
+DEFAULT_EMBEDDING_MODEL = "gemini-embedding-001"
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+@dataclass(frozen=True)
+class ClientSettings:
+    timeout_s: float = 60.0
+    connect_timeout_s: float = 10.0
+    max_retries: int = 3
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry_s: float = 60.0
+    http2: bool = False
+    base_url: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "ClientSettings":
+        """Read GEMINI_HTTP_TIMEOUT, GEMINI_HTTP_CONNECT_TIMEOUT, GEMINI_MAX_RETRIES,
+        GEMINI_MAX_CONNECTIONS, GEMINI_MAX_KEEPALIVE, GEMINI_KEEPALIVE_EXPIRY,
+        GEMINI_HTTP2 (auto/1/0) and GEMINI_BASE_URL."""
+        http2 = os.getenv("GEMINI_HTTP2", "auto")
+        return cls(
+            timeout_s=float(os.getenv("GEMINI_HTTP_TIMEOUT", "60")),
+            connect_timeout_s=float(os.getenv("GEMINI_HTTP_CONNECT_TIMEOUT", "10")),
+            max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "3")),
+            max_connections=int(os.getenv("GEMINI_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("GEMINI_MAX_KEEPALIVE", "10")),
+            keepalive_expiry_s=float(os.getenv("GEMINI_KEEPALIVE_EXPIRY", "60")),
+            http2=http2_available() if http2 == "auto" else http2 == "1",
+            base_url=os.getenv("GEMINI_BASE_URL") or None,
+        )
+
+
+_lock = threading.Lock()
+_settings: Optional[ClientSettings] = None
+_http_clients: Optional[Tuple[Any, Any]] = None
+_fake_server: Any = None
+_genai_clients: Dict[str, "genai.Client"] = {}
+_models: Dict[Tuple[str, str, str, str], Any] = {}
+
+
+def settings() -> ClientSettings:
+    global _settings
+    if _settings is None:
+        _settings = ClientSettings.from_env()
+        if _settings.base_url is None and _fake_url() is not None:
+            _settings = replace(_settings, base_url=_fake_url())
+    return _settings
+
+
+def _fake_url() -> Optional[str]:
+    """URL of the process's GEMINI_FAKE server, started on first use (None when unset)."""
+    global _fake_server
+    if _fake_server is None and os.getenv("GEMINI_FAKE", "0").strip() not in ("", "0"):
+        from common.fakes import fake_server_from_env
+
+        _fake_server = fake_server_from_env()
+    return _fake_server.url if _fake_server is not None else None
+
+
+def gemini_api_key() -> Optional[str]:
+    """GEMINI_API_KEY, or a placeholder when GEMINI_FAKE serves requests without recording."""
+    api_key = os.getenv("GEMINI_API_KEY")
+    if api_key:
+        return api_key
+    fake = os.getenv("GEMINI_FAKE", "0").strip()
+    if fake not in ("", "0") and "record=" not in fake:
+        return "fake-key"
+    return None
+
+
+def configure(new_settings: Optional[ClientSettings] = None) -> None:
+    """Replace the connection settings (None re-reads the environment) and drop cached clients."""
+    global _settings
+    reset()
+    _settings = new_settings
+
+
+def reset() -> None:
+    """Close the shared HTTP clients and forget every cached client and model."""
+    global _http_clients
+    with _lock:
+        if _http_clients is not None:
+            _http_clients[0].close()
+            # The async client is left to the garbage collector: closing it needs its event loop.
+        _http_clients = None
+        _genai_clients.clear()
+        _models.clear()
+
+
+def _require_api_key(api_key: Optional[str]) -> str:
+    api_key = api_key or gemini_api_key()
+    if not api_key:
+        raise RuntimeError("GEMINI_API_KEY not set in environment.")
+    return api_key
+
+
+def _shared_http_clients() -> Tuple[Any, Any]:
+    global _http_clients
+    if _http_clients is None:
+        import httpx
+
+        cfg = settings()
+        limits = httpx.Limits(
+            max_connections=cfg.max_connections,
+            max_keepalive_connections=cfg.max_keepalive_connections,
+            keepalive_expiry=cfg.keepalive_expiry_s,
+        )
+        timeout = httpx.Timeout(cfg.timeout_s, connect=cfg.connect_timeout_s)
+        _http_clients = (
+            httpx.Client(limits=limits, timeout=timeout, http2=cfg.http2),
+            httpx.AsyncClient(limits=limits, timeout=timeout, http2=cfg.http2),
+        )
+    return _http_clients
+
+
+def get_genai_client(api_key: Optional[str] = None) -> "genai.Client":
+    """The process-wide `genai.Client` for this API key (default: GEMINI_API_KEY)."""
+    api_key = _require_api_key(api_key)
+    with _lock:
+        client = _genai_clients.get(api_key)
+        if client is None:
+            from google import genai
+            from google.genai import types
+
+            cfg = settings()
+            sync_http, async_http = _shared_http_clients()
+            client = genai.Client(
+                api_key=api_key,
+                http_options=types.HttpOptions(
+                    base_url=cfg.base_url,
+                    timeout=int(cfg.timeout_s * 1000),
+                    retry_options=types.HttpRetryOptions(attempts=cfg.max_retries),
+                    httpx_client=sync_http,
+                    httpx_async_client=async_http,
+                ),
+            )
+            _genai_clients[api_key] = client
+        return client
+
+
+def _model_key(kind: str, model: str, api_key: str, params: Dict[str, Any]) -> Tuple[str, str, str, str]:
+    return kind, model, api_key, json.dumps(params, sort_keys=True, default=repr)
+
+
+def get_chat_model(
+    model: str = DEFAULT_CHAT_MODEL, api_key: Optional[str] = None, **params: Any
+) -> "BaseChatModel":
+    """The process-wide `ChatGoogleGenerativeAI` for (model, params), on the shared client.
+
+    `params` are passed to `ChatGoogleGenerativeAI` (temperature, max_output_tokens, ...).
+    """
+    api_key = _require_api_key(api_key)
+    key = _model_key("chat", model, api_key, params)
+    llm = _models.get(key)
+    if llm is not None:
+        return llm
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    cfg = settings()
+    client = get_genai_client(api_key)
+    options = {"timeout": cfg.timeout_s, "max_retries": cfg.max_retries, **params}
+    llm = ChatGoogleGenerativeAI(model=model, google_api_key=api_key, **options)
+    # The model always builds its own client; swap in the shared one so calls reuse its pool.
+    llm.client = client
+    with _lock:
+        return _models.setdefault(key, llm)
+
+
+def get_embeddings(
+    model: str = DEFAULT_EMBEDDING_MODEL, api_key: Optional[str] = None, **params: Any
+) -> "Embeddings":
+    """The process-wide `GoogleGenerativeAIEmbeddings` for (model, params), on the shared client."""
+    api_key = _require_api_key(api_key)
+    key = _model_key("embeddings", model, api_key, params)
+    embeddings = _models.get(key)
+    if embeddings is not None:
+        return embeddings
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    client = get_genai_client(api_key)
+    embeddings = GoogleGenerativeAIEmbeddings(model=model, google_api_key=api_key, **params)
+    embeddings.client = client
+    with _lock:
+        return _models.setdefault(key, embeddings)
@@ -0,0 +1,59 @@
+"""Single-flight coalescing of identical concurrent async calls.
+
+When several callers ask for the same key while a computation for it is still
+running, they all await that one computation instead of starting their own:
+
+    flight = SingleFlight()
+    answer = await flight.do(normalize_text(question), lambda: expensive(question))
+
+Nothing is cached: once the computation finishes the key is forgotten, so the
+next caller starts a fresh one. The shared computation runs as its own task,
+so a caller that is cancelled (e.g. a client disconnect) does not cancel it
+for the others. Errors are raised to every caller that shared the flight.
+"""
+from __future__ import annotations
+
+import asyncio
+import re
+from typing import Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+def normalize_text(text: str) -> str:
+    """Coalescing key for free text: case, spacing and punctuation are ignored."""
+    return " ".join(re.findall(r"\w+", text.casefold()))
+
+
+class SingleFlight(Generic[T]):
+    """Deduplicates concurrent calls per key within one event loop."""
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.executions = 0
+
+    @property
+    def shared(self) -> int:
+        """Calls that were served by another caller's computation."""
+        return self.calls - self.executions
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await `fn()`, or the already running computation for `key`."""
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every caller went away
@@ -0,0 +1,57 @@
+"""Print streamed model output as it arrives, timing the first token.
+
+The interactive CLIs stream every answer and keep the assembled text for
+their conversation history:
+
+    text, timing = print_stream(chunk.text for chunk in llm.stream(prompt))
+    if args.timing:
+        print(timing.describe())
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from common.tracing import Tracer
+
+
+@dataclass
+class StreamTiming:
+    first_token_ms: Optional[float]
+    total_ms: float
+    chunks: int
+
+    def describe(self) -> str:
+        first = "no output" if self.first_token_ms is None else f"first token {self.first_token_ms:.0f} ms"
+        return f"[{first}, total {self.total_ms:.0f} ms, {self.chunks} chunks]"
+
+
+def print_stream(
+    chunks: Iterable[Optional[str]],
+    prefix: str = "Assistant: ",
+    tracer: Optional["Tracer"] = None,
+    name: str = "chat",
+) -> Tuple[str, StreamTiming]:
+    """Echo text chunks to stdout as they arrive; return the full text and its timing.
+
+    Empty chunks (e.g. tool-call deltas) are skipped. With a tracer, time to
+    first token is also recorded as a `first_token` span named `name`.
+    """
+    start = time.perf_counter()
+    first_token_ms: Optional[float] = None
+    parts: List[str] = []
+    print(prefix, end="", flush=True)
+    for text in chunks:
+        if not text:
+            continue
+        if first_token_ms is None:
+            first_token_ms = (time.perf_counter() - start) * 1000
+        parts.append(text)
+        print(text, end="", flush=True)
+    print()
+    timing = StreamTiming(first_token_ms, (time.perf_counter() - start) * 1000, len(parts))
+    if tracer is not None and first_token_ms is not None:
+        tracer.observe("first_token", name, first_token_ms)
+    return "".join(parts), timing
@@ -0,0 +1,391 @@
+"""Low-overhead tracing for chains, agents and the API built on LangChain callbacks.
+
+A `Tracer` collects spans (embedding, retriever, llm, tool, chain, history,
+http, ...) with their duration and token counts. Every span updates in-memory
+histograms that can be rendered in the Prometheus text format, and can also be
+appended to a JSONL trace file. Recording a span is a couple of dict updates
+under a lock, so tracing is cheap enough to leave enabled.
+
+    tracer = get_tracer()
+    handler = TracingCallbackHandler(tracer)
+    chain.invoke(inputs, config={"callbacks": [handler]})
+    print(tracer.render_prometheus())
+"""
+from __future__ import annotations
+
+import contextvars
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+from langchain_core.outputs import LLMResult
+
+# Upper bounds in seconds; the implicit last bucket is +Inf.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+_current_trace: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+
+
+@dataclass
+class Span:
+    kind: str
+    name: str
+    trace_id: Optional[str]
+    start: float
+    duration_ms: float
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_input_tokens: int = 0  # part of input_tokens served from a provider prompt cache
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[idx] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        running = 0
+        rows = []
+        for bound, count in zip(list(self.buckets) + [float("inf")], self.counts):
+            running += count
+            rows.append(("+Inf" if bound == float("inf") else repr(bound), running))
+        return rows
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile (upper bucket bound), good enough for dashboards."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        bounds = list(self.buckets) + [float("inf")]
+        for bound, (_, running) in zip(bounds, self.cumulative()):
+            if running >= target:
+                return bound
+        return float("inf")
+
+
+class Tracer:
+    """Thread-safe span sink with histogram aggregation and optional JSONL export."""
+
+    def __init__(self, jsonl_path: Optional[Path] = None, prefix: str = "app"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._tokens: Dict[Tuple[str, str, str], int] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+        self._file = None
+        if jsonl_path is not None:
+            self.set_jsonl_path(jsonl_path)
+
+    def set_jsonl_path(self, jsonl_path: Optional[Path]) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if jsonl_path is not None:
+                Path(jsonl_path).parent.mkdir(parents=True, exist_ok=True)
+                self._file = Path(jsonl_path).open("a", encoding="utf-8", buffering=1)
+
+    def record(self, span: Span) -> None:
+        key = (span.kind, span.name)
+        line = json.dumps(asdict(span), default=str) if self._file is not None else None
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(span.duration_ms / 1000)
+            if span.input_tokens:
+                token_key = (span.kind, span.name, "input")
+                self._tokens[token_key] = self._tokens.get(token_key, 0) + span.input_tokens
+            if span.output_tokens:
+                token_key = (span.kind, span.name, "output")
+                self._tokens[token_key] = self._tokens.get(token_key, 0) + span.output_tokens
+            if span.cached_input_tokens:
+                token_key = (span.kind, span.name, "cached_input")
+                self._tokens[token_key] = self._tokens.get(token_key, 0) + span.cached_input_tokens
+            if span.error:
+                self._errors[key] = self._errors.get(key, 0) + 1
+            if line is not None:
+                self._file.write(line + "\n")
+
+    def observe(self, kind: str, name: str, duration_ms: float, **attributes: Any) -> None:
+        """Record a span whose timing was measured by the caller."""
+        self.record(
+            Span(
+                kind=kind,
+                name=name,
+                trace_id=_current_trace.get(),
+                start=time.time() - duration_ms / 1000,
+                duration_ms=duration_ms,
+                input_tokens=attributes.pop("input_tokens", 0),
+                output_tokens=attributes.pop("output_tokens", 0),
+                cached_input_tokens=attributes.pop("cached_input_tokens", 0),
+                error=attributes.pop("error", None),
+                attributes=attributes,
+            )
+        )
+
+    @contextmanager
+    def span(self, kind: str, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """Time a block of code; the yielded dict can be used to add attributes."""
+        start_wall = time.time()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield attributes
+        except BaseException as exc:
+            error = type(exc).__name__
+            raise
+        finally:
+            self.record(
+                Span(
+                    kind=kind,
+                    name=name,
+                    trace_id=_current_trace.get(),
+                    start=start_wall,
+                    duration_ms=(time.perf_counter() - start) * 1000,
+                    input_tokens=attributes.pop("input_tokens", 0),
+                    output_tokens=attributes.pop("output_tokens", 0),
+                    cached_input_tokens=attributes.pop("cached_input_tokens", 0),
+                    error=error,
+                    attributes=attributes,
+                )
+            )
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[str]:
+        """Group every span recorded inside the block (same thread/task) under one trace id."""
+        trace_id = uuid.uuid4().hex
+        token = _current_trace.set(trace_id)
+        try:
+            with self.span("trace", name, **attributes):
+                yield trace_id
+        finally:
+            _current_trace.reset(token)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                f"{kind}:{name}": {
+                    "count": h.count,
+                    "total_seconds": h.total,
+                    "p50_seconds": h.quantile(0.5),
+                    "p95_seconds": h.quantile(0.95),
+                    "p99_seconds": h.quantile(0.99),
+                }
+                for (kind, name), h in self._histograms.items()
+            }
+
+    def token_counts(self) -> Dict[Tuple[str, str, str], int]:
+        """Token totals keyed by (kind, name, direction)."""
+        with self._lock:
+            return dict(self._tokens)
+
+    def render_prometheus(self) -> str:
+        metric = f"{self.prefix}_span_duration_seconds"
+        lines = [
+            f"# HELP {metric} Duration of traced spans.",
+            f"# TYPE {metric} histogram",
+        ]
+        with self._lock:
+            for (kind, name), histogram in sorted(self._histograms.items()):
+                labels = f'kind="{kind}",name="{_escape(name)}"'
+                for le, count in histogram.cumulative():
+                    lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {count}')
+                lines.append(f"{metric}_sum{{{labels}}} {histogram.total}")
+                lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+            tokens = f"{self.prefix}_tokens_total"
+            lines += [
+                f"# HELP {tokens} Tokens consumed by traced spans (cached_input is part of input).",
+                f"# TYPE {tokens} counter",
+            ]
+            for (kind, name, direction), count in sorted(self._tokens.items()):
+                lines.append(
+                    f'{tokens}{{kind="{kind}",name="{_escape(name)}",direction="{direction}"}} {count}'
+                )
+            errors = f"{self.prefix}_span_errors_total"
+            lines += [f"# HELP {errors} Spans that raised.", f"# TYPE {errors} counter"]
+            for (kind, name), count in sorted(self._errors.items()):
+                lines.append(f'{errors}{{kind="{kind}",name="{_escape(name)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _token_usage(response: LLMResult) -> Tuple[int, int, int]:
+    """(input, output, cached input) tokens of an LLM response."""
+    usage: Dict[str, Any] = {}
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            if usage:
+                break
+        if usage:
+            break
+    if not usage:
+        usage = (response.llm_output or {}).get("usage_metadata") or {}
+    cached = (usage.get("input_token_details") or {}).get("cache_read") or 0
+    return usage.get("input_tokens", 0), usage.get("output_tokens", 0), cached
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Turns LangChain llm/retriever/tool/chain callbacks into tracer spans.
+
+    Only the outermost chain run is recorded as a `chain` span; nested runnables
+    (prompt templates, parsers, lambdas) would add noise without insight.
+    """
+
+    def __init__(self, tracer: "Tracer"):
+        self.tracer = tracer
+        self._runs: Dict[UUID, Tuple[str, str, float, float, Optional[str]]] = {}
+
+    def _start(self, run_id: UUID, kind: str, name: str) -> None:
+        self._runs[run_id] = (kind, name, time.time(), time.perf_counter(), _current_trace.get())
+
+    def _end(
+        self,
+        run_id: UUID,
+        error: Optional[BaseException] = None,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cached_input_tokens: int = 0,
+    ) -> None:
+        started = self._runs.pop(run_id, None)
+        if started is None:
+            return
+        kind, name, start_wall, start, trace_id = started
+        self.tracer.record(
+            Span(
+                kind=kind,
+                name=name,
+                trace_id=trace_id,
+                start=start_wall,
+                duration_ms=(time.perf_counter() - start) * 1000,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                cached_input_tokens=cached_input_tokens,
+                error=type(error).__name__ if error else None,
+            )
+        )
+
+    @staticmethod
+    def _name(serialized: Optional[Dict[str, Any]], kwargs: Dict[str, Any], default: str) -> str:
+        if kwargs.get("name"):
+            return kwargs["name"]
+        if serialized:
+            return serialized.get("name") or (serialized.get("id") or [default])[-1]
+        return default
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs: Any) -> None:
+        self._start(run_id, "llm", self._name(serialized, kwargs, "chat_model"))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs: Any) -> None:
+        self._start(run_id, "llm", self._name(serialized, kwargs, "llm"))
+
+    def on_llm_end(self, response: LLMResult, *, run_id, **kwargs: Any) -> None:
+        input_tokens, output_tokens, cached_input_tokens = _token_usage(response)
+        self._end(
+            run_id,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cached_input_tokens=cached_input_tokens,
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs: Any) -> None:
+        self._start(run_id, "retriever", self._name(serialized, kwargs, "retriever"))
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_retriever_error(self, error: BaseException, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs: Any) -> None:
+        self._start(run_id, "tool", self._name(serialized, kwargs, "tool"))
+
+    def on_tool_end(self, output, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs: Any) -> None:
+        if parent_run_id is None:
+            self._start(run_id, "chain", self._name(serialized, kwargs, "chain"))
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+
+class TracedEmbeddings(Embeddings):
+    """Embeddings wrapper recording an `embedding` span per call.
+
+    LangChain does not emit callbacks for embedding calls, so they are timed here.
+    """
+
+    def __init__(self, inner: Embeddings, tracer: "Tracer"):
+        self.inner = inner
+        self.tracer = tracer
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self.tracer.span("embedding", "embed_documents", batch=len(texts)):
+            return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self.tracer.span("embedding", "embed_query"):
+            return self.inner.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self.tracer.span("embedding", "embed_documents", batch=len(texts)):
+            return await self.inner.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        with self.tracer.span("embedding", "embed_query"):
+            return await self.inner.aembed_query(text)
+
+
+_default_tracer: Optional[Tracer] = None
+_default_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer shared by every entry point."""
+    global _default_tracer
+    if _default_tracer is None:
+        with _default_lock:
+            if _default_tracer is None:
+                _default_tracer = Tracer()
+    return _default_tracer
@@ -0,0 +1,97 @@
+"""Per-turn client cost of a long chat: flattened transcript vs `ChatEngine`.
+
+Plays a `--turns`-long conversation against a local fake Gemini endpoint
+(`common.fakes.FakeGeminiServer`, replying with about `--reply-words` words)
+three ways:
+
+- transcript: the previous exercise_5 approach, the whole history re-joined
+  into one prompt string every turn
+- engine, unbounded: `ChatEngine` with structured contents and no window
+- engine, window: `ChatEngine` with `--max-history-tokens`
+
+For selected turns it prints the CPU time spent in the calling thread (prompt
+building, request serialization, response parsing; the fake server runs in
+other threads) and the request payload size. With the window both stay flat
+once the window is full.
+
+    python day_1/bench_chat_engine.py
+    python day_1/bench_chat_engine.py --turns 1000 --max-history-tokens 2000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from google.genai import types
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for `common`
+
+from common import gemini_client
+from common.fakes import FakeGeminiServer
+from chat_engine import ChatEngine
+
+MODEL = "gemini-2.5-flash"
+CONFIG = types.GenerateContentConfig(temperature=0.7, max_output_tokens=150)
+
+
+def transcript_chat(client) -> Callable[[str], str]:
+    history: List[Dict[str, str]] = []
+
+    def send(message: str) -> str:
+        history.append({"role": "user", "content": message})
+        lines = [f"{m['role'].capitalize()}: {m['content']}" for m in history]
+        contents = "\n\n".join(lines) + "\n\nAssistant:"
+        reply = client.models.generate_content(model=MODEL, contents=contents, config=CONFIG).text.strip()
+        history.append({"role": "assistant", "content": reply})
+        return reply
+
+    return send
+
+
+def run(label: str, turns: int, reply_words: int, max_history_tokens: int) -> Dict[str, List[float]]:
+    reply = " ".join(f"word{i}" for i in range(reply_words))
+    with FakeGeminiServer(reply=reply) as server:
+        gemini_client.configure(gemini_client.ClientSettings(base_url=server.url))
+        client = gemini_client.get_genai_client("fake-key")
+        if label == "transcript":
+            send = transcript_chat(client)
+        else:
+            send = ChatEngine(client, MODEL, CONFIG, max_history_tokens=max_history_tokens).send
+        cpu_us: List[float] = []
+        for turn in range(turns):
+            start = time.thread_time()
+            send(f"Question {turn}: tell me a little more about the network outage on floor {turn % 7}.")
+            cpu_us.append((time.thread_time() - start) * 1e6)
+        payload = list(server.request_bytes)
+        gemini_client.reset()
+    return {"cpu_us": cpu_us, "payload_bytes": payload}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Per-turn cost of flattened vs structured chat history")
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--reply-words", type=int, default=100)
+    parser.add_argument("--max-history-tokens", type=int, default=4000)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    runs = {
+        "transcript": run("transcript", args.turns, args.reply_words, 0),
+        "engine, unbounded": run("engine", args.turns, args.reply_words, 10**12),
+        "engine, window": run("engine", args.turns, args.reply_words, args.max_history_tokens),
+    }
+    checkpoints = sorted({1, 10, 50} | set(range(100, args.turns + 1, 100)) | {args.turns})
+    checkpoints = [t for t in checkpoints if t <= args.turns]
+    print(f"{'run':<20}{'turn':>6}{'cpu us':>10}{'payload bytes':>15}")
+    for label, r in runs.items():
+        for turn in checkpoints:
+            # Median of the surrounding turns smooths out scheduler noise.
+            window = sorted(r["cpu_us"][max(0, turn - 5):turn])
+            print(f"{label:<20}{turn:>6}{window[len(window) // 2]:>10.0f}{r['payload_bytes'][turn - 1]:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Throughput of the few-shot sentiment service, offline with a fake model and embedder.
+
+The fake embedder hashes words into a bag-of-words vector; the fake model
+labels each numbered text with a keyword lexicon. Both sleep to mimic API
+latency (`--embed-ms` per embedding call, `--request-ms` plus `--per-text-ms`
+per text for each model request). The workload mixes light rewordings of the
+example bank with new sentences. Three setups are compared:
+
+- one per call: one model request per text, no shortcut (as exercise_3 did)
+- batched: `--batch-size` texts per request, `--concurrency` requests at once
+- batched + kNN: as above, answering confident nearest-neighbor votes locally
+
+    python day_1/bench_few_shot.py
+    python day_1/bench_few_shot.py --texts 2000 --batch-size 32
+"""
+import argparse
+import random
+import re
+import time
+import zlib
+from typing import Dict, List
+
+import numpy as np
+
+from few_shot_service import EXAMPLES_PATH, ExampleIndex, SentimentClassifier, load_examples
+
+LEXICON = {
+    "POSITIVE": {"love", "great", "fantastic", "friendly", "helpful", "perfectly", "delicious", "recommend", "best", "fast"},
+    "NEGATIVE": {"worst", "broke", "never", "expensive", "dull", "damaged", "crashes", "rude", "regret", "cold", "late"},
+}
+NEW_SENTENCES = [
+    "The {thing} was {adj}.",
+    "Honestly the {thing} felt {adj} today.",
+    "I think the {thing} is {adj} overall.",
+]
+THINGS = ["checkout", "hotel room", "concert", "laptop", "delivery", "support chat", "menu", "train ride"]
+ADJECTIVES = ["great", "fast", "friendly", "rude", "cold", "late", "ordinary", "on schedule", "expensive", "fine"]
+
+
+def lexicon_label(text: str) -> str:
+    words = set(re.findall(r"[a-z']+", text.lower()))
+    scores = {label: len(words & terms) for label, terms in LEXICON.items()}
+    best = max(scores, key=scores.get)
+    return best if scores[best] else "NEUTRAL"
+
+
+def fake_embedder(dims: int, latency_s: float):
+    def embed(texts: List[str]) -> np.ndarray:
+        time.sleep(latency_s)
+        vectors = np.zeros((len(texts), dims), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"[a-z']+", text.lower()):
+                vectors[row, zlib.crc32(word.encode()) % dims] += 1.0
+        return vectors
+
+    return embed
+
+
+def fake_labeler(request_s: float, per_text_s: float):
+    def label_batch(prompt: str) -> Dict[int, str]:
+        texts = re.findall(r"^(\d+)\. \"(.*)\"$", prompt.split("\nTexts:\n", 1)[1], flags=re.M)
+        time.sleep(request_s + per_text_s * len(texts))
+        return {int(n): lexicon_label(text) for n, text in texts}
+
+    return label_batch
+
+
+def workload(n: int, bank: List[str], seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        if rng.random() < 0.4:
+            text = rng.choice(bank)
+            texts.append(rng.choice([text, text.lower(), text.rstrip(".!") + "!!", "Honestly, " + text]))
+        else:
+            texts.append(rng.choice(NEW_SENTENCES).format(thing=rng.choice(THINGS), adj=rng.choice(ADJECTIVES)))
+    return texts
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline throughput of the few-shot sentiment service")
+    parser.add_argument("--texts", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--embed-ms", type=float, default=30.0)
+    parser.add_argument("--request-ms", type=float, default=400.0)
+    parser.add_argument("--per-text-ms", type=float, default=8.0)
+    parser.add_argument("--shortcut-similarity", type=float, default=0.92)
+    parser.add_argument("--baseline-texts", type=int, default=50, help="Texts for the slow one-per-call run.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    examples = load_examples(EXAMPLES_PATH)
+    embed = fake_embedder(256, args.embed_ms / 1000)
+    label_batch = fake_labeler(args.request_ms / 1000, args.per_text_ms / 1000)
+    index = ExampleIndex.build(examples, embed)
+    texts = workload(args.texts, [e.text for e in examples])
+
+    setups = {
+        "one per call": dict(batch_size=1, max_concurrency=1, shortcut_similarity=2.0),
+        "batched": dict(batch_size=args.batch_size, max_concurrency=args.concurrency, shortcut_similarity=2.0),
+        "batched + kNN": dict(
+            batch_size=args.batch_size,
+            max_concurrency=args.concurrency,
+            shortcut_similarity=args.shortcut_similarity,
+        ),
+    }
+    print(f"{'setup':<16}{'texts':>7}{'texts/s':>10}{'requests':>10}{'kNN share':>11}{'agreement':>11}")
+    for label, options in setups.items():
+        run_texts = texts[: args.baseline_texts] if label == "one per call" else texts
+        classifier = SentimentClassifier(index, embed, label_batch, **options)
+        start = time.perf_counter()
+        results = classifier.classify(run_texts)
+        elapsed = time.perf_counter() - start
+        knn = sum(r.source == "knn" for r in results)
+        agree = sum(r.label == lexicon_label(r.text) for r in results)
+        print(
+            f"{label:<16}{len(run_texts):>7}{len(run_texts) / elapsed:>10.1f}{classifier.llm_requests:>10}"
+            f"{knn / len(results):>11.0%}{agree / len(results):>11.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
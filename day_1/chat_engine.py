@@ -0,0 +1,107 @@
+"""Multi-turn chat on structured `Content` turns with a token-bounded sliding window.
+
+Instead of flattening the whole transcript into one string per turn, the
+engine keeps each exchange as a pair of contents (user, model) and sends the
+list as is. Turns are appended once and never rebuilt; the oldest turns are
+dropped when the window exceeds `max_history_tokens`, so request size and
+client work stay bounded however long the session runs. An unchanged,
+in-order prefix of turns also lets the server reuse it.
+
+Turns are stored as `types.ContentDict` rather than `types.Content`: the SDK
+validates and converts every content on every request, and plain dicts take
+about half the time of pydantic objects there.
+
+The SDK's `client.chats` session keeps a similar list but lets it grow without
+bound, hence this small engine.
+
+    engine = ChatEngine(client, config=types.GenerateContentConfig(temperature=0.7))
+    for text in engine.send_stream("Hi!"):
+        print(text, end="")
+"""
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Iterator, List, Optional
+
+from google.genai import types
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def text_content(role: str, text: str) -> types.ContentDict:
+    return {"role": role, "parts": [{"text": text}]}
+
+
+@dataclass
+class Turn:
+    user: types.ContentDict
+    model: types.ContentDict
+    tokens: int
+
+
+class ChatEngine:
+    def __init__(
+        self,
+        client,
+        model: str = "gemini-2.5-flash",
+        config: Optional[types.GenerateContentConfig] = None,
+        max_history_tokens: int = 4000,
+    ):
+        self.client = client
+        self.model = model
+        self.config = config
+        self.max_history_tokens = max_history_tokens
+        self.turns: Deque[Turn] = deque()
+        self.history_tokens = 0
+        self.dropped_turns = 0
+
+    def contents_for(self, user: types.ContentDict) -> List[types.ContentDict]:
+        """The request contents: the history window followed by the new user turn."""
+        contents: List[types.ContentDict] = []
+        for turn in self.turns:
+            contents.append(turn.user)
+            contents.append(turn.model)
+        contents.append(user)
+        return contents
+
+    def _make_room(self, tokens: int) -> None:
+        while self.turns and self.history_tokens + tokens > self.max_history_tokens:
+            self.history_tokens -= self.turns.popleft().tokens
+            self.dropped_turns += 1
+
+    def _record(self, user: types.ContentDict, user_tokens: int, reply: str, reply_tokens: Optional[int]) -> None:
+        tokens = user_tokens + (reply_tokens or estimate_tokens(reply))
+        self.turns.append(Turn(user, text_content("model", reply), tokens))
+        self.history_tokens += tokens
+        self._make_room(0)
+
+    def send(self, message: str) -> str:
+        user = text_content("user", message)
+        user_tokens = estimate_tokens(message)
+        self._make_room(user_tokens)
+        response = self.client.models.generate_content(
+            model=self.model, contents=self.contents_for(user), config=self.config
+        )
+        reply = response.text or ""
+        usage = response.usage_metadata
+        self._record(user, user_tokens, reply, usage.candidates_token_count if usage else None)
+        return reply
+
+    def send_stream(self, message: str) -> Iterator[str]:
+        """Yield reply text as it arrives; the turn is recorded once the stream completes."""
+        user = text_content("user", message)
+        user_tokens = estimate_tokens(message)
+        self._make_room(user_tokens)
+        parts: List[str] = []
+        reply_tokens = None
+        for chunk in self.client.models.generate_content_stream(
+            model=self.model, contents=self.contents_for(user), config=self.config
+        ):
+            if chunk.usage_metadata and chunk.usage_metadata.candidates_token_count:
+                reply_tokens = chunk.usage_metadata.candidates_token_count
+            if chunk.text:
+                parts.append(chunk.text)
+                yield chunk.text
+        self._record(user, user_tokens, "".join(parts), reply_tokens)
@@ -1,10 +1,14 @@
 from dotenv import load_dotenv
-from google import genai
-import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for `common`
+
+from common.gemini_client import gemini_api_key, get_genai_client
 
 load_dotenv()
 
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+client = get_genai_client(gemini_api_key())
 
 response = client.models.generate_content(
     model="gemini-2.5-flash",
@@ -1,17 +1,21 @@
 from dotenv import load_dotenv
-from google import genai
 from google.genai import types
-import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for `common`
+
+from common.gemini_client import gemini_api_key, get_genai_client
 
 # Load GEMINI_API_KEY from .env or environment
 load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
+api_key = gemini_api_key()
 if not api_key:
     print("Please set GEMINI_API_KEY in your .env file")
     raise SystemExit(1)
 
-# Create a simple client
-client = genai.Client(api_key=api_key)
+# Shared client with pooled keep-alive connections (common/gemini_client.py)
+client = get_genai_client(api_key)
 
 # Same user prompt used for both calls
 user_prompt = "Describe a sunrise in plain terms."
@@ -1,15 +1,29 @@
 from dotenv import load_dotenv
-from google import genai
-import os
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for `common`
+
+from common.gemini_client import gemini_api_key, get_genai_client
+from few_shot_service import (
+    EMBEDDING_MODEL,
+    EXAMPLES_PATH,
+    SentimentClassifier,
+    gemini_embedder,
+    gemini_labeler,
+    load_examples,
+    load_or_build_index,
+)
 
 load_dotenv()
 
-API_KEY = os.getenv("GEMINI_API_KEY")
+API_KEY = gemini_api_key()
 if not API_KEY:
     print("Please set GEMINI_API_KEY in your environment or .env file")
     raise SystemExit(1)
 
-client = genai.Client(api_key=API_KEY)
+client = get_genai_client(API_KEY)
 
 
 def few_shot_classification(example_text: str):
@@ -36,6 +50,37 @@ Text:
     print("Model output:", resp.text)
 
 
+DEFAULT_INDEX_PATH = Path(__file__).resolve().parent / "sentiment_index.npz"
+
+
+def dynamic_few_shot_classification(texts, index_path=DEFAULT_INDEX_PATH):
+    """Classify many texts at once with per-text nearest examples (see few_shot_service.py)."""
+    embed = gemini_embedder(client, EMBEDDING_MODEL)
+    # Rebuilt when sentiment_examples.jsonl or the embedding model changed.
+    index = load_or_build_index(index_path, load_examples(EXAMPLES_PATH), embed, EMBEDDING_MODEL)
+    classifier = SentimentClassifier(index, embed, gemini_labeler(client))
+
+    print("--- Dynamic few-shot (batched) ---")
+    for result in classifier.classify(texts):
+        print(f"{result.label:<8} [{result.source}, sim {result.confidence:.2f}] {result.text}")
+    print(f"Model requests: {classifier.llm_requests} for {len(texts)} texts")
+
+
 if __name__ == "__main__":
-    sample = "The movie had stunning visuals but left me bored overall."
-    few_shot_classification(sample)
+    parser = argparse.ArgumentParser(description="Few-shot sentiment classification")
+    parser.add_argument("texts", nargs="*", help="Texts to classify (default: built-in samples).")
+    parser.add_argument(
+        "--fixed", action="store_true", help="Use the fixed three-example prompt, one call per text."
+    )
+    args = parser.parse_args()
+    samples = args.texts or [
+        "The movie had stunning visuals but left me bored overall.",
+        "I absolutely love this!",
+        "The package arrived on Wednesday.",
+        "Support was rude and my refund still hasn't arrived.",
+    ]
+    if args.fixed:
+        for sample in samples:
+            few_shot_classification(sample)
+    else:
+        dynamic_few_shot_classification(samples)
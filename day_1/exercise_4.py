@@ -1,15 +1,19 @@
 from dotenv import load_dotenv
-from google import genai
-import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for `common`
+
+from common.gemini_client import gemini_api_key, get_genai_client
 
 load_dotenv()
 
-API_KEY = os.getenv("GEMINI_API_KEY")
+API_KEY = gemini_api_key()
 if not API_KEY:
     print("Please set GEMINI_API_KEY in your environment or .env file")
     raise SystemExit(1)
 
-client = genai.Client(api_key=API_KEY)
+client = get_genai_client(API_KEY)
 
 
 def chain_of_thought_example():
@@ -1,34 +1,37 @@
 from dotenv import load_dotenv
-from google import genai
 from google.genai import types
-import os
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for `common`
+
+from common.gemini_client import gemini_api_key, get_genai_client
+from common.streaming import print_stream
+from chat_engine import ChatEngine
 
 load_dotenv()
 
-API_KEY = os.getenv("GEMINI_API_KEY")
+API_KEY = gemini_api_key()
 if not API_KEY:
     print("Please set GEMINI_API_KEY in your environment or .env file")
     raise SystemExit(1)
 
-client = genai.Client(api_key=API_KEY)
-
-
-def build_contents_from_history(history):
-    """Convert a list of message dicts into a single contents string.
-
-    Each message in history is a dict: {'role': 'user'|'assistant', 'content': str}
-    """
-    lines = []
-    for msg in history:
-        role = msg.get('role', 'user')
-        content = msg.get('content', '')
-        lines.append(f"{role.capitalize()}: {content}")
-    return "\n\n".join(lines)
+client = get_genai_client(API_KEY)
 
 
-def chat_loop():
+def chat_loop(timing=False, max_history_tokens=4000):
     print("Starting multi-turn chat. Type 'exit' to quit.")
-    history = []
+    # Turns are kept as structured contents, trimmed to a sliding token window
+    engine = ChatEngine(
+        client,
+        model="gemini-2.5-flash",
+        config=types.GenerateContentConfig(
+            temperature=0.7,
+            max_output_tokens=150,
+        ),
+        max_history_tokens=max_history_tokens,
+    )
 
     while True:
         user_input = input("You: ")
@@ -38,27 +41,17 @@ def chat_loop():
             print("Goodbye")
             break
 
-        # Save user message
-        history.append({'role': 'user', 'content': user_input})
-
-        # Build a contents string from history and send it each time
-        contents = build_contents_from_history(history) + "\n\nAssistant:"
-
-        resp = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=contents,
-            config=types.GenerateContentConfig(
-                temperature=0.7,
-                max_output_tokens=150,
-            ),
-        )
-
-        assistant_text = resp.text.strip()
-        print("Assistant:", assistant_text)
-
-        # Save assistant response to history
-        history.append({'role': 'assistant', 'content': assistant_text})
+        # Stream the reply, printing text as it arrives; the engine records the turn
+        _, turn_timing = print_stream(engine.send_stream(user_input))
+        if timing:
+            print(turn_timing.describe(), f"[history {engine.history_tokens} tokens, {len(engine.turns)} turns]")
 
 
 if __name__ == "__main__":
-    chat_loop()
+    parser = argparse.ArgumentParser(description="Multi-turn chat with streamed replies")
+    parser.add_argument("--timing", action="store_true", help="Print time to first token per turn.")
+    parser.add_argument(
+        "--max-history-tokens", type=int, default=4000, help="Older turns are dropped beyond this many tokens."
+    )
+    args = parser.parse_args()
+    chat_loop(timing=args.timing, max_history_tokens=args.max_history_tokens)
@@ -1,36 +1,61 @@
 from dotenv import load_dotenv
-from google import genai
 from google.genai import types
-import os
 import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for `common`
+
+from common.cascade import (
+    LARGE_MODEL,
+    LOG_LEVELS,
+    SMALL_MODEL,
+    Cascade,
+    CascadeExhausted,
+    Tier,
+    genai_tier,
+    guess_log_level,
+    one_of,
+)
+from common.gemini_client import gemini_api_key, get_genai_client
 
 # Load API key
 load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
+api_key = gemini_api_key()
 if not api_key:
     print("Please set GEMINI_API_KEY in your .env file")
     raise SystemExit(1)
 
-client = genai.Client(api_key=api_key)
+client = get_genai_client(api_key)
+
+
+classify_config = types.GenerateContentConfig(
+    system_instruction="You are a log classifier. Respond with ONLY one of: ERROR, WARNING, INFO, or DEBUG. No explanations.",
+)
+
+# Heuristic, then the small model, then the large one; a tier escalates when its
+# answer is not exactly one of the levels.
+log_level_cascade = Cascade(
+    "log_level",
+    [
+        Tier("heuristic", guess_log_level),
+        genai_tier(SMALL_MODEL, client, SMALL_MODEL, classify_config),
+        genai_tier(LARGE_MODEL, client, LARGE_MODEL, classify_config),
+    ],
+    accept=one_of(*LOG_LEVELS),
+)
 
 
 def classify_log(log_message: str) -> str:
     """
     Step 1: Classify the log message into ERROR, WARNING, INFO, or DEBUG.
-    Returns just the log level as a string.
+    Returns just the log level as a string, or UNKNOWN when the models answered
+    something else (model errors are raised).
     """
-    config = types.GenerateContentConfig(
-        system_instruction="You are a log classifier. Respond with ONLY one of: ERROR, WARNING, INFO, or DEBUG. No explanations.",
-    )
-    
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=f"Classify this log: {log_message}",
-        config=config,
-    )
-    
-    level = response.text.strip()
-    return level
+    try:
+        return log_level_cascade(f"Classify this log: {log_message}")
+    except CascadeExhausted:
+        return "UNKNOWN"
 
 
 def handle_error_log(log_message: str) -> str:
@@ -125,6 +150,7 @@ if __name__ == "__main__":
         "Memory usage is at 85%, consider cleaning up old cache.",
         "User john.doe logged in successfully at 2025-12-15 10:30 UTC.",
         "Variable x was undefined, used default value 0.",
+        "2025-12-15 10:31:02 WARN Disk usage at 91% on /var.",
     ]
     
     print("=== Log Ingestion System ===\n")
@@ -135,3 +161,9 @@ if __name__ == "__main__":
         print(f"Level: {result['classified_level']}")
         print(f"Analysis: {result['analysis']}")
         print("-" * 60)
+
+    for tier, stats in log_level_cascade.stats().items():
+        print(
+            f"{tier}: {stats['calls']} calls, {stats['escalation_rate']:.0%} escalated, "
+            f"{stats['mean_ms']:.0f} ms mean"
+        )
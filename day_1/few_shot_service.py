@@ -0,0 +1,259 @@
+"""Sentiment classification with dynamically selected few-shot examples.
+
+A bank of labeled examples is embedded once into a local in-memory index
+(a normalized numpy matrix, optionally saved to disk). For each input the k
+most similar examples are looked up:
+
+- if some of them are very similar to it and those agree, the input is
+  labeled from their vote without calling the model;
+- otherwise the input goes to the model, many texts per request, with the
+  union of their nearest examples as the few-shot prompt and a JSON schema
+  for the answer.
+
+A saved index records a fingerprint of its examples and embedding model;
+`load_or_build_index` rebuilds it when either changed. A text the model leaves
+out of its answer is asked for again once, then labeled from its nearest
+example.
+
+The embedder and the batch labeler are plain callables, so the benchmark can
+swap in fakes:
+
+    index = ExampleIndex.build(load_examples(EXAMPLES_PATH), gemini_embedder(client))
+    classifier = SentimentClassifier(index, gemini_embedder(client), gemini_labeler(client))
+    results = classifier.classify(["Loved it", "Arrived late and broken"])
+"""
+import hashlib
+import json
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Literal, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+Label = Literal["POSITIVE", "NEUTRAL", "NEGATIVE"]
+LABELS: Tuple[str, ...] = ("POSITIVE", "NEUTRAL", "NEGATIVE")
+EXAMPLES_PATH = Path(__file__).resolve().parent / "sentiment_examples.jsonl"
+EMBEDDING_MODEL = "gemini-embedding-001"
+
+Embedder = Callable[[List[str]], np.ndarray]
+
+
+@dataclass
+class LabeledExample:
+    text: str
+    label: str
+
+
+@dataclass
+class Classification:
+    text: str
+    label: str
+    source: Literal["knn", "llm"]
+    confidence: float
+
+
+class TextLabel(BaseModel):
+    id: int
+    label: Label
+
+
+class BatchLabels(BaseModel):
+    labels: List[TextLabel]
+
+
+# Labels a prompt of numbered texts; returns {text number: label}.
+BatchLabeler = Callable[[str], Dict[int, str]]
+
+
+def load_examples(path: Path) -> List[LabeledExample]:
+    with path.open("r", encoding="utf-8") as f:
+        return [LabeledExample(**json.loads(line)) for line in f if line.strip()]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def index_fingerprint(examples: Sequence[LabeledExample], model: str) -> str:
+    """Hash of the examples and the embedding model an index was built from."""
+    payload = json.dumps([model, [[e.text, e.label] for e in examples]], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ExampleIndex:
+    """Labeled examples with unit-length embeddings; cosine kNN is a matrix product."""
+
+    def __init__(self, examples: List[LabeledExample], vectors: np.ndarray, fingerprint: str = ""):
+        self.examples = examples
+        self.vectors = _normalize(vectors)
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, examples: List[LabeledExample], embed: Embedder, model: str = EMBEDDING_MODEL) -> "ExampleIndex":
+        return cls(examples, embed([e.text for e in examples]), index_fingerprint(examples, model))
+
+    def save(self, path: Path) -> None:
+        np.savez(
+            path,
+            vectors=self.vectors,
+            texts=np.array([e.text for e in self.examples]),
+            labels=np.array([e.label for e in self.examples]),
+            fingerprint=np.array(self.fingerprint),
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "ExampleIndex":
+        data = np.load(path)
+        examples = [LabeledExample(str(t), str(l)) for t, l in zip(data["texts"], data["labels"])]
+        fingerprint = str(data["fingerprint"]) if "fingerprint" in data.files else ""
+        return cls(examples, data["vectors"], fingerprint)
+
+    def nearest(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices and cosine similarities of the k nearest examples per query, best first."""
+        k = min(k, len(self.examples))
+        scores = _normalize(queries) @ self.vectors.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+def load_or_build_index(
+    path: Path, examples: List[LabeledExample], embed: Embedder, model: str = EMBEDDING_MODEL
+) -> ExampleIndex:
+    """The index saved at `path`, rebuilt (and saved) if missing or built from other examples or model."""
+    if path.exists():
+        index = ExampleIndex.load(path)
+        if index.fingerprint == index_fingerprint(examples, model):
+            return index
+    index = ExampleIndex.build(examples, embed, model)
+    index.save(path)
+    return index
+
+
+class SentimentClassifier:
+    def __init__(
+        self,
+        index: ExampleIndex,
+        embed: Embedder,
+        label_batch: BatchLabeler,
+        k: int = 4,
+        shortcut_similarity: float = 0.92,
+        min_agreement: float = 0.75,
+        batch_size: int = 16,
+        max_concurrency: int = 4,
+    ):
+        self.index = index
+        self.embed = embed
+        self.label_batch = label_batch
+        self.k = k
+        self.shortcut_similarity = shortcut_similarity
+        self.min_agreement = min_agreement
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.llm_requests = 0
+        self._requests_lock = threading.Lock()
+
+    def _vote(self, neighbors: np.ndarray, sims: np.ndarray) -> Optional[Tuple[str, float]]:
+        """Label by similarity-weighted vote of the neighbors above `shortcut_similarity`, if they agree."""
+        weights: Dict[str, float] = defaultdict(float)
+        for i, sim in zip(neighbors, sims):
+            if sim >= self.shortcut_similarity:
+                weights[self.index.examples[i].label] += float(sim)
+        if not weights:
+            return None
+        label, weight = max(weights.items(), key=lambda item: item[1])
+        if weight / sum(weights.values()) < self.min_agreement:
+            return None
+        return label, float(sims[0])
+
+    def build_prompt(self, texts: Sequence[str], examples: Sequence[LabeledExample]) -> str:
+        lines = [f"Classify each text into {', '.join(LABELS)}.", "", "Examples:"]
+        lines += [f"Text: {json.dumps(e.text)} => {e.label}" for e in examples]
+        lines += ["", "Texts:"]
+        lines += [f"{n}. {json.dumps(text)}" for n, text in enumerate(texts, start=1)]
+        lines += ["", "Return one label per text number."]
+        return "\n".join(lines)
+
+    def _request_labels(self, texts: List[str], neighbors: List[np.ndarray]) -> Dict[int, str]:
+        """Model labels by position in `texts` (0-based); texts it left out are missing."""
+        example_ids = sorted({int(i) for ids in neighbors for i in ids})
+        labels = self.label_batch(self.build_prompt(texts, [self.index.examples[i] for i in example_ids]))
+        return {n - 1: label for n, label in labels.items() if 1 <= n <= len(texts) and label in LABELS}
+
+    def _classify_batch(self, texts: List[str], neighbors: List[np.ndarray]) -> List[Tuple[str, str]]:
+        """(label, source) per text: the model's label, else the nearest example's."""
+        labels = self._request_labels(texts, neighbors)
+        missing = [i for i in range(len(texts)) if i not in labels]
+        if missing:
+            with self._requests_lock:
+                self.llm_requests += 1
+            retried = self._request_labels([texts[i] for i in missing], [neighbors[i] for i in missing])
+            labels.update({missing[j]: label for j, label in retried.items()})
+        return [
+            (labels[i], "llm") if i in labels else (self.index.examples[int(neighbors[i][0])].label, "knn")
+            for i in range(len(texts))
+        ]
+
+    def classify(self, texts: Sequence[str]) -> List[Classification]:
+        if not texts:
+            return []
+        neighbors, sims = self.index.nearest(self.embed(list(texts)), self.k)
+        results: List[Optional[Classification]] = [None] * len(texts)
+        pending: List[int] = []
+        for i, text in enumerate(texts):
+            vote = self._vote(neighbors[i], sims[i])
+            if vote is not None:
+                results[i] = Classification(text, vote[0], "knn", vote[1])
+            else:
+                pending.append(i)
+
+        batches = [pending[start:start + self.batch_size] for start in range(0, len(pending), self.batch_size)]
+        self.llm_requests += len(batches)
+        with ThreadPoolExecutor(max_workers=max(1, self.max_concurrency)) as pool:
+            labeled = pool.map(
+                lambda batch: self._classify_batch([texts[i] for i in batch], [neighbors[i] for i in batch]),
+                batches,
+            )
+            for batch, labels in zip(batches, labeled):
+                for i, (label, source) in zip(batch, labels):
+                    results[i] = Classification(texts[i], label, source, float(sims[i][0]))
+        return results
+
+
+def gemini_embedder(client, model: str = EMBEDDING_MODEL, batch_size: int = 100) -> Embedder:
+    from google.genai import types
+
+    config = types.EmbedContentConfig(task_type="CLASSIFICATION")
+
+    def embed(texts: List[str]) -> np.ndarray:
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), batch_size):
+            response = client.models.embed_content(model=model, contents=texts[start:start + batch_size], config=config)
+            vectors.extend(e.values for e in response.embeddings)
+        return np.asarray(vectors, dtype=np.float32)
+
+    return embed
+
+
+def gemini_labeler(client, model: str = "gemini-2.5-flash") -> BatchLabeler:
+    from google.genai import types
+
+    config = types.GenerateContentConfig(
+        temperature=0.0,
+        response_mime_type="application/json",
+        response_schema=BatchLabels,
+    )
+
+    def label_batch(prompt: str) -> Dict[int, str]:
+        response = client.models.generate_content(model=model, contents=prompt, config=config)
+        parsed = response.parsed or BatchLabels.model_validate_json(response.text)
+        return {item.id: item.label for item in parsed.labels}
+
+    return label_batch
@@ -1,25 +1,25 @@
 from pathlib import Path
 from dotenv import load_dotenv
-import os
+import argparse
+import sys
 
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables.history import RunnableWithMessageHistory
 
 from file_message_chat_history import FileChatMessageHistory
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for `common`
+
+from common.gemini_client import gemini_api_key, get_chat_model
+from common.streaming import print_stream
+
 load_dotenv()
 
-API_KEY = os.getenv("GEMINI_API_KEY")
+API_KEY = gemini_api_key()
 if not API_KEY:
     raise RuntimeError("Please set GEMINI_API_KEY")
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    google_api_key=API_KEY,
-    temperature=0.7,
-    max_output_tokens=150,
-)
+llm = get_chat_model(api_key=API_KEY, temperature=0.7, max_output_tokens=150)
 
 prompt = ChatPromptTemplate.from_messages([
     ("system", "You are a helpful technical assistant."),
@@ -44,7 +44,7 @@ chat = RunnableWithMessageHistory(
     history_messages_key="history",
 )
 
-def chat_loop():
+def chat_loop(timing=False):
     print("LangChain chat with managed memory. Type 'exit' to quit.")
 
     while True:
@@ -52,12 +52,16 @@ def chat_loop():
         if user_input.lower() in ("exit", "quit"):
             break
 
-        response = chat.invoke(
+        # Streamed reply; the history wrapper saves the assembled message once the stream ends.
+        stream = chat.stream(
             {"input": user_input},
             config={"configurable": {"session_id": "telecom-demo"}}
         )
-
-        print("Assistant:", response.content)
+        _, turn_timing = print_stream(chunk.text for chunk in stream)
+        if timing:
+            print(turn_timing.describe())
 
 if __name__ == "__main__":
-    chat_loop()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Chat with file-backed memory and streamed replies")
+    parser.add_argument("--timing", action="store_true", help="Print time to first token per turn.")
+    chat_loop(timing=parser.parse_args().timing)
@@ -2,7 +2,7 @@ import json
 from pathlib import Path
 
 from langchain_core.chat_history import BaseChatMessageHistory
-from langchain_core.messages import messages_to_dict, messages_from_dict
+from langchain_core.messages import message_chunk_to_message, messages_to_dict, messages_from_dict
 
 
 class FileChatMessageHistory(BaseChatMessageHistory):
@@ -42,8 +42,9 @@ class FileChatMessageHistory(BaseChatMessageHistory):
             except (json.JSONDecodeError, OSError):
                 existing = []
 
-        # Convert incoming messages to serializable dicts
-        new_dicts = messages_to_dict(messages)
+        # Convert incoming messages to serializable dicts (streamed replies
+        # arrive as message chunks; store them as regular messages)
+        new_dicts = messages_to_dict([message_chunk_to_message(m) for m in messages])
         all_dicts = existing + new_dicts
 
         # Write back the full list as JSON
@@ -1,8 +1,8 @@
 from dotenv import load_dotenv
-import os
+import sys
+from pathlib import Path
 
-# LangChain imports: model wrapper, prompt utilities, message types
-from langchain_google_genai import ChatGoogleGenerativeAI
+# LangChain imports: prompt utilities, message types
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import SystemMessage
 from langchain_core.prompts import HumanMessagePromptTemplate
@@ -11,25 +11,26 @@ from langchain_core.prompts import HumanMessagePromptTemplate
 from pydantic import BaseModel, Field
 from typing import Literal
 
+# Shared Gemini model factory from `common/` (repo root on sys.path)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.gemini_client import gemini_api_key, get_chat_model
+
 # 1) Load environment variables from a `.env` file in the project root.
 #    Make sure your `.env` contains: GEMINI_API_KEY=your_key_here
 load_dotenv()
 
 # 2) Read the Gemini API key from the environment.
-API_KEY = os.getenv("GEMINI_API_KEY")
+API_KEY = gemini_api_key()
 if not API_KEY:
     # Fail fast with a helpful message if the key isn't set.
     raise RuntimeError("Please set GEMINI_API_KEY")
 
-# 3) Create a LangChain chat model instance for Gemini.
-#    - `model`: which Gemini variant to use.
-#    - `google_api_key`: credentials for the API.
+# 3) Get the LangChain chat model for Gemini (one per process and settings,
+#    on a pooled HTTP client shared with every other model).
+#    - `api_key`: credentials for the API.
 #    - `temperature`: controls randomness (lower = more deterministic).
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    google_api_key=API_KEY,
-    temperature=0.2,
-)
+#    - the model defaults to "gemini-2.5-flash".
+llm = get_chat_model(api_key=API_KEY, temperature=0.2)
 
 
 # 4) Define the shape of the structured output we expect.
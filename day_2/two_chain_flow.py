@@ -1,23 +1,24 @@
 from dotenv import load_dotenv
-import os
+import sys
+from pathlib import Path
 
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough, RunnableLambda
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for `common`
+
+from common.cascade import LARGE_MODEL, SMALL_MODEL, Cascade, CascadeExhausted, chat_tier, one_of
+from common.gemini_client import gemini_api_key, get_chat_model
+
 load_dotenv()
 
-API_KEY = os.getenv("GEMINI_API_KEY")
+API_KEY = gemini_api_key()
 if not API_KEY:
     raise RuntimeError("Please set GEMINI_API_KEY in your environment")
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    google_api_key=API_KEY,
-    temperature=0.0,
-    max_output_tokens=150,
-)
+# One process-wide model (and HTTP connection pool) shared by both chains.
+llm = get_chat_model(api_key=API_KEY, temperature=0.0, max_output_tokens=150)
 
 # Step 1: summarize the ticket
 summary_prompt = PromptTemplate.from_template(
@@ -44,7 +45,31 @@ Summary:
 {summary}"""
 )
 
-priority_chain = priority_prompt | RunnableLambda(print_with_message_and_return("Priority Prompt:")) | llm | StrOutputParser() | RunnableLambda(print_with_message_and_return("Priority:"))
+# The small model answers first; the large one only sees prompts whose answer
+# was not exactly Low, Medium or High. Thinking is off: thinking tokens count
+# against max_output_tokens and would leave a one-word answer empty.
+priority_cascade = Cascade(
+    "priority",
+    [
+        chat_tier(
+            model,
+            get_chat_model(model=model, api_key=API_KEY, temperature=0.0, max_output_tokens=10, thinking_budget=0),
+        )
+        for model in (SMALL_MODEL, LARGE_MODEL)
+    ],
+    accept=one_of("Low", "Medium", "High"),
+)
+
+
+def classify_priority(prompt) -> str:
+    """The cascade's priority, or Unknown when the models answered something else (errors are raised)."""
+    try:
+        return priority_cascade(prompt)
+    except CascadeExhausted:
+        return "Unknown"
+
+
+priority_chain = priority_prompt | RunnableLambda(print_with_message_and_return("Priority Prompt:")) | RunnableLambda(classify_priority) | RunnableLambda(print_with_message_and_return("Priority:"))
 
 # Compose the workflow explicitly
 workflow = (
@@ -61,4 +86,5 @@ if __name__ == "__main__":
         "Immediate assistance is required to diagnose and resolve the connectivity problems, as they are impacting productivity across several departments."
     )
     priority = workflow.invoke(ticket_text)
-    print("Priority:", priority)
\ No newline at end of file
+    print("Priority:", priority)
+    print("Cascade:", priority_cascade.stats())
\ No newline at end of file
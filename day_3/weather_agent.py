@@ -1,25 +1,33 @@
 from dotenv import load_dotenv
-import os
+import sys
+from pathlib import Path
 from typing import List, Dict, Any, Union
 
 from langchain.agents import create_agent
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.tools import tool
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_core.chat_history import InMemoryChatMessageHistory
 from uuid_utils import uuid7
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for `common`
+
+from common.gemini_client import gemini_api_key, get_chat_model
+
 load_dotenv()
-API_KEY = os.getenv("GEMINI_API_KEY")
+API_KEY = gemini_api_key()
 if not API_KEY:
     raise RuntimeError("Please set GEMINI_API_KEY in your .env file.")
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    google_api_key=API_KEY,
-    temperature=0.3,
-)
+llm = get_chat_model(api_key=API_KEY, temperature=0.3)
+
+WEATHER_DATA = {
+    "paris": "Cloudy, 12°C, light rain expected",
+    "new york": "Sunny, 18°C, clear skies",
+    "london": "Rainy, 8°C, heavy rain",
+    "dubai": "Hot and sunny, 35°C, no rain",
+    "tokyo": "Cool, 15°C, partly cloudy",
+}
 
 @tool
 def check_weather(location: str) -> str:
@@ -27,17 +35,9 @@ def check_weather(location: str) -> str:
     Return a simplified, hardcoded weather description for a specific city.
     The location must be a single city name (e.g., 'Paris', 'New York').
     """
-    weather_data = {
-        "paris": "Cloudy, 12°C, light rain expected",
-        "new york": "Sunny, 18°C, clear skies",
-        "london": "Rainy, 8°C, heavy rain",
-        "dubai": "Hot and sunny, 35°C, no rain",
-        "tokyo": "Cool, 15°C, partly cloudy",
-    }
-    
     city = location.strip().lower()
 
-    return f"Weather in {location}: " + weather_data.get(
+    return f"Weather in {location}: " + WEATHER_DATA.get(
         city,
         "Mild, 15-20°C, partly cloudy"
     )
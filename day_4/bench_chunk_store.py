@@ -0,0 +1,183 @@
+"""Memory and search latency of inline vs. lazily loaded chunk text.
+
+Builds a synthetic corpus of `--chunks` chunks (default one million) with
+random `--dims`-dimensional unit vectors and searches it with exact cosine
+search (`chunk_store.FlatIdIndex`), in three layouts:
+
+- inline: every chunk's text and metadata held in memory next to the vectors,
+  as an index that stores documents does
+- lazy: the index holds ids and vectors only; text and metadata are written
+  to a `ChunkTextStore` and read back for the top-k hits (uncompressed)
+- lazy-zstd: the same with zstd-compressed blocks of `--block` chunks
+
+Each layout runs in a fresh process. It reports the build time, the resident
+memory the chunk text adds on top of the index (VmRSS), the text's size on
+disk, and per-query latency split into the vector search and the text fetch.
+Queries are perturbed corpus vectors, so recall@1 checks that the fetched
+text belongs to the right chunk.
+
+    python day_4/bench_chunk_store.py
+    python day_4/bench_chunk_store.py --chunks 200000 --block 16 --k 10
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from bench_retrieval import _ADJECTIVES, _FILLER, _NOUNS, percentile
+
+LAYOUTS = {"inline": None, "lazy": "none", "lazy-zstd": "zstd"}
+GENERATE_BATCH = 10_000
+
+
+def rss_mb() -> float:
+    """Resident set size of this process (Linux)."""
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) / 1024
+    raise RuntimeError("VmRSS not found in /proc/self/status.")
+
+
+def synthetic_chunks(count: int, seed: int = 7) -> Iterator[Tuple[str, Dict[str, object]]]:
+    """(text, metadata) of `count` chunks of about 400 characters: one fact among filler sentences."""
+    for start in range(0, count, GENERATE_BATCH):
+        rng = random.Random(seed * 1_000_003 + start)
+        for i in range(start, min(start + GENERATE_BATCH, count)):
+            fact = (
+                f"The reference code of Project {rng.choice(_ADJECTIVES).title()} "
+                f"{rng.choice(_NOUNS).title()} {i} is {rng.choice(_NOUNS).upper()}-{rng.randint(1000, 9999)}."
+            )
+            filler = rng.sample(_FILLER, 4)
+            filler.insert(rng.randrange(5), fact)
+            yield " ".join(filler), {"source": f"doc-{i // 500:05d}.pdf", "page": i // 5 % 100}
+
+
+def run_layout(layout: str, workdir: Path, args: argparse.Namespace) -> Dict[str, float]:
+    from langchain_core.documents import Document
+
+    from chunk_store import ChunkTextStore, FlatIdIndex
+
+    baseline = rss_mb()
+    matrix = np.load(workdir / "vectors.npy")
+    index = FlatIdIndex.from_matrix([str(i) for i in range(len(matrix))], matrix)
+    gc.collect()
+    index_mb = rss_mb() - baseline
+
+    start = time.perf_counter()
+    if layout == "inline":
+        inline = list(synthetic_chunks(args.chunks))
+        text_bytes = sum(len(text.encode("utf-8")) + len(json.dumps(metadata)) for text, metadata in inline)
+
+        def fetch(ids: List[str]) -> List[Document]:
+            return [
+                Document(id=chunk_id, page_content=inline[int(chunk_id)][0], metadata=inline[int(chunk_id)][1])
+                for chunk_id in ids
+            ]
+    else:
+        texts = ChunkTextStore(workdir / layout, LAYOUTS[layout])
+        batch: List[Document] = []
+        for text, metadata in synthetic_chunks(args.chunks):
+            batch.append(Document(page_content=text, metadata=metadata))
+            if len(batch) == args.block:
+                texts.add(batch)
+                batch = []
+        texts.add(batch)
+        texts = ChunkTextStore(workdir / layout)  # reopened, as a reader would
+        text_bytes = texts.nbytes()
+        fetch = texts.get
+    build_s = time.perf_counter() - start
+    gc.collect()
+    text_mb = rss_mb() - baseline - index_mb
+
+    rng = np.random.default_rng(args.seed + 1)
+    targets = rng.integers(0, len(matrix), args.queries)
+    search_ms: List[float] = []
+    fetch_ms: List[float] = []
+    hits = 0
+    for target in targets:
+        query = matrix[target] + rng.normal(0, 0.2 / np.sqrt(matrix.shape[1]), matrix.shape[1]).astype(np.float32)
+        start = time.perf_counter()
+        found = index.search(query.tolist(), args.k)
+        middle = time.perf_counter()
+        documents = fetch([chunk_id for chunk_id, _ in found])
+        end = time.perf_counter()
+        search_ms.append((middle - start) * 1000)
+        fetch_ms.append((end - middle) * 1000)
+        hits += f" {target} is " in documents[0].page_content
+    total_ms = [s + f for s, f in zip(search_ms, fetch_ms)]
+    return {
+        "build_s": build_s,
+        "index_mb": index_mb,
+        "text_mb": text_mb,
+        "disk_mb": text_bytes / 2**20,
+        "search_p50_ms": percentile(search_ms, 50),
+        "fetch_p50_ms": percentile(fetch_ms, 50),
+        "fetch_p99_ms": percentile(fetch_ms, 99),
+        "total_p50_ms": percentile(total_ms, 50),
+        "total_p99_ms": percentile(total_ms, 99),
+        "recall_at_1": hits / len(targets),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Inline vs. lazily loaded chunk text at scale")
+    parser.add_argument("--chunks", type=int, default=1_000_000)
+    parser.add_argument("--dims", type=int, default=64, help="Vector dimensions (kept small so the vectors fit in RAM).")
+    parser.add_argument("--block", type=int, default=64, help="Chunks per chunk store block (the ingest batch size).")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--layout", action="append", choices=sorted(LAYOUTS), help="Repeatable (default: all).")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", type=Path, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.child is not None:
+        print(json.dumps(run_layout(args.child, args.workdir, args)))
+        return
+
+    with tempfile.TemporaryDirectory(prefix="bench-chunk-store-") as tmp:
+        workdir = Path(tmp)
+        rng = np.random.default_rng(args.seed)
+        matrix = rng.standard_normal((args.chunks, args.dims), dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.save(workdir / "vectors.npy", matrix)
+        del matrix
+
+        print(f"{args.chunks} chunks, {args.dims} dims, k={args.k}, {args.queries} queries, blocks of {args.block}")
+        print(
+            f"{'layout':<11}{'build s':>9}{'index MB':>10}{'text MB':>9}{'disk MB':>9}"
+            f"{'search p50':>12}{'fetch p50':>11}{'fetch p99':>11}{'total p50':>11}{'total p99':>11}{'recall@1':>10}"
+        )
+        for layout in args.layout or LAYOUTS:
+            command = [
+                sys.executable, __file__, "--child", layout, "--workdir", str(workdir),
+                "--chunks", str(args.chunks), "--block", str(args.block), "--k", str(args.k),
+                "--queries", str(args.queries), "--seed", str(args.seed),
+            ]
+            proc = subprocess.run(command, cwd=Path(__file__).resolve().parent, capture_output=True, text=True)
+            if proc.returncode != 0:
+                raise RuntimeError(f"{layout} run failed:\n{proc.stderr[-2000:]}")
+            row = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(
+                f"{layout:<11}{row['build_s']:>9.1f}{row['index_mb']:>10.0f}{row['text_mb']:>9.0f}{row['disk_mb']:>9.0f}"
+                f"{row['search_p50_ms']:>12.2f}{row['fetch_p50_ms']:>11.3f}{row['fetch_p99_ms']:>11.3f}"
+                f"{row['total_p50_ms']:>11.2f}{row['total_p99_ms']:>11.2f}{row['recall_at_1']:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark PDF text extraction throughput (pages/second) per backend.
+
+Runs every installed extractor over the sample documents, in-process and with
+worker processes, then measures how fast cached pages are read back:
+
+    python day_4/bench_pdf_extract.py --pdf-dir ./day_4/documents --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pdf_extract import available_extractors, extract_pages, get_extractor, iter_pdf_pages
+
+DEFAULT_PDF_DIR = Path(__file__).resolve().parent / "documents"
+
+
+def _time_extraction(pdf_paths: List[Path], backend: str, workers: int) -> Dict[str, float]:
+    extractor = get_extractor(backend)
+    executor: Optional[ProcessPoolExecutor] = (
+        ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    )
+    try:
+        start = time.perf_counter()
+        pages = 0
+        for pdf_path in pdf_paths:
+            for _ in extract_pages(pdf_path, extractor, executor, pages_per_task=1):
+                pages += 1
+        elapsed = time.perf_counter() - start
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return {"pages": pages, "seconds": elapsed, "pages_per_second": pages / elapsed}
+
+
+def _time_cached_read(pdf_dir: Path, backend: str) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # First pass fills the cache; only the second pass is measured.
+        for _ in iter_pdf_pages(pdf_dir, Path(cache_dir), extractor=backend, workers=1):
+            pass
+        start = time.perf_counter()
+        pages = sum(1 for _ in iter_pdf_pages(pdf_dir, Path(cache_dir), extractor=backend))
+        elapsed = time.perf_counter() - start
+    return {"pages": pages, "seconds": elapsed, "pages_per_second": pages / elapsed}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark PDF extraction backends")
+    parser.add_argument("--pdf-dir", type=Path, default=DEFAULT_PDF_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration (best is kept).")
+    parser.add_argument("--json", type=Path, default=None, help="Also write results to this file.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    # pypdf logs a warning for every recoverable xref issue, which drowns the table.
+    logging.getLogger("pypdf").setLevel(logging.ERROR)
+    pdf_paths = sorted(args.pdf_dir.glob("*.pdf"))
+    if not pdf_paths:
+        raise RuntimeError(f"No PDF files found in {args.pdf_dir}.")
+
+    results = []
+    worker_counts = sorted({1, args.workers})
+    print(f"{'backend':<10} {'mode':<12} {'pages':>6} {'seconds':>9} {'pages/s':>10}")
+    for backend in available_extractors():
+        runs = []
+        for workers in worker_counts:
+            best = min(
+                (_time_extraction(pdf_paths, backend, workers) for _ in range(args.repeat)),
+                key=lambda r: r["seconds"],
+            )
+            runs.append((f"{workers} worker(s)", best))
+        runs.append(("cached", _time_cached_read(args.pdf_dir, backend)))
+        for mode, result in runs:
+            print(
+                f"{backend:<10} {mode:<12} {result['pages']:>6} "
+                f"{result['seconds']:>9.3f} {result['pages_per_second']:>10.1f}"
+            )
+            results.append({"backend": backend, "mode": mode, **result})
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
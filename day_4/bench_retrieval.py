@@ -0,0 +1,275 @@
+"""Offline retrieval benchmark for the day_4 RAG pipeline.
+
+Builds a labeled corpus, ingests it with the deterministic `HashingEmbeddings`
+and replays the query set against each vector store backend. Reports ingest
+throughput, retrieval latency percentiles, recall@k, MRR and the prompt tokens
+each answer would cost, and writes everything as JSON for regression tracking:
+
+    python day_4/bench_retrieval.py --store chroma --store memory --k 4 --output results.json
+
+By default the corpus is synthetic (unique facts about fictional projects buried
+in filler text). A fixture corpus can be used instead with `--pdf-dir` plus a
+`--queries` JSONL file of `{"question": ..., "answer": ...}` lines; a retrieved
+chunk counts as relevant when it contains the answer string.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import tempfile
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.vectorstores import InMemoryVectorStore, VectorStore
+
+from chunking import count_tokens
+from fakes import HashingEmbeddings
+from rag_chatbot import RAG_QUESTION_PROMPT, RAG_SYSTEM_PROMPT
+from rag_pipeline import (
+    build_vector_store,
+    chunk_documents,
+    format_documents,
+    load_pdf_documents,
+)
+
+_ADJECTIVES = ["amber", "silent", "crimson", "rapid", "northern", "quiet", "golden", "hidden",
+               "lunar", "coastal", "brisk", "electric", "frozen", "velvet", "solar", "granite"]
+_NOUNS = ["falcon", "harbor", "lantern", "meadow", "summit", "river", "beacon", "orchard",
+          "canyon", "comet", "forge", "glacier", "island", "prairie", "tundra", "willow"]
+_ATTRIBUTES = [
+    ("reference code", "What is the reference code of {entity}?"),
+    ("regional owner", "Who is the regional owner of {entity}?"),
+    ("data centre", "Which data centre hosts {entity}?"),
+    ("approved budget", "How large is the approved budget of {entity}?"),
+]
+_FILLER = [
+    "Quarterly reviews continue to track adoption across all business units.",
+    "The steering committee meets on the first Monday of every month.",
+    "All figures are reported in accordance with the internal finance policy.",
+    "Network maintenance windows are announced at least one week in advance.",
+    "Customer satisfaction surveys are collected after every support interaction.",
+    "Documentation is stored in the shared knowledge base and reviewed yearly.",
+    "Security audits are performed by an external partner twice a year.",
+    "Training sessions are recorded and made available on the intranet.",
+]
+
+
+@dataclass
+class Query:
+    question: str
+    answer: str
+
+
+@dataclass
+class StoreResult:
+    store: str
+    chunks: int
+    ingest_seconds: float
+    ingest_chunks_per_second: float
+    embedding_calls: int
+    queries: int
+    k: int
+    latency_p50_ms: float
+    latency_p95_ms: float
+    latency_p99_ms: float
+    recall_at_k: float
+    mrr: float
+    prompt_tokens_mean: float
+
+
+def synthetic_corpus(
+    pages: int, facts_per_page: int, seed: int = 7
+) -> Tuple[List[Document], List[Query]]:
+    rng = random.Random(seed)
+    documents: List[Document] = []
+    queries: List[Query] = []
+    for page in range(pages):
+        sentences: List[str] = []
+        for _ in range(facts_per_page):
+            entity = f"Project {rng.choice(_ADJECTIVES).title()} {rng.choice(_NOUNS).title()} {len(queries)}"
+            attribute, question = rng.choice(_ATTRIBUTES)
+            answer = f"{rng.choice(_NOUNS).upper()}-{rng.randint(1000, 9999)}"
+            sentences.append(f"The {attribute} of {entity} is {answer}.")
+            sentences.extend(rng.sample(_FILLER, 3))
+            queries.append(Query(question=question.format(entity=entity), answer=answer))
+        documents.append(
+            Document(
+                page_content=" ".join(sentences),
+                metadata={"source": "synthetic", "page": page},
+            )
+        )
+    return documents, queries
+
+
+def fixture_corpus(pdf_dir: Path, queries_path: Path) -> Tuple[List[Document], List[Query]]:
+    documents = load_pdf_documents(pdf_dir)
+    with queries_path.open("r", encoding="utf-8") as f:
+        queries = [Query(**json.loads(line)) for line in f if line.strip()]
+    return documents, queries
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _batched(items: Sequence[Document], size: int) -> Iterator[Sequence[Document]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def open_store(store: str, embeddings: HashingEmbeddings, workdir: Path) -> VectorStore:
+    collection = f"bench-{uuid.uuid4().hex[:8]}"
+    if store == "memory":
+        return InMemoryVectorStore(embedding=embeddings)
+    if store == "chroma":
+        return build_vector_store(store, collection, embeddings, workdir / "chroma", create=True)
+    if store == "pgvector":
+        return build_vector_store(store, collection, embeddings)
+    raise ValueError(f"Unknown store '{store}'.")
+
+
+def run_store(
+    store: str,
+    chunks: List[Document],
+    queries: List[Query],
+    k: int,
+    batch_size: int,
+    embed_latency: float,
+) -> StoreResult:
+    embeddings = HashingEmbeddings(latency=embed_latency)
+    workdir = Path(tempfile.mkdtemp(prefix="rag-bench-"))
+    try:
+        vector_store = open_store(store, embeddings, workdir)
+        start = time.perf_counter()
+        for batch in _batched(chunks, batch_size):
+            vector_store.add_documents(list(batch))
+        ingest_seconds = time.perf_counter() - start
+        ingest_calls = embeddings.calls
+
+        latencies: List[float] = []
+        hits = 0
+        reciprocal_ranks = 0.0
+        prompt_tokens: List[int] = []
+        for query in queries:
+            start = time.perf_counter()
+            docs = vector_store.similarity_search(query.question, k=k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            rank = next(
+                (idx for idx, doc in enumerate(docs, start=1) if query.answer in doc.page_content),
+                None,
+            )
+            if rank is not None:
+                hits += 1
+                reciprocal_ranks += 1 / rank
+            prompt = RAG_SYSTEM_PROMPT + "\n" + RAG_QUESTION_PROMPT.format(
+                context=format_documents(docs), question=query.question
+            )
+            prompt_tokens.append(count_tokens(prompt))
+
+        if store == "pgvector":
+            vector_store.delete_collection()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    total = len(queries) or 1
+    return StoreResult(
+        store=store,
+        chunks=len(chunks),
+        ingest_seconds=ingest_seconds,
+        ingest_chunks_per_second=len(chunks) / ingest_seconds if ingest_seconds else 0.0,
+        embedding_calls=ingest_calls,
+        queries=len(queries),
+        k=k,
+        latency_p50_ms=percentile(latencies, 50),
+        latency_p95_ms=percentile(latencies, 95),
+        latency_p99_ms=percentile(latencies, 99),
+        recall_at_k=hits / total,
+        mrr=reciprocal_ranks / total,
+        prompt_tokens_mean=sum(prompt_tokens) / total,
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark retrieval speed and quality offline")
+    parser.add_argument(
+        "--store",
+        action="append",
+        choices=["memory", "chroma", "pgvector"],
+        help="Backend(s) to benchmark; repeatable (default: memory and chroma).",
+    )
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=150)
+    parser.add_argument("--length-unit", choices=["chars", "tokens"], default="chars")
+    parser.add_argument("--pages", type=int, default=200, help="Synthetic corpus size in pages.")
+    parser.add_argument("--facts-per-page", type=int, default=5)
+    parser.add_argument("--max-queries", type=int, default=500)
+    parser.add_argument("--pdf-dir", type=Path, help="Use PDFs as a fixture corpus (needs --queries).")
+    parser.add_argument("--queries", type=Path, help="JSONL of {question, answer} for --pdf-dir.")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument(
+        "--embed-latency",
+        type=float,
+        default=0.0,
+        help="Simulated seconds per embedding call, to mimic a remote API.",
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="Write machine-readable results to this JSON file.")
+    ns = parser.parse_args()
+    if bool(ns.pdf_dir) != bool(ns.queries):
+        parser.error("--pdf-dir and --queries must be used together.")
+    ns.store = ns.store or ["memory", "chroma"]
+    return ns
+
+
+def main() -> None:
+    args = parse_args()
+    if args.pdf_dir:
+        pages, queries = fixture_corpus(args.pdf_dir, args.queries)
+    else:
+        pages, queries = synthetic_corpus(args.pages, args.facts_per_page, args.seed)
+    queries = queries[: args.max_queries]
+    chunks = chunk_documents(pages, args.chunk_size, args.chunk_overlap, args.length_unit)
+
+    results: List[Dict] = []
+    print(
+        f"{'store':<9} {'chunks/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'recall@k':>9} {'MRR':>6} {'prompt tok':>10}"
+    )
+    for store in args.store:
+        result = run_store(store, chunks, queries, args.k, args.batch_size, args.embed_latency)
+        print(
+            f"{result.store:<9} {result.ingest_chunks_per_second:>9.1f} "
+            f"{result.latency_p50_ms:>8.2f} {result.latency_p95_ms:>8.2f} {result.latency_p99_ms:>8.2f} "
+            f"{result.recall_at_k:>9.3f} {result.mrr:>6.3f} {result.prompt_tokens_mean:>10.1f}"
+        )
+        results.append(asdict(result))
+
+    if args.output:
+        report = {
+            "config": {
+                key: str(value) if isinstance(value, Path) else value
+                for key, value in vars(args).items()
+            },
+            "environment": {"python": platform.python_version(), "machine": platform.machine()},
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
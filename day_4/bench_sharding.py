@@ -0,0 +1,144 @@
+"""Search latency and ingest throughput of sharded Chroma collections.
+
+Ingests the synthetic corpus of `bench_retrieval.py` into a throwaway Chroma
+collection, once unsharded and once per `--shards` count and `--mode`:
+
+- threads: every shard opened in this process, searched and written from a
+  thread each
+- processes: every shard served by its own process
+
+Documents and queries are embedded up front with `HashingEmbeddings`, so
+ingest throughput measures the store writes (plus `--embed-latency` seconds
+per batch, to mimic a remote embedding API) and search latency measures the
+fan-out, the per-shard searches and the merge. Open time includes a first
+search, which starts the shard processes. Recall@k compares the merged
+per-shard top-k with the unsharded collection's top-k.
+
+    python day_4/bench_sharding.py
+    python day_4/bench_sharding.py --shards 2 --shards 8 --mode processes --pages 50000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from bench_retrieval import percentile, synthetic_corpus
+from fakes import HashingEmbeddings
+from rag_pipeline import build_vector_store
+from sharding import ShardedVectorStore
+
+COLLECTION = "bench-shards"
+
+
+class TableEmbeddings(Embeddings):
+    """Looks up vectors computed before the timed runs."""
+
+    def __init__(self, texts: List[str], dimensions: int, latency: float = 0.0):
+        embeddings = HashingEmbeddings(dimensions)
+        self.vectors: Dict[str, List[float]] = dict(zip(texts, embeddings.embed_documents(texts)))
+        self.latency = latency
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [self.vectors[text] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.vectors[text]
+
+
+def run(
+    shards: int,
+    mode: Optional[str],
+    documents,
+    queries,
+    embeddings: TableEmbeddings,
+    args: argparse.Namespace,
+) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory(prefix="bench-shards-") as tmp:
+        start = time.perf_counter()
+        store = build_vector_store(
+            "chroma",
+            COLLECTION,
+            embeddings,
+            Path(tmp),
+            create=True,
+            shards=shards if shards > 1 else None,
+            shard_processes=mode == "processes",
+        )
+        try:
+            # Starts the shard processes and loads every shard's index.
+            store.similarity_search(queries[0].question, k=args.k)
+            open_s = time.perf_counter() - start
+            start = time.perf_counter()
+            for i in range(0, len(documents), args.batch_size):
+                store.add_documents(documents[i:i + args.batch_size])
+            ingest_s = time.perf_counter() - start
+
+            latencies: List[float] = []
+            hits = 0
+            for query in queries:
+                start = time.perf_counter()
+                found = store.similarity_search(query.question, k=args.k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                hits += any(query.answer in doc.page_content for doc in found)
+        finally:
+            if isinstance(store, ShardedVectorStore):
+                store.close()
+    return {
+        "open_s": open_s,
+        "chunks_per_s": len(documents) / ingest_s,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "recall": hits / len(queries),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Sharded collection scaling benchmark")
+    parser.add_argument("--shards", type=int, action="append", help="Shard counts; repeatable (default: 2 and 4).")
+    parser.add_argument(
+        "--mode", action="append", choices=["threads", "processes"], help="Repeatable (default: both)."
+    )
+    parser.add_argument("--pages", type=int, default=20000, help="Synthetic corpus size (one chunk per page).")
+    parser.add_argument("--facts-per-page", type=int, default=1)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="Simulated seconds per embedding call.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    documents, queries = synthetic_corpus(pages=args.pages, facts_per_page=args.facts_per_page)
+    queries = queries[:: max(1, len(queries) // args.queries)][: args.queries]
+    texts = [doc.page_content for doc in documents] + [query.question for query in queries]
+    embeddings = TableEmbeddings(texts, args.dimensions, args.embed_latency)
+
+    print(f"{len(documents)} chunks, {len(queries)} queries, k={args.k}, {os.cpu_count()} CPUs")
+    print(
+        f"{'shards':>6}  {'mode':<10}{'open s':>8}{'ingest chunks/s':>17}"
+        f"{'search p50 ms':>15}{'p95 ms':>8}{'p99 ms':>8}{'recall@k':>10}"
+    )
+    configs = [(1, None)] + [
+        (shards, mode) for shards in args.shards or [2, 4] for mode in args.mode or ["threads", "processes"]
+    ]
+    for shards, mode in configs:
+        row = run(shards, mode, documents, queries, embeddings, args)
+        print(
+            f"{shards:>6}  {mode or '-':<10}{row['open_s']:>8.2f}{row['chunks_per_s']:>17.0f}"
+            f"{row['p50_ms']:>15.2f}{row['p95_ms']:>8.2f}{row['p99_ms']:>8.2f}{row['recall']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Offline benchmark of speculative retrieval in the agentic RAG chatbot.
+
+Runs `--turns` agent turns over a synthetic corpus in an in-memory vector
+store, with a scripted fake model (`--llm-ms` per call) and
+`HashingEmbeddings` (`--embed-ms` per call), once without and once with
+`SpeculativePrefetch`. The model's `pdf_search` query is scripted per turn:
+
+- verbatim: the user's question as is
+- keywords: a subset of the question's words
+- other: a different question (the prefetch must be discarded)
+- none: no tool call at all (the prefetch goes unused)
+
+It prints mean and p50 turn latency for both runs, plus the prefetch hit rate
+and the retrieval time it saved.
+
+    python day_4/bench_speculative.py
+    python day_4/bench_speculative.py --turns 100 --embed-ms 300 --min-overlap 0.8
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.messages import HumanMessage
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from bench_retrieval import synthetic_corpus
+from fakes import HashingEmbeddings, ScriptedSearchChatModel
+from rag_agentic_chatbot import create_retrieval_tool, stream_agent_text
+from retrieval import SpeculativePrefetch, build_retriever
+
+QUERY_MIX = (("verbatim", 0.5), ("keywords", 0.25), ("other", 0.15), ("none", 0.1))
+
+
+def script_turns(questions: List[str], turns: int, seed: int = 3) -> Tuple[List[str], Dict[str, Optional[str]]]:
+    rng = random.Random(seed)
+    inputs: List[str] = []
+    searches: Dict[str, Optional[str]] = {}
+    kinds, weights = zip(*QUERY_MIX)
+    for turn in range(turns):
+        question = questions[turn % len(questions)]
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "verbatim":
+            searches[question] = question
+        elif kind == "keywords":
+            words = question.rstrip("?").split()
+            searches[question] = " ".join(words[len(words) // 3:])
+        elif kind == "other":
+            searches[question] = rng.choice(questions)
+        else:
+            searches[question] = None
+        inputs.append(question)
+    return inputs, searches
+
+
+def run(speculative: bool, args: argparse.Namespace) -> Tuple[List[float], Optional[SpeculativePrefetch]]:
+    from langchain.agents import create_agent
+
+    documents, queries = synthetic_corpus(pages=40, facts_per_page=4)
+    embeddings = HashingEmbeddings()
+    store = InMemoryVectorStore(embedding=embeddings)
+    store.add_documents(documents)
+    embeddings.latency = args.embed_ms / 1000
+    retriever = build_retriever(store, k=4)
+    prefetch = SpeculativePrefetch(retriever, args.min_overlap) if speculative else None
+    inputs, searches = script_turns([q.question for q in queries], args.turns)
+    llm = ScriptedSearchChatModel(searches=searches, latency=args.llm_ms / 1000)
+    agent = create_agent(model=llm, tools=[create_retrieval_tool(retriever, prefetch)])
+
+    latencies: List[float] = []
+    for user_input in inputs:
+        start = time.perf_counter()
+        if prefetch is not None:
+            prefetch.start(user_input)
+        list(stream_agent_text(agent, {"messages": [HumanMessage(content=user_input)]}, {}, {}))
+        if prefetch is not None:
+            prefetch.finish_turn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    if prefetch is not None:
+        prefetch.close()
+    return latencies, prefetch
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Agent turn latency with and without speculative retrieval")
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--llm-ms", type=float, default=300.0)
+    parser.add_argument("--embed-ms", type=float, default=150.0)
+    parser.add_argument("--min-overlap", type=float, default=0.6)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    print(f"{'mode':<14}{'turns':>7}{'mean ms':>10}{'p50 ms':>9}")
+    for label, speculative in (("off", False), ("speculative", True)):
+        latencies, prefetch = run(speculative, args)
+        print(f"{label:<14}{len(latencies):>7}{statistics.mean(latencies):>10.0f}{statistics.median(latencies):>9.0f}")
+        if prefetch is not None:
+            print(prefetch.stats.describe())
+
+
+if __name__ == "__main__":
+    main()
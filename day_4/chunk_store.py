@@ -0,0 +1,284 @@
+"""Chunk text kept outside the vector index, in a compact memory-mapped store.
+
+Chroma and pgvector keep every chunk's text and metadata next to its vector.
+With `LazyTextVectorStore` the index only holds ids and vectors; text and
+metadata live in a `ChunkTextStore` and are read for the final top-k only.
+
+A `ChunkTextStore` is a directory with three files:
+
+- `chunks.bin`: records (JSON `{"text", "metadata"}`), appended as one block
+  per `add` call; with zstd each block is one compressed frame, so short
+  chunks compress against their neighbours
+- `index.bin`: one fixed-size entry per chunk (block offset and length,
+  record offset and length within the block), so chunk `i` is located
+  without reading any other entry
+- `meta.json`: format version and compression
+
+Both data files are memory-mapped for reads and remapped when a lookup goes
+past what was mapped (chunks added by another process). A chunk's id is its
+position in the store; the index stores it as `<collection>:<position>`,
+since pgvector ids are unique across all collections. zstd needs the optional
+`zstandard` package (`pip install zstandard`).
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Literal, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+if TYPE_CHECKING:
+    from chromadb.api.models.Collection import Collection
+    from langchain_postgres import PGVector
+
+Compression = Literal["none", "zstd"]
+
+FORMAT_VERSION = 1
+INDEX_DTYPE = np.dtype(
+    [("block_offset", "<u8"), ("block_length", "<u4"), ("record_offset", "<u4"), ("record_length", "<u4")]
+)
+
+
+class ChunkTextStore:
+    """Append-only, offset-indexed chunk texts and metadata."""
+
+    def __init__(self, path: Path, compression: Optional[Compression] = None, level: int = 3):
+        """Open the store at `path`, creating it (zstd by default, when installed) if it does not exist."""
+        self.path = path
+        meta_path = path / "meta.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            if compression is not None and compression != meta["compression"]:
+                raise ValueError(f"Chunk store '{path}' uses {meta['compression']} compression, not {compression}.")
+            compression = meta["compression"]
+        else:
+            compression = compression or ("zstd" if zstandard is not None else "none")
+            path.mkdir(parents=True, exist_ok=True)
+            (path / "chunks.bin").touch()
+            (path / "index.bin").touch()
+            meta_path.write_text(json.dumps({"format": FORMAT_VERSION, "compression": compression}))
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("zstd chunk stores need the zstandard package (pip install zstandard).")
+        self.compression: Compression = compression
+        self.level = level
+        self._lock = threading.Lock()
+        self._data: Optional[mmap.mmap] = None
+        self._index = np.empty(0, dtype=INDEX_DTYPE)
+
+    @staticmethod
+    def exists(path: Path) -> bool:
+        return (path / "meta.json").exists()
+
+    def __len__(self) -> int:
+        return (self.path / "index.bin").stat().st_size // INDEX_DTYPE.itemsize
+
+    def nbytes(self) -> int:
+        """Size on disk of the data and index files."""
+        return (self.path / "chunks.bin").stat().st_size + (self.path / "index.bin").stat().st_size
+
+    def add(self, documents: Sequence[Document]) -> List[str]:
+        """Append `documents` as one block; returns their ids."""
+        records = [
+            json.dumps({"text": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False).encode("utf-8")
+            for doc in documents
+        ]
+        if not records:
+            return []
+        entries = np.zeros(len(records), dtype=INDEX_DTYPE)
+        lengths = np.fromiter((len(record) for record in records), dtype=np.uint64, count=len(records))
+        entries["record_length"] = lengths
+        entries["record_offset"] = np.cumsum(lengths) - lengths
+        block = b"".join(records)
+        if self.compression == "zstd":
+            block = zstandard.ZstdCompressor(level=self.level).compress(block)
+        entries["block_length"] = len(block)
+        with self._lock:
+            with (self.path / "chunks.bin").open("ab") as f:
+                entries["block_offset"] = f.tell()
+                f.write(block)
+            first_id = len(self)
+            # Index entries are written after their block, so readers never see a partial block.
+            with (self.path / "index.bin").open("ab") as f:
+                f.write(entries.tobytes())
+        return [str(first_id + i) for i in range(len(records))]
+
+    def _mapped(self, needed: int) -> Tuple[mmap.mmap, np.ndarray]:
+        with self._lock:
+            if needed > len(self._index):
+                count = len(self)
+                if count:
+                    with (self.path / "chunks.bin").open("rb") as f:
+                        self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    self._index = np.memmap(self.path / "index.bin", dtype=INDEX_DTYPE, mode="r", shape=(count,))
+            if needed > len(self._index):
+                raise KeyError(f"Chunk id {needed - 1} is not in '{self.path}'.")
+            return self._data, self._index
+
+    def get(self, ids: Sequence[str]) -> List[Document]:
+        """Documents for `ids`, in order; each block is decompressed at most once per call."""
+        if not ids:
+            return []
+        positions = [int(chunk_id) for chunk_id in ids]
+        data, index = self._mapped(max(positions) + 1)
+        decompressor = zstandard.ZstdDecompressor() if self.compression == "zstd" else None
+        blocks: Dict[int, bytes] = {}
+        documents: List[Document] = []
+        for chunk_id, position in zip(ids, positions):
+            block_offset, block_length, record_offset, record_length = (int(v) for v in index[position])
+            if decompressor is None:
+                start = block_offset + record_offset
+                record = data[start:start + record_length]
+            else:
+                block = blocks.get(block_offset)
+                if block is None:
+                    block = blocks[block_offset] = decompressor.decompress(
+                        data[block_offset:block_offset + block_length]
+                    )
+                record = block[record_offset:record_offset + record_length]
+            payload = json.loads(record)
+            documents.append(Document(id=chunk_id, page_content=payload["text"], metadata=payload["metadata"]))
+        return documents
+
+
+class IdVectorIndex(ABC):
+    """A vector index that stores only ids and vectors."""
+
+    @abstractmethod
+    def add(self, ids: List[str], vectors: List[List[float]]) -> None: ...
+
+    @abstractmethod
+    def search(self, vector: List[float], k: int) -> List[Tuple[str, float]]:
+        """(id, distance) of the `k` nearest vectors, nearest first."""
+
+    @abstractmethod
+    def is_empty(self) -> bool: ...
+
+
+class ChromaIdIndex(IdVectorIndex):
+    def __init__(self, collection: "Collection"):
+        self.collection = collection
+
+    def add(self, ids: List[str], vectors: List[List[float]]) -> None:
+        self.collection.upsert(ids=ids, embeddings=vectors)
+
+    def search(self, vector: List[float], k: int) -> List[Tuple[str, float]]:
+        result = self.collection.query(query_embeddings=[vector], n_results=k, include=["distances"])
+        return list(zip(result["ids"][0], result["distances"][0]))
+
+    def is_empty(self) -> bool:
+        return self.collection.count() == 0
+
+
+class PGVectorIdIndex(IdVectorIndex):
+    """Rows with an empty document and no metadata in a `PGVector` collection."""
+
+    def __init__(self, store: "PGVector"):
+        self.store = store
+
+    def add(self, ids: List[str], vectors: List[List[float]]) -> None:
+        self.store.add_embeddings(texts=[""] * len(ids), embeddings=vectors, metadatas=[{}] * len(ids), ids=ids)
+
+    def search(self, vector: List[float], k: int) -> List[Tuple[str, float]]:
+        return [(doc.id, score) for doc, score in self.store.similarity_search_with_score_by_vector(vector, k)]
+
+    def is_empty(self) -> bool:
+        store = self.store
+        with store._make_sync_session() as session:  # PGVector has no public row count
+            collection = store.get_collection(session)
+            if collection is None:
+                return True
+            row = session.query(store.EmbeddingStore.id).filter_by(collection_id=collection.uuid).first()
+            return row is None
+
+
+class FlatIdIndex(IdVectorIndex):
+    """Exact cosine search over an in-memory matrix (benchmarks and small collections)."""
+
+    def __init__(self, dimensions: int):
+        self._matrix = np.empty((0, dimensions), dtype=np.float32)
+        self._ids: List[str] = []
+
+    @classmethod
+    def from_matrix(cls, ids: List[str], matrix: np.ndarray) -> "FlatIdIndex":
+        index = cls(matrix.shape[1])
+        index._ids, index._matrix = list(ids), matrix
+        return index
+
+    def add(self, ids: List[str], vectors: List[List[float]]) -> None:
+        block = np.asarray(vectors, dtype=np.float32)
+        block /= np.maximum(np.linalg.norm(block, axis=1, keepdims=True), 1e-12)
+        self._matrix = np.vstack([self._matrix, block])
+        self._ids.extend(ids)
+
+    def search(self, vector: List[float], k: int) -> List[Tuple[str, float]]:
+        query = np.asarray(vector, dtype=np.float32)
+        scores = self._matrix @ (query / max(float(np.linalg.norm(query)), 1e-12))
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._ids[i], 1.0 - float(scores[i])) for i in top]
+
+    def is_empty(self) -> bool:
+        return not self._ids
+
+
+class LazyTextVectorStore(VectorStore):
+    """Searches an id-only index, then reads text and metadata for the top-k from a `ChunkTextStore`."""
+
+    def __init__(self, index: IdVectorIndex, texts: ChunkTextStore, embeddings: Embeddings, namespace: str):
+        self.index = index
+        self.texts = texts
+        self._embeddings = embeddings
+        self.namespace = namespace
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embeddings
+
+    def add_documents(self, documents: List[Document], **kwargs: Any) -> List[str]:
+        vectors = self._embeddings.embed_documents([doc.page_content for doc in documents])
+        ids = [f"{self.namespace}:{position}" for position in self.texts.add(documents)]
+        self.index.add(ids, vectors)
+        return ids
+
+    def add_texts(
+        self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any
+    ) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        return self.add_documents([Document(page_content=t, metadata=m) for t, m in zip(texts, metadatas)])
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4
+    ) -> List[Tuple[Document, float]]:
+        hits = self.index.search(embedding, k)
+        documents = self.texts.get([chunk_id.rpartition(":")[2] for chunk_id, _ in hits])
+        return [
+            (doc.model_copy(update={"id": chunk_id}), distance)
+            for doc, (chunk_id, distance) in zip(documents, hits)
+        ]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embeddings.embed_query(query), k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, **kwargs: Any):
+        raise NotImplementedError("Open lazy-text collections with rag_pipeline.build_vector_store(lazy_text=True).")
@@ -0,0 +1,255 @@
+"""Page-streaming, layout-aware chunking over cached page text.
+
+Parsing PDFs is by far the slowest part of chunking, so pages come from
+`pdf_extract.iter_pdf_pages`, which caches extracted text per PDF content hash.
+Once a corpus has been parsed, re-chunking it with different parameters only
+reads the cache, which makes experimenting with `--chunk-size`/`--chunk-overlap`
+cheap:
+
+    python day_4/chunking.py --pdf-dir ./day_4/documents --chunk-size 800 --length-unit tokens
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Literal
+
+from langchain_core.documents import Document
+
+from pdf_extract import DEFAULT_PAGE_CACHE_DIR, EXTRACTORS, iter_pdf_pages
+
+LengthUnit = Literal["chars", "tokens"]
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+_BULLET_RE = re.compile(r"^\s*(?:[-*•▪●]|\d+[.)]|[a-z][.)])\s+")
+_NUMBERED_HEADING_RE = re.compile(r"^\s*\d+(?:\.\d+)*\.?\s+\S")
+
+
+def count_tokens(text: str) -> int:
+    """Cheap, dependency-free token estimate (words and punctuation marks)."""
+    return len(_TOKEN_RE.findall(text))
+
+
+def length_function(unit: LengthUnit) -> Callable[[str], int]:
+    if unit == "chars":
+        return len
+    if unit == "tokens":
+        return count_tokens
+    raise ValueError(f"Unknown length unit '{unit}' (expected 'chars' or 'tokens').")
+
+
+@dataclass
+class _Unit:
+    """Smallest piece the chunker packs: a sentence, bullet or heading."""
+
+    text: str
+    length: int
+    page: int
+    joiner: str  # separator placed before this unit when it follows another one
+    heading: bool = False
+
+
+def _looks_like_heading(line: str) -> bool:
+    stripped = line.strip()
+    if not stripped or len(stripped) > 80 or stripped[-1] in ".,;:!?":
+        return False
+    if _NUMBERED_HEADING_RE.match(stripped):
+        return True
+    letters = [c for c in stripped if c.isalpha()]
+    if letters and all(c.isupper() for c in letters):
+        return True
+    words = stripped.split()
+    return len(words) <= 8 and all(w[0].isupper() or not w[0].isalpha() for w in words)
+
+
+def _page_blocks(text: str) -> Iterator[tuple]:
+    """Split page text into `(kind, text)` layout blocks.
+
+    Paragraphs are separated by blank lines; within a paragraph, bullet items and
+    heading-like lines start their own block so they are never glued to the
+    surrounding prose.
+    """
+    for paragraph in re.split(r"\n\s*\n", text):
+        lines = [line.strip() for line in paragraph.splitlines() if line.strip()]
+        buffer: List[str] = []
+        for line in lines:
+            if _BULLET_RE.match(line) or (_looks_like_heading(line) and len(lines) > 1):
+                if buffer:
+                    yield "text", " ".join(buffer)
+                    buffer = []
+                if _BULLET_RE.match(line):
+                    buffer.append(line)
+                else:
+                    yield "heading", line
+                continue
+            buffer.append(line)
+        if buffer:
+            joined = " ".join(buffer)
+            kind = "heading" if len(lines) == 1 and _looks_like_heading(joined) else "text"
+            yield kind, joined
+
+
+class StructuredChunker:
+    """Pack layout units into chunks, optionally letting chunks span pages.
+
+    Sizes are measured in characters or estimated tokens. Chunks prefer to break
+    before headings and never split inside a sentence unless the sentence alone
+    exceeds `chunk_size`. Chunks never span two different source files.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 150,
+        length_unit: LengthUnit = "chars",
+        cross_page: bool = True,
+    ):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive.")
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError("chunk_overlap must be between 0 and chunk_size - 1.")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.length_unit = length_unit
+        self.cross_page = cross_page
+        self._length = length_function(length_unit)
+
+    def _units(self, page: Document) -> Iterator[_Unit]:
+        page_number = page.metadata.get("page", 0)
+        first = True
+        for kind, block in _page_blocks(page.page_content):
+            sentences = [block] if kind == "heading" else _SENTENCE_RE.split(block)
+            for idx, sentence in enumerate(sentences):
+                joiner = " " if idx else "\n\n"
+                for piece in self._hard_split(sentence):
+                    yield _Unit(
+                        text=piece,
+                        length=self._length(piece),
+                        page=page_number,
+                        joiner="\n\n" if first else joiner,
+                        heading=kind == "heading",
+                    )
+                    joiner = " "
+                    first = False
+
+    def _hard_split(self, text: str) -> Iterator[str]:
+        if self._length(text) <= self.chunk_size:
+            yield text
+            return
+        words: List[str] = []
+        for word in text.split():
+            candidate = " ".join(words + [word])
+            if words and self._length(candidate) > self.chunk_size:
+                yield " ".join(words)
+                words = [word]
+            else:
+                words.append(word)
+        if words:
+            yield " ".join(words)
+
+    def length(self, text: str) -> int:
+        """Length of `text` in the chunker's unit (characters or estimated tokens)."""
+        return self._length(text)
+
+    def _size(self, units: List[_Unit]) -> int:
+        return sum(u.length for u in units) + sum(self._length(u.joiner) for u in units[1:])
+
+    def _emit(self, units: List[_Unit], metadata: Dict) -> Document:
+        text = units[0].text + "".join(u.joiner + u.text for u in units[1:])
+        return Document(
+            page_content=text,
+            metadata={**metadata, "page": units[0].page, "page_end": units[-1].page},
+        )
+
+    def _overlap_tail(self, units: List[_Unit]) -> List[_Unit]:
+        tail: List[_Unit] = []
+        total = 0
+        for unit in reversed(units):
+            if total + unit.length > self.chunk_overlap:
+                break
+            tail.insert(0, unit)
+            total += unit.length + self._length(unit.joiner)
+        return tail
+
+    def split_pages(self, pages: Iterable[Document]) -> Iterator[Document]:
+        """Lazily chunk a stream of per-page documents."""
+        buffer: List[_Unit] = []
+        size = 0
+        metadata: Dict = {}
+        source = None
+        for page in pages:
+            page_source = page.metadata.get("source")
+            if buffer and (page_source != source or not self.cross_page):
+                yield self._emit(buffer, metadata)
+                buffer, size = [], 0
+            source = page_source
+            metadata = {k: v for k, v in page.metadata.items() if k != "page"}
+            for unit in self._units(page):
+                extra = unit.length + (self._length(unit.joiner) if buffer else 0)
+                breaks_before_heading = unit.heading and size >= self.chunk_size // 2
+                if buffer and (size + extra > self.chunk_size or breaks_before_heading):
+                    yield self._emit(buffer, metadata)
+                    buffer = [] if breaks_before_heading else self._overlap_tail(buffer)
+                    size = self._size(buffer)
+                    # Trim the overlap until the next unit fits, so chunk_size is a hard limit.
+                    while buffer and size + unit.length + self._length(unit.joiner) > self.chunk_size:
+                        buffer.pop(0)
+                        size = self._size(buffer)
+                    extra = unit.length + (self._length(unit.joiner) if buffer else 0)
+                buffer.append(unit)
+                size += extra
+        if buffer:
+            yield self._emit(buffer, metadata)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Re-chunk a PDF directory (using the page cache) and report chunk statistics"
+    )
+    parser.add_argument("--pdf-dir", type=Path, required=True)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=150)
+    parser.add_argument("--length-unit", choices=["chars", "tokens"], default="chars")
+    parser.add_argument("--no-cross-page", action="store_true", help="Never merge text across pages.")
+    parser.add_argument(
+        "--page-cache-dir",
+        type=Path,
+        default=DEFAULT_PAGE_CACHE_DIR,
+        help=f"Directory of cached page text (default: {DEFAULT_PAGE_CACHE_DIR})",
+    )
+    parser.add_argument("--extractor", choices=["auto", *EXTRACTORS], default="auto")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    chunker = StructuredChunker(
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        length_unit=args.length_unit,
+        cross_page=not args.no_cross_page,
+    )
+    start = time.perf_counter()
+    chunk_count = 0
+    spanning = 0
+    total_length = 0
+    for chunk in chunker.split_pages(
+        iter_pdf_pages(args.pdf_dir, args.page_cache_dir, extractor=args.extractor)
+    ):
+        chunk_count += 1
+        spanning += chunk.metadata["page"] != chunk.metadata["page_end"]
+        total_length += chunker.length(chunk.page_content)
+    elapsed = time.perf_counter() - start
+    average = total_length / chunk_count if chunk_count else 0
+    print(
+        f"{chunk_count} chunks ({spanning} spanning pages), "
+        f"avg {average:.0f} {args.length_unit}, in {elapsed:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
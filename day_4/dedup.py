@@ -0,0 +1,142 @@
+"""Near-duplicate chunk detection with MinHash and LSH.
+
+PDF sets repeat a lot of text (headers, footers, disclaimers, copied slides).
+Each chunk is reduced to a MinHash signature over its word shingles; LSH
+banding finds earlier chunks that likely share at least `threshold` of their
+shingles (Jaccard similarity), and the estimate from the full signatures
+decides. The first chunk of a group is kept as the canonical one and
+records where its copies were found:
+
+- `duplicates`: number of copies dropped
+- `also_in`: "source p.page" of the first `MAX_LOCATIONS` copies,
+  "; "-separated (vector stores only accept scalar metadata)
+
+    chunks, stats = dedup_chunks(chunks, threshold=0.9)
+    print(stats.describe())
+"""
+from __future__ import annotations
+
+import math
+import re
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+MAX_LOCATIONS = 20
+
+_WORD_RE = re.compile(r"\w+")
+_PRIME = np.uint64(4294967311)  # > 2**32; a < 2**31 keeps a * hash below 2**64
+
+
+def shingles(text: str, size: int) -> List[int]:
+    """32-bit hashes of the word `size`-grams of `text` (the whole text when shorter)."""
+    words = _WORD_RE.findall(text.casefold())
+    if len(words) <= size:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return [zlib.crc32(gram.encode("utf-8")) for gram in grams]
+
+
+def lsh_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """(bands, rows) with bands * rows <= num_perm whose S-curve midpoint is closest to `threshold`."""
+    best = (1, num_perm)
+    best_error = math.inf
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+@dataclass
+class DedupStats:
+    chunks: int = 0
+    kept: int = 0
+
+    @property
+    def duplicates(self) -> int:
+        return self.chunks - self.kept
+
+    @property
+    def dedup_ratio(self) -> float:
+        return self.duplicates / self.chunks if self.chunks else 0.0
+
+    def embedding_requests_saved(self, batch_size: int) -> int:
+        return math.ceil(self.chunks / batch_size) - math.ceil(self.kept / batch_size)
+
+    def describe(self, batch_size: int = 100) -> str:
+        return (
+            f"{self.chunks} chunks, {self.duplicates} near-duplicates dropped ({self.dedup_ratio:.1%}); "
+            f"{self.duplicates} embeddings and {self.embedding_requests_saved(batch_size)} "
+            f"embedding requests (batches of {batch_size}) saved"
+        )
+
+
+class NearDuplicateIndex:
+    """MinHash LSH index of the canonical chunks seen so far."""
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1].")
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_bands(num_perm, threshold)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2**31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 2**31, size=num_perm, dtype=np.uint64)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: List[np.ndarray] = []
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.asarray(shingles(text, self.shingle_size), dtype=np.uint64)
+        return ((np.outer(hashes, self._a) + self._b) % _PRIME).min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def find_or_add(self, text: str) -> Optional[int]:
+        """Id of an indexed near-duplicate of `text`, or None after indexing `text` under a new id."""
+        signature = self.signature(text)
+        keys = self._band_keys(signature)
+        candidates = {i for band, key in enumerate(keys) for i in self._buckets[band].get(key, ())}
+        for i in sorted(candidates):
+            if np.mean(self._signatures[i] == signature) >= self.threshold:
+                return i
+        new_id = len(self._signatures)
+        self._signatures.append(signature)
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(new_id)
+        return None
+
+
+def _location(doc: Document) -> str:
+    source = Path(str(doc.metadata.get("source", "?"))).name
+    return f"{source} p.{doc.metadata.get('page', '?')}"
+
+
+def dedup_chunks(
+    chunks: Iterable[Document], threshold: float = 0.9, **index_options
+) -> Tuple[List[Document], DedupStats]:
+    """Canonical chunks in input order, with copies folded into their metadata."""
+    index = NearDuplicateIndex(threshold, **index_options)
+    stats = DedupStats()
+    kept: List[Document] = []
+    for chunk in chunks:
+        stats.chunks += 1
+        canonical = index.find_or_add(chunk.page_content)
+        if canonical is None:
+            kept.append(chunk)
+            continue
+        metadata = kept[canonical].metadata
+        metadata["duplicates"] = metadata.get("duplicates", 0) + 1
+        if metadata["duplicates"] <= MAX_LOCATIONS:
+            location = _location(chunk)
+            metadata["also_in"] = f"{metadata['also_in']}; {location}" if "also_in" in metadata else location
+    stats.kept = len(kept)
+    return kept, stats
@@ -0,0 +1,94 @@
+"""Deterministic offline stand-ins for the Gemini models used by the RAG pipeline and agent."""
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbeddings(Embeddings):
+    """Bag-of-words feature-hashing embeddings.
+
+    Texts sharing vocabulary get similar vectors, so retrieval quality is
+    meaningful (if lexical) and fully reproducible without network access.
+    `latency` adds a fixed delay per call to mimic a remote embedding API.
+    """
+
+    def __init__(self, dimensions: int = 256, latency: float = 0.0):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.calls = 0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        words = _WORD_RE.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._embed(text)
+
+
+class ScriptedSearchChatModel(BaseChatModel):
+    """Tool-calling stand-in for the agent's model.
+
+    The first call of a turn asks for `pdf_search` with `searches[user input]`
+    (answering directly when that is None or missing); once the tool has
+    answered, it replies with the size of the result. Each call sleeps `latency`.
+    """
+
+    searches: Dict[str, Optional[str]] = {}
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-scripted-search"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedSearchChatModel":
+        return self
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        last = messages[-1]
+        if isinstance(last, ToolMessage):
+            message = AIMessage(content=f"Answer based on {len(str(last.content))} characters of passages.")
+        else:
+            query = self.searches.get(str(last.content))
+            if query is None:
+                message = AIMessage(content="I can answer that without the PDFs.")
+            else:
+                call = {"name": "pdf_search", "args": {"query": query}, "id": f"call_{uuid.uuid4().hex}"}
+                message = AIMessage(content="", tool_calls=[call])
+        return ChatResult(generations=[ChatGeneration(message=message)])
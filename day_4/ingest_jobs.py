@@ -0,0 +1,364 @@
+"""Background ingestion jobs on a local process pool, and a CLI to drive them.
+
+`IngestJobManager` queues ingestion jobs (an `IngestJobSpec`: the
+`rag_pipeline.py` arguments plus throttling) on a `ProcessPoolExecutor`, so
+PDF parsing, chunking and embedding run outside the process that submitted
+them, e.g. alongside the day_5 API. Workers report progress (pages parsed,
+chunks embedded, chunks written) over a queue; `get`/`list` return snapshots.
+
+Jobs are throttled so they do not starve queries against the same store:
+
+- chunks are written in small batches (`batch_size`, default 32), paced to at
+  most `max_chunks_per_s` (default 100), so embedding requests and store
+  writes are spread out instead of arriving in bursts;
+- pages are extracted in the worker itself (`extract_workers=1`) and worker
+  processes run at a lower CPU priority (`nice`, default 10).
+
+`cancel` drops a queued job; a running job stops at its next page or batch.
+Chunks already written by a cancelled or failed job stay in the store.
+
+The day_5 API serves the jobs under `/rag/ingest/jobs`; this module's CLI is a
+client of those endpoints:
+
+    python day_4/ingest_jobs.py submit --pdf-dir ./day_4/documents --collection day-4 --wait
+    python day_4/ingest_jobs.py status <job-id>
+    python day_4/ingest_jobs.py list
+    python day_4/ingest_jobs.py cancel <job-id>
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from multiprocessing.managers import SyncManager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from rag_pipeline import IngestArgs, IngestProgress, build_embeddings, ingest_from_args
+
+DEFAULT_API_URL = os.getenv("INGEST_API_URL", "http://localhost:8000")
+PROGRESS_INTERVAL = 0.25  # seconds between progress messages from a worker
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+@dataclass
+class IngestJobSpec(IngestArgs):
+    extract_workers: Optional[int] = 1
+    batch_size: int = 32
+    max_chunks_per_s: Optional[float] = 100.0
+
+
+@dataclass
+class IngestJob:
+    id: str
+    spec: IngestJobSpec
+    status: str = "queued"  # queued | running | succeeded | failed | cancelled
+    pages_parsed: int = 0
+    chunks_embedded: int = 0
+    chunks_written: int = 0
+    duplicates: int = 0
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class IngestCancelled(Exception):
+    """Raised inside a worker when its job has been cancelled."""
+
+
+class Throttle:
+    """Paces work to `rate` items per second (None: unlimited)."""
+
+    def __init__(self, rate: Optional[float]):
+        self.rate = rate
+        self._next = time.monotonic()
+
+    def delay(self, count: int) -> float:
+        """Seconds to wait before starting the next `count` items."""
+        if not self.rate:
+            return 0.0
+        now = time.monotonic()
+        start = max(self._next, now)
+        self._next = start + count / self.rate
+        return start - now
+
+
+class ProgressEmbeddings(Embeddings):
+    """Counts `chunks_embedded` as the wrapped embeddings return."""
+
+    def __init__(self, inner: Embeddings, progress: IngestProgress):
+        self.inner = inner
+        self.progress = progress
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.inner.embed_documents(texts)
+        self.progress.add(chunks_embedded=len(texts))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.inner.embed_query(text)
+
+
+def _ignore_interrupts() -> None:
+    # Ctrl+C reaches the whole process group; the owning process stops jobs through `shutdown`.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _init_worker(nice: int) -> None:
+    _ignore_interrupts()
+    if nice and hasattr(os, "nice"):
+        os.nice(nice)
+
+
+def run_ingest_job(job_id: str, spec: IngestJobSpec, events: Any, cancel: Any) -> Dict[str, int]:
+    """Worker entry point: ingest `spec`, sending progress to `events` until done or `cancel` is set."""
+    if cancel.is_set():
+        raise IngestCancelled()
+    events.put((job_id, "running", None))
+    last_sent = 0.0
+
+    def send_progress(progress: IngestProgress) -> None:
+        nonlocal last_sent
+        now = time.monotonic()
+        if now - last_sent < PROGRESS_INTERVAL:
+            return
+        last_sent = now
+        if cancel.is_set():
+            raise IngestCancelled()
+        events.put((job_id, "progress", progress.counts()))
+
+    progress = IngestProgress(listener=send_progress)
+    throttle = Throttle(spec.max_chunks_per_s)
+
+    def before_batch(batch: List[Any]) -> None:
+        if cancel.wait(throttle.delay(len(batch))):
+            raise IngestCancelled()
+
+    report = ingest_from_args(spec, ProgressEmbeddings(build_embeddings(), progress), progress, before_batch)
+    events.put((job_id, "progress", progress.counts()))
+    return {"duplicates": report.dedup.duplicates if report.dedup is not None else 0}
+
+
+class IngestJobManager:
+    """Queue of ingestion jobs run by up to `max_workers` worker processes."""
+
+    def __init__(self, max_workers: int = 1, nice: int = 10):
+        self.max_workers = max_workers
+        self.nice = nice
+        self._jobs: Dict[str, IngestJob] = {}
+        self._futures: Dict[str, Future] = {}
+        self._cancels: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager: Any = None
+        self._events: Any = None
+        self._listener: Optional[threading.Thread] = None
+
+    def _start(self) -> None:
+        # Spawned, not forked: the submitting process (an API server) runs threads.
+        context = multiprocessing.get_context("spawn")
+        self._manager = SyncManager(ctx=context)
+        self._manager.start(_ignore_interrupts)
+        self._events = self._manager.Queue()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.nice,),
+        )
+        self._listener = threading.Thread(target=self._listen, name="ingest-progress", daemon=True)
+        self._listener.start()
+
+    def submit(self, spec: IngestJobSpec) -> IngestJob:
+        if not spec.pdf_dir.is_dir():
+            raise FileNotFoundError(f"PDF directory '{spec.pdf_dir}' does not exist.")
+        with self._lock:
+            if self._executor is None:
+                self._start()
+            job = IngestJob(id=uuid.uuid4().hex[:12], spec=spec)
+            cancel = self._manager.Event()
+            self._jobs[job.id] = job
+            self._cancels[job.id] = cancel
+            future = self._executor.submit(run_ingest_job, job.id, spec, self._events, cancel)
+            self._futures[job.id] = future
+        future.add_done_callback(lambda f, job_id=job.id: self._finish(job_id, f))
+        return self.get(job.id)
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return None if job is None else IngestJob(**vars(job))
+
+    def list(self) -> List[IngestJob]:
+        with self._lock:
+            return [IngestJob(**vars(job)) for job in self._jobs.values()]
+
+    def cancel(self, job_id: str) -> Optional[IngestJob]:
+        """Cancel a queued or running job; finished jobs are left as they are."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            future = None
+            if job.status not in TERMINAL_STATUSES:
+                self._cancels[job_id].set()
+                future = self._futures[job_id]
+        if future is not None:
+            # Outside the lock: cancelling a pending future runs `_finish` right away.
+            future.cancel()
+        return self.get(job_id)
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                message = self._events.get()
+            except (EOFError, OSError):  # manager process gone
+                return
+            if message is None:
+                return
+            job_id, kind, counts = message
+            with self._lock:
+                job = self._jobs[job_id]
+                if kind == "running" and job.status == "queued":
+                    job.status, job.started_at = "running", time.time()
+                elif kind == "progress":
+                    for name, value in counts.items():
+                        setattr(job, name, value)
+
+    def _finish(self, job_id: str, future: Future) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.finished_at = time.time()
+            try:
+                job.duplicates = future.result()["duplicates"]
+                job.status = "succeeded"
+            except (CancelledError, IngestCancelled):
+                job.status = "cancelled"
+            except Exception as exc:
+                job.status, job.error = "failed", f"{type(exc).__name__}: {exc}"
+            self._cancels.pop(job_id, None)
+            self._futures.pop(job_id, None)
+
+    def shutdown(self) -> None:
+        """Cancel every job and stop the worker processes."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            cancels = list(self._cancels.values())
+        if executor is None:
+            return
+        try:
+            for cancel in cancels:
+                cancel.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            self._events.put(None)
+        except (EOFError, OSError):
+            # The manager was killed along with the process group; workers stop on their own.
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._listener.join()
+        self._manager.shutdown()
+
+
+def _request(method: str, url: str, payload: Optional[Dict[str, Any]] = None) -> Any:
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        raise SystemExit(f"{method} {url} failed ({e.code}): {e.read().decode(errors='replace')}") from e
+    except urllib.error.URLError as e:
+        raise SystemExit(f"Cannot reach the ingestion API at {url}: {e.reason}") from e
+
+
+def describe_job(job: Dict[str, Any]) -> str:
+    line = (
+        f"{job['id']} {job['status']:<9} pages {job['pages_parsed']}, "
+        f"embedded {job['chunks_embedded']}, written {job['chunks_written']}"
+    )
+    if job.get("duplicates"):
+        line += f", {job['duplicates']} duplicates dropped"
+    if job.get("error"):
+        line += f" - {job['error']}"
+    return line
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Submit, poll and cancel background ingestion jobs")
+    parser.add_argument("--url", default=DEFAULT_API_URL, help=f"API base URL (default: {DEFAULT_API_URL})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Queue an ingestion job.")
+    submit.add_argument("--pdf-dir", type=Path, required=True, help="PDF directory, as seen by the server.")
+    submit.add_argument("--collection", default=None, help="Target collection (default: the server's RAG_COLLECTION).")
+    submit.add_argument("--store", choices=["pgvector", "chroma"], default=None)
+    submit.add_argument("--chunk-size", type=int, default=1000)
+    submit.add_argument("--chunk-overlap", type=int, default=150)
+    submit.add_argument("--length-unit", choices=["chars", "tokens"], default="chars")
+    submit.add_argument("--dedup-threshold", type=float, default=0.9)
+    submit.add_argument("--no-dedup", action="store_true")
+    submit.add_argument("--batch-size", type=int, default=32)
+    submit.add_argument("--max-chunks-per-s", type=float, default=100.0, help="0 disables throttling.")
+    submit.add_argument("--lazy-text", action="store_true", help="Create the collection with a separate chunk text store.")
+    submit.add_argument("--shards", type=int, default=None, help="Create the collection split across this many shards.")
+    submit.add_argument("--wait", action="store_true", help="Poll and print progress until the job ends.")
+
+    for name, help_text in (("status", "Show one job."), ("cancel", "Cancel a queued or running job.")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("job_id")
+    commands.add_parser("list", help="Show all jobs.")
+    return parser.parse_args()
+
+
+def wait_for(url: str, job: Dict[str, Any], interval: float = 1.0) -> Dict[str, Any]:
+    while job["status"] not in TERMINAL_STATUSES:
+        time.sleep(interval)
+        job = _request("GET", f"{url}/rag/ingest/jobs/{job['id']}")
+        print(describe_job(job), flush=True)
+    return job
+
+
+def main() -> None:
+    args = parse_args()
+    url = args.url.rstrip("/")
+    if args.command == "submit":
+        payload = {
+            "pdf_dir": str(args.pdf_dir.resolve()),
+            "collection": args.collection,
+            "store": args.store,
+            "chunk_size": args.chunk_size,
+            "chunk_overlap": args.chunk_overlap,
+            "length_unit": args.length_unit,
+            "dedup_threshold": None if args.no_dedup else args.dedup_threshold,
+            "batch_size": args.batch_size,
+            "max_chunks_per_s": args.max_chunks_per_s or None,
+            "lazy_text": True if args.lazy_text else None,
+            "shards": args.shards,
+        }
+        job = _request("POST", f"{url}/rag/ingest/jobs", payload)
+        print(describe_job(job))
+        if args.wait and wait_for(url, job)["status"] != "succeeded":
+            sys.exit(1)
+    elif args.command == "status":
+        print(describe_job(_request("GET", f"{url}/rag/ingest/jobs/{args.job_id}")))
+    elif args.command == "cancel":
+        print(describe_job(_request("DELETE", f"{url}/rag/ingest/jobs/{args.job_id}")))
+    else:
+        for job in _request("GET", f"{url}/rag/ingest/jobs"):
+            print(describe_job(job))
+
+
+if __name__ == "__main__":
+    main()
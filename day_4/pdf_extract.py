@@ -0,0 +1,265 @@
+"""Pluggable PDF text extraction with parallel page extraction and a page text cache.
+
+Three backends are supported: `pypdf` (pure Python, always available through the
+project requirements) and, when installed, the much faster `pdfium`
+(`pip install pypdfium2`) and `pymupdf` (`pip install pymupdf`). Large PDFs are
+split into page ranges that are extracted in worker processes, and the extracted
+text is cached per (PDF content hash, backend) so a PDF is only parsed once.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import importlib.util
+import json
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Type
+
+from langchain_core.documents import Document
+
+DEFAULT_PAGE_CACHE_DIR = Path(__file__).resolve().parent / ".page_cache"
+
+
+class PdfExtractor(ABC):
+    """Extracts plain text from a contiguous range of PDF pages."""
+
+    name: str
+    module: str
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return importlib.util.find_spec(cls.module) is not None
+
+    @abstractmethod
+    def page_count(self, pdf_path: Path) -> int:
+        ...
+
+    @abstractmethod
+    def extract_range(self, pdf_path: Path, start: int, stop: int) -> List[str]:
+        ...
+
+
+class PypdfExtractor(PdfExtractor):
+    name = "pypdf"
+    module = "pypdf"
+
+    def page_count(self, pdf_path: Path) -> int:
+        from pypdf import PdfReader
+
+        return len(PdfReader(str(pdf_path)).pages)
+
+    def extract_range(self, pdf_path: Path, start: int, stop: int) -> List[str]:
+        from pypdf import PdfReader
+
+        reader = PdfReader(str(pdf_path))
+        return [reader.pages[idx].extract_text() or "" for idx in range(start, stop)]
+
+
+class PdfiumExtractor(PdfExtractor):
+    name = "pdfium"
+    module = "pypdfium2"
+
+    def page_count(self, pdf_path: Path) -> int:
+        import pypdfium2 as pdfium
+
+        pdf = pdfium.PdfDocument(str(pdf_path))
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def extract_range(self, pdf_path: Path, start: int, stop: int) -> List[str]:
+        import pypdfium2 as pdfium
+
+        pdf = pdfium.PdfDocument(str(pdf_path))
+        try:
+            texts = []
+            for idx in range(start, stop):
+                page = pdf[idx]
+                textpage = page.get_textpage()
+                texts.append(textpage.get_text_range())
+                textpage.close()
+                page.close()
+            return texts
+        finally:
+            pdf.close()
+
+
+class PyMuPdfExtractor(PdfExtractor):
+    name = "pymupdf"
+    module = "pymupdf"
+
+    def page_count(self, pdf_path: Path) -> int:
+        import pymupdf
+
+        with pymupdf.open(str(pdf_path)) as pdf:
+            return pdf.page_count
+
+    def extract_range(self, pdf_path: Path, start: int, stop: int) -> List[str]:
+        import pymupdf
+
+        with pymupdf.open(str(pdf_path)) as pdf:
+            return [pdf[idx].get_text("text") for idx in range(start, stop)]
+
+
+# Ordered fastest first; "auto" picks the first installed backend.
+EXTRACTORS: Dict[str, Type[PdfExtractor]] = {
+    cls.name: cls for cls in (PyMuPdfExtractor, PdfiumExtractor, PypdfExtractor)
+}
+
+
+def available_extractors() -> List[str]:
+    return [name for name, cls in EXTRACTORS.items() if cls.is_available()]
+
+
+def get_extractor(name: str = "auto") -> PdfExtractor:
+    if name == "auto":
+        available = available_extractors()
+        if not available:
+            raise RuntimeError("No PDF extraction backend installed (install pypdf).")
+        name = available[0]
+    try:
+        cls = EXTRACTORS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown PDF extractor '{name}' (choose from: auto, {', '.join(EXTRACTORS)})."
+        ) from None
+    if not cls.is_available():
+        raise RuntimeError(f"PDF extractor '{name}' requires the '{cls.module}' package.")
+    return cls()
+
+
+def _extract_range_worker(backend: str, pdf_path: str, start: int, stop: int) -> List[str]:
+    return EXTRACTORS[backend]().extract_range(Path(pdf_path), start, stop)
+
+
+def extract_pages(
+    pdf_path: Path,
+    extractor: PdfExtractor,
+    executor: Optional[Executor] = None,
+    pages_per_task: int = 8,
+) -> Iterator[str]:
+    """Yield the text of every page in order, fanning page ranges out to `executor`."""
+    count = extractor.page_count(pdf_path)
+    if executor is None or count <= pages_per_task:
+        for start in range(0, count, pages_per_task):
+            yield from extractor.extract_range(pdf_path, start, min(start + pages_per_task, count))
+        return
+
+    futures = [
+        executor.submit(
+            _extract_range_worker,
+            extractor.name,
+            str(pdf_path),
+            start,
+            min(start + pages_per_task, count),
+        )
+        for start in range(0, count, pages_per_task)
+    ]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PageCache:
+    """Extracted page text stored as `<key>.jsonl.gz`, one JSON string per page.
+
+    Keys are content addressed (`<pdf sha256>-<backend>`), so renamed or copied
+    PDFs hit the cache and edited PDFs never serve stale text.
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_PAGE_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    @staticmethod
+    def key_for(pdf_path: Path, backend: str) -> str:
+        return f"{file_sha256(pdf_path)}-{backend}"
+
+    def path_for(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.jsonl.gz"
+
+    def has(self, key: str) -> bool:
+        return self.path_for(key).exists()
+
+    def iter_pages(self, key: str) -> Iterator[str]:
+        with gzip.open(self.path_for(key), "rt", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def write_through(self, key: str, pages: Iterable[str]) -> Iterator[str]:
+        """Yield `pages` while writing them to the cache.
+
+        The entry only becomes visible once every page has been written, so an
+        interrupted extraction never leaves a truncated cache file behind.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        final_path = self.path_for(key)
+        tmp_path = final_path.with_name(f"{final_path.name}.{os.getpid()}.tmp")
+        completed = False
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+                for text in pages:
+                    f.write(json.dumps(text, ensure_ascii=False))
+                    f.write("\n")
+                    yield text
+            completed = True
+        finally:
+            if completed:
+                os.replace(tmp_path, final_path)
+            else:
+                tmp_path.unlink(missing_ok=True)
+
+
+def iter_pdf_pages(
+    pdf_dir: Path,
+    cache_dir: Optional[Path] = DEFAULT_PAGE_CACHE_DIR,
+    extractor: str = "auto",
+    workers: Optional[int] = None,
+) -> Iterator[Document]:
+    """Stream one `Document` per PDF page, extracting each PDF at most once.
+
+    Metadata matches `PyPDFLoader` (`source`, `page`). Pass `cache_dir=None` to
+    bypass the page cache and `workers=1` to extract in-process.
+    """
+    pdf_paths = sorted(pdf_dir.glob("*.pdf"))
+    if not pdf_paths:
+        raise RuntimeError(f"No PDF files found in {pdf_dir}.")
+
+    backend = get_extractor(extractor)
+    cache = PageCache(cache_dir) if cache_dir is not None else None
+    workers = workers or os.cpu_count() or 1
+    executor: Optional[ProcessPoolExecutor] = None
+    try:
+        for pdf_path in pdf_paths:
+            key = PageCache.key_for(pdf_path, backend.name) if cache is not None else None
+            if cache is not None and cache.has(key):
+                pages: Iterable[str] = cache.iter_pages(key)
+            else:
+                # Only pay for worker start-up once something actually needs extracting.
+                if executor is None and workers > 1:
+                    executor = ProcessPoolExecutor(max_workers=workers)
+                pages = extract_pages(pdf_path, backend, executor)
+                if cache is not None:
+                    pages = cache.write_through(key, pages)
+            for page_number, text in enumerate(pages):
+                yield Document(
+                    page_content=text,
+                    metadata={"source": str(pdf_path), "page": page_number},
+                )
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
@@ -1,25 +1,35 @@
-"""Agentic retrieval example exposing the retriever as a tool."""
+"""Agentic retrieval example exposing the retriever as a tool.
+
+With `--speculative`, retrieval for the raw user input starts in parallel with
+the agent's first model call, and `pdf_search` answers from it when the
+model's query matches (see `retrieval.SpeculativePrefetch`).
+"""
 from __future__ import annotations
 
 import argparse
+import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Literal, Optional
-
-from langchain.agents import create_agent
-from langchain.tools import tool
-from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
-from langchain_chroma import Chroma
-from langchain_postgres import PGVector
-from langchain_core.vectorstores import VectorStoreRetriever
+from typing import Any, Dict, Iterator, List, Literal, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.tools import StructuredTool
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for `common`
+
+from common.context_cache import maybe_cache_prefix
+from common.streaming import print_stream
+from common.tracing import TracedEmbeddings, Tracer, TracingCallbackHandler, get_tracer
 from rag_pipeline import (
+    DEFAULT_CHROMA_DIR,
     build_embeddings,
     build_llm,
-    resolve_pg_connection_string,
+    build_vector_store as open_vector_store,
+    describe_store,
     format_documents,
 )
-
-DEFAULT_CHROMA_DIR = Path(__file__).resolve().parent / "chroma_store"
+from retrieval import SpeculativePrefetch, build_retriever
 
 
 @dataclass
@@ -27,6 +37,10 @@ class AgentArgs:
     store: Literal["pgvector", "chroma"]
     collection: str
     persist_dir: Optional[Path] = None
+    trace_file: Optional[Path] = None
+    timing: bool = False
+    speculative: bool = False
+    speculative_min_overlap: float = 0.6
 
 
 def parse_args() -> AgentArgs:
@@ -41,46 +55,68 @@ def parse_args() -> AgentArgs:
         default=DEFAULT_CHROMA_DIR,
         help="Chroma persistence directory (only used when --store=chroma).",
     )
+    parser.add_argument(
+        "--trace-file",
+        type=Path,
+        default=None,
+        help="Append per-span timings (embedding, retrieval, LLM, tools) to this JSONL file.",
+    )
+    parser.add_argument("--timing", action="store_true", help="Print time to first token per turn.")
+    parser.add_argument(
+        "--speculative",
+        action="store_true",
+        help="Search for the user input while the model decides whether to call pdf_search.",
+    )
+    parser.add_argument(
+        "--speculative-min-overlap",
+        type=float,
+        default=0.6,
+        help="Minimum Jaccard similarity of the tool query's and the user input's words to reuse the prefetch.",
+    )
     ns = parser.parse_args()
     return AgentArgs(
         store=ns.store,
         collection=ns.collection,
         persist_dir=ns.persist_dir,
+        trace_file=ns.trace_file,
+        timing=ns.timing,
+        speculative=ns.speculative,
+        speculative_min_overlap=ns.speculative_min_overlap,
     )
 
 
-def build_vector_store(args: AgentArgs):
-    embeddings = build_embeddings()
-    if args.store == "pgvector":
-        connection_string = resolve_pg_connection_string()
-        return PGVector(
-            collection_name=args.collection,
-            connection_string=connection_string,
-            embedding_function=embeddings,
-        )
-
-    persist_dir = args.persist_dir or DEFAULT_CHROMA_DIR
-    if not persist_dir.exists():
-        raise RuntimeError(
-            f"Persist directory '{persist_dir}' does not exist. Ingest documents first."
-        )
-    return Chroma(
-        collection_name=args.collection,
-        embedding_function=embeddings,
-        persist_directory=str(persist_dir),
+def build_vector_store(args: AgentArgs, tracer: Optional[Tracer] = None):
+    embeddings = TracedEmbeddings(build_embeddings(), tracer or get_tracer())
+    return open_vector_store(
+        args.store, args.collection, embeddings, persist_dir=args.persist_dir
     )
 
 
-def create_retrieval_tool(retriever : VectorStoreRetriever):
-    @tool("pdf_search")
-    def pdf_search(query: str) -> str:
-        """Searches the embedded PDF knowledge base for passages relevant to the query."""
-        documents = retriever.invoke(query)
-        if not documents:
-            return "No relevant passages found in the PDFs."
+def _format_results(documents) -> str:
+    if not documents:
+        return "No relevant passages found in the PDFs."
+    return format_documents(documents)
 
-        return format_documents(documents)
-    return pdf_search
+
+def create_retrieval_tool(retriever: BaseRetriever, prefetch: Optional[SpeculativePrefetch] = None):
+    def pdf_search(query: str) -> str:
+        documents = prefetch.take(query) if prefetch is not None else None
+        if documents is None:
+            documents = retriever.invoke(query)
+        return _format_results(documents)
+
+    async def apdf_search(query: str) -> str:
+        documents = await prefetch.atake(query) if prefetch is not None else None
+        if documents is None:
+            documents = await retriever.ainvoke(query)
+        return _format_results(documents)
+
+    return StructuredTool.from_function(
+        func=pdf_search,
+        coroutine=apdf_search,
+        name="pdf_search",
+        description="Searches the embedded PDF knowledge base for passages relevant to the query.",
+    )
 
 
 def extract_final_message(result: dict) -> str:
@@ -97,7 +133,24 @@ def extract_final_message(result: dict) -> str:
     return str(final_message.content)
 
 
-def interactive_agent_chat(agent, label: str) -> None:
+def stream_agent_text(agent, inputs: dict, config: dict, final: Dict[str, Any]) -> Iterator[str]:
+    """Yield the model's text tokens while the agent runs; the last state ends up in `final["state"]`."""
+    for mode, data in agent.stream(inputs, config=config, stream_mode=["messages", "values"]):
+        if mode == "values":
+            final["state"] = data
+        elif isinstance(data[0], AIMessageChunk):
+            yield data[0].text
+
+
+def interactive_agent_chat(
+    agent,
+    label: str,
+    tracer: Optional[Tracer] = None,
+    timing: bool = False,
+    prefetch: Optional[SpeculativePrefetch] = None,
+) -> None:
+    tracer = tracer or get_tracer()
+    callbacks = [TracingCallbackHandler(tracer)]
     history: List[BaseMessage] = []
     print(f"Agentic Retrieval Chat ({label})")
     print("Type 'exit' to quit.\n")
@@ -106,25 +159,46 @@ def interactive_agent_chat(agent, label: str) -> None:
         if not user_input:
             continue
         if user_input.lower() in {"exit", "quit"}:
+            if prefetch is not None:
+                print(prefetch.stats.describe())
             print("Goodbye!")
             break
 
         user_message = HumanMessage(content=user_input)
-        result = agent.invoke({"messages": history + [user_message]})
-        answer = extract_final_message(result)
-        print(f"Assistant: {answer}\n")
-
-        history.append(user_message)
-        history.append(AIMessage(content=answer))
+        if prefetch is not None:
+            prefetch.start(user_input)
+        with tracer.trace("agent_chat_turn"):
+            final: Dict[str, Any] = {}
+            stream = stream_agent_text(
+                agent, {"messages": history + [user_message]}, {"callbacks": callbacks}, final
+            )
+            _, turn_timing = print_stream(stream, tracer=tracer, name="agent_chat_turn")
+            if prefetch is not None:
+                prefetch.finish_turn()
+            if timing:
+                print(turn_timing.describe())
+                if prefetch is not None:
+                    print(prefetch.stats.describe())
+            print()
+            answer = extract_final_message(final.get("state", {}))
+
+            with tracer.span("history", "append", messages=len(history) + 2):
+                history.append(user_message)
+                history.append(AIMessage(content=answer))
 
 
 def main() -> None:
     args = parse_args()
-    vector_store = build_vector_store(args)
-    retriever = vector_store.as_retriever(search_kwargs={"k": 4})
-    retrieval_tool = create_retrieval_tool(retriever)
+    tracer = get_tracer()
+    tracer.set_jsonl_path(args.trace_file)
+    vector_store = build_vector_store(args, tracer)
+    retriever = build_retriever(vector_store, k=4)
+    prefetch = SpeculativePrefetch(retriever, args.speculative_min_overlap) if args.speculative else None
+    retrieval_tool = create_retrieval_tool(retriever, prefetch)
 
-    llm = build_llm()
+    from langchain.agents import create_agent
+
+    llm = maybe_cache_prefix(build_llm())
     agent_executor = create_agent(
         model=llm,
         tools=[retrieval_tool],
@@ -134,12 +208,8 @@ def main() -> None:
         ),
     )
 
-    label = (
-        f"{args.store} collection '{args.collection}'"
-        if args.store == "pgvector"
-        else f"chroma collection '{args.collection}' ({args.persist_dir})"
-    )
-    interactive_agent_chat(agent_executor, label=label)
+    label = describe_store(args.store, args.collection, args.persist_dir)
+    interactive_agent_chat(agent_executor, label=label, tracer=tracer, timing=args.timing, prefetch=prefetch)
 
 
 if __name__ == "__main__":
@@ -2,37 +2,35 @@
 from __future__ import annotations
 
 import argparse
+import sys
 from dataclasses import dataclass
-from pathlib import Path
-from typing import Literal, Optional
-
-from langchain_chroma import Chroma
-from langchain_postgres import PGVector
-from langchain_core.vectorstores import VectorStore
-from langchain_core.prompts import ChatPromptTemplate
-
 from operator import itemgetter
 from pathlib import Path
-from typing import  List, Literal, Optional
-
+from typing import TYPE_CHECKING, List, Literal, Optional
 
-from dataclasses import dataclass
-from langchain_chroma import Chroma
 from langchain_core.messages import AIMessage, HumanMessage, BaseMessage
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables import RunnableLambda
-from langchain_core.vectorstores import VectorStore
-
-from langchain_postgres import PGVector
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for `common`
 
+from common.context_cache import maybe_cache_prefix
+from common.streaming import print_stream
+from common.tracing import TracedEmbeddings, Tracer, TracingCallbackHandler, get_tracer
 from rag_pipeline import (
+    DEFAULT_CHROMA_DIR,
     build_llm,
     build_embeddings,
-    resolve_pg_connection_string,
+    build_vector_store,
+    describe_store,
     format_documents,
 )
+from retrieval import build_retriever
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.vectorstores import VectorStore
 
 
 @dataclass
@@ -40,9 +38,18 @@ class ChatArgs:
     store: Literal["pgvector", "chroma"]
     collection: str
     persist_dir: Optional[Path]
+    trace_file: Optional[Path] = None
+    timing: bool = False
 
 
-DEFAULT_CHROMA_DIR = Path(__file__).resolve().parent / "chroma_store"
+# The system prompt is static so it forms a cacheable prompt prefix; the
+# retrieved context, which changes every turn, travels with the question.
+RAG_SYSTEM_PROMPT = (
+    "You are a helpful assistant that answers with grounded information. "
+    "Use the context provided with the user's question to answer it. "
+    "If the answer cannot be found in the context, say you don't know."
+)
+RAG_QUESTION_PROMPT = "Context:\n{context}\n\nQuestion: {question}"
 
 
 def parse_args() -> ChatArgs:
@@ -60,33 +67,37 @@ def parse_args() -> ChatArgs:
         default=DEFAULT_CHROMA_DIR,
         help=f"Directory where Chroma persisted data (default: {DEFAULT_CHROMA_DIR})",
     )
+    parser.add_argument(
+        "--trace-file",
+        type=Path,
+        default=None,
+        help="Append per-span timings (embedding, retrieval, LLM, history) to this JSONL file.",
+    )
+    parser.add_argument("--timing", action="store_true", help="Print time to first token per turn.")
 
     ns = parser.parse_args()
     return ChatArgs(
         store=ns.store,
         collection=ns.collection,
         persist_dir=ns.persist_dir,
+        trace_file=ns.trace_file,
+        timing=ns.timing,
     )
 
 
 
-def build_chat_chain(vector_store: VectorStore):
-    retriever = vector_store.as_retriever(search_kwargs={"k": 4})
+def build_chat_chain(vector_store: VectorStore, llm: Optional[BaseChatModel] = None):
+    retriever = build_retriever(vector_store, k=4)
 
     prompt = ChatPromptTemplate.from_messages(
         [
-            (
-                "system",
-                "You are a helpful assistant that answers with grounded information. "
-                "Use this context to answer the user's question:\n{context}\n"
-                "If the answer cannot be found in the context, say you don't know.",
-            ),
+            ("system", RAG_SYSTEM_PROMPT),
             MessagesPlaceholder("history"),
-            ("human", "{question}"),
+            ("human", RAG_QUESTION_PROMPT),
         ]
     )
 
-    llm = build_llm()
+    llm = llm or maybe_cache_prefix(build_llm())
     rag_chain = (
         {
             "context": itemgetter("question")
@@ -102,8 +113,15 @@ def build_chat_chain(vector_store: VectorStore):
     return rag_chain
 
 
-def interactive_chat(vector_store: VectorStore, target_label: Optional[str] = None) -> None:
+def interactive_chat(
+    vector_store: VectorStore,
+    target_label: Optional[str] = None,
+    tracer: Optional[Tracer] = None,
+    timing: bool = False,
+) -> None:
     rag_chain = build_chat_chain(vector_store)
+    tracer = tracer or get_tracer()
+    callbacks = [TracingCallbackHandler(tracer)]
     history: List[BaseMessage] = []
     label = target_label or "the loaded collection"
     print(f"Chatting with {label}")
@@ -115,45 +133,34 @@ def interactive_chat(vector_store: VectorStore, target_label: Optional[str] = No
         if user_input.lower() in {"exit", "quit"}:
             print("Goodbye!")
             break
-        response = rag_chain.invoke(
-            {
-                "question": user_input,
-                "history": history,
-            }
-        )
-        print(f"Assistant: {response}\n")
-        history.extend([HumanMessage(content=user_input), AIMessage(content=response)])
+        with tracer.trace("rag_chat_turn"):
+            stream = rag_chain.stream(
+                {
+                    "question": user_input,
+                    "history": history,
+                },
+                config={"callbacks": callbacks},
+            )
+            response, turn_timing = print_stream(stream, tracer=tracer, name="rag_chat_turn")
+            if timing:
+                print(turn_timing.describe())
+            print()
+            with tracer.span("history", "append", messages=len(history) + 2):
+                history.extend([HumanMessage(content=user_input), AIMessage(content=response)])
 
 
 
 def main() -> None:
     args = parse_args()
-    embeddings = build_embeddings()
-
-    if args.store == "pgvector":
-        connection_string = resolve_pg_connection_string()
-
-    if args.store == "pgvector":
-        vector_store = PGVector(
-            collection_name=args.collection,
-            connection_string=connection_string,
-            embedding_function=embeddings,
-        )
-        label = f"pgvector collection '{args.collection}'"
-    else:
-        persist_dir = args.persist_dir or DEFAULT_CHROMA_DIR
-        if not persist_dir.exists():
-            raise RuntimeError(
-                f"Persist directory '{persist_dir}' does not exist. Ingest documents first."
-            )
-        vector_store = Chroma(
-            collection_name=args.collection,
-            embedding_function=embeddings,
-            persist_directory=str(persist_dir),
-        )
-        label = f"Chroma collection '{args.collection}' (persist dir: {persist_dir})"
-
-    interactive_chat(vector_store=vector_store, target_label=label)
+    tracer = get_tracer()
+    tracer.set_jsonl_path(args.trace_file)
+    embeddings = TracedEmbeddings(build_embeddings(), tracer)
+    vector_store = build_vector_store(
+        args.store, args.collection, embeddings, persist_dir=args.persist_dir
+    )
+    label = describe_store(args.store, args.collection, args.persist_dir)
+
+    interactive_chat(vector_store=vector_store, target_label=label, tracer=tracer, timing=args.timing)
 
 
 if __name__ == "__main__":
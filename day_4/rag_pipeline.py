@@ -1,58 +1,246 @@
-"""Shared RAG pipeline utilities and ingestion CLI for LangChain vector stores."""
+"""Shared RAG pipeline utilities and ingestion CLI for LangChain vector stores.
+
+Importing this module is cheap: vector store backends and Google clients are
+imported only when they are built, and the API key is checked at that point
+rather than at import time.
+"""
+from __future__ import annotations
 
 import argparse
 import os
+import sys
 from pathlib import Path
-from typing import Iterable, List, Literal, Optional, Sequence
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Literal, Optional, Sequence
 from urllib.parse import quote_plus
 
 from dotenv import load_dotenv
 
-from dataclasses import dataclass
-from langchain_chroma import Chroma
+from dataclasses import dataclass, field
 from langchain_core.documents import Document
-from langchain_core.vectorstores import VectorStore
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_google_genai import (
-    ChatGoogleGenerativeAI,
-    GoogleGenerativeAIEmbeddings,
-)
-from langchain_postgres import PGVector
-from langchain_community.document_loaders import PyPDFLoader
 
+from chunking import LengthUnit, StructuredChunker
+from dedup import DedupStats, dedup_chunks
+from pdf_extract import DEFAULT_PAGE_CACHE_DIR, EXTRACTORS, iter_pdf_pages
 
-load_dotenv()
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for `common`
+
+from common.gemini_client import gemini_api_key, get_chat_model, get_embeddings
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise RuntimeError("GEMINI_API_KEY not set in environment.")
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.vectorstores import VectorStore
+
+
+load_dotenv()
 
 DEFAULT_CHROMA_DIR = Path(__file__).resolve().parent / "chroma_store"
+DEFAULT_TEXT_STORE_DIR = Path(__file__).resolve().parent / "chunk_text"
+
+StoreName = Literal["pgvector", "chroma"]
 
 
 @dataclass
 class IngestArgs:
-    store: Literal["pgvector", "chroma"]
+    store: StoreName
     pdf_dir: Path
     collection: str
     chunk_size: int
     chunk_overlap: int
     persist_dir: Optional[Path]
+    length_unit: LengthUnit = "chars"
+    cross_page: bool = True
+    page_cache_dir: Optional[Path] = DEFAULT_PAGE_CACHE_DIR
+    extractor: str = "auto"
+    extract_workers: Optional[int] = None
+    dedup_threshold: Optional[float] = 0.9
+    batch_size: int = 64
+    lazy_text: Optional[bool] = None
+    text_compression: Optional[str] = None
+    shards: Optional[int] = None
+    shard_processes: bool = False
 
 
-def build_embeddings() -> GoogleGenerativeAIEmbeddings:
-    return GoogleGenerativeAIEmbeddings(
-        model="gemini-embedding-001",
-        google_api_key=GEMINI_API_KEY,
-    )
+@dataclass
+class IngestProgress:
+    """Running counts of an ingestion; `listener` is called after every update.
 
+    `ingest_pdfs` counts pages and written chunks. Chunks are embedded inside
+    `add_documents`, so `chunks_embedded` is counted by wrapping the store's
+    embeddings (see `ingest_jobs.ProgressEmbeddings`).
+    """
 
-def build_llm() -> ChatGoogleGenerativeAI:
-    return ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        google_api_key=GEMINI_API_KEY,
-        temperature=0.2,
-    )
+    pages_parsed: int = 0
+    chunks_embedded: int = 0
+    chunks_written: int = 0
+    listener: Optional[Callable[["IngestProgress"], None]] = field(default=None, repr=False, compare=False)
+
+    def add(self, **counts: int) -> None:
+        for name, count in counts.items():
+            setattr(self, name, getattr(self, name) + count)
+        if self.listener is not None:
+            self.listener(self)
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            "pages_parsed": self.pages_parsed,
+            "chunks_embedded": self.chunks_embedded,
+            "chunks_written": self.chunks_written,
+        }
+
+
+@dataclass
+class IngestReport:
+    chunks_stored: int
+    batch_size: int
+    dedup: Optional[DedupStats] = None
+
+
+# Optional overrides so tests and benchmarks can inject fake models.
+_llm_factory: Optional[Callable[[], BaseChatModel]] = None
+_embeddings_factory: Optional[Callable[[], Embeddings]] = None
+
+
+def set_model_factories(
+    llm: Optional[Callable[[], BaseChatModel]] = None,
+    embeddings: Optional[Callable[[], Embeddings]] = None,
+) -> None:
+    """Replace how `build_llm`/`build_embeddings` construct models (None restores Gemini)."""
+    global _llm_factory, _embeddings_factory
+    _llm_factory = llm
+    _embeddings_factory = embeddings
+
+
+def require_api_key() -> str:
+    api_key = gemini_api_key()
+    if not api_key:
+        raise RuntimeError("GEMINI_API_KEY not set in environment.")
+    return api_key
+
+
+def build_embeddings() -> Embeddings:
+    if _embeddings_factory is not None:
+        return _embeddings_factory()
+    return get_embeddings("gemini-embedding-001", api_key=require_api_key())
+
+
+def build_llm() -> BaseChatModel:
+    if _llm_factory is not None:
+        return _llm_factory()
+    return get_chat_model("gemini-2.5-flash", api_key=require_api_key(), temperature=0.2)
+
+
+def text_store_path(store: StoreName, collection: str, persist_dir: Optional[Path] = None) -> Path:
+    """Where a lazy-text collection keeps its `ChunkTextStore`."""
+    if store == "chroma":
+        return (persist_dir or DEFAULT_CHROMA_DIR) / "chunk_text" / collection
+    return DEFAULT_TEXT_STORE_DIR / collection
+
+
+def build_vector_store(
+    store: StoreName,
+    collection: str,
+    embeddings: Embeddings,
+    persist_dir: Optional[Path] = None,
+    create: bool = False,
+    lazy_text: Optional[bool] = None,
+    text_compression: Optional[str] = None,
+    shards: Optional[int] = None,
+    shard_processes: bool = False,
+) -> VectorStore:
+    """Open a collection, importing only the selected backend.
+
+    With `create=False` a missing Chroma persist directory is an error, since
+    chatting with a store that was never ingested cannot return anything.
+    With `lazy_text` the index keeps only ids and vectors and chunk text goes
+    to a `chunk_store.ChunkTextStore` (`text_compression`: zstd or none);
+    None opens collections that already have a text store that way.
+    `shards` > 1 creates a `sharding.ShardedVectorStore`; collections created
+    that way are always opened sharded, with each shard in its own process
+    when `shard_processes` is set.
+    """
+    from chunk_store import ChunkTextStore
+    from sharding import ShardedVectorStore, ShardManifest
+
+    manifest = ShardManifest.load(store, collection, persist_dir)
+    if manifest is not None and shards is not None and shards != manifest.shards:
+        raise ValueError(f"Collection '{collection}' was created with {manifest.shards} shards, not {shards}.")
+    if manifest is None and create and shards is not None and shards > 1:
+        manifest = ShardManifest.create(store, collection, shards, persist_dir)
+    if manifest is not None:
+        specs = manifest.shard_specs(create, lazy_text, text_compression)
+        return ShardedVectorStore(specs, embeddings, processes=shard_processes)
+
+    text_path = text_store_path(store, collection, persist_dir)
+    if lazy_text is None:
+        lazy_text = ChunkTextStore.exists(text_path)
+    if lazy_text:
+        return _build_lazy_text_store(store, collection, embeddings, persist_dir, create, text_path, text_compression)
+    if store == "pgvector":
+        from langchain_postgres import PGVector
+
+        return PGVector(
+            embeddings=embeddings,
+            connection=resolve_pg_connection_string(),
+            collection_name=collection,
+        )
+    if store == "chroma":
+        from langchain_chroma import Chroma
+
+        persist_dir = persist_dir or DEFAULT_CHROMA_DIR
+        if create:
+            persist_dir.mkdir(parents=True, exist_ok=True)
+        elif not persist_dir.exists():
+            raise RuntimeError(
+                f"Persist directory '{persist_dir}' does not exist. Ingest documents first."
+            )
+        return Chroma(
+            collection_name=collection,
+            embedding_function=embeddings,
+            persist_directory=str(persist_dir),
+        )
+    raise ValueError(f"Unknown vector store '{store}'.")
+
+
+def _build_lazy_text_store(
+    store: StoreName,
+    collection: str,
+    embeddings: Embeddings,
+    persist_dir: Optional[Path],
+    create: bool,
+    text_path: Path,
+    text_compression: Optional[str],
+) -> VectorStore:
+    from chunk_store import ChromaIdIndex, ChunkTextStore, LazyTextVectorStore, PGVectorIdIndex
+
+    new_text_store = not ChunkTextStore.exists(text_path)
+    if new_text_store and not create:
+        raise RuntimeError(f"No chunk text store at '{text_path}'. Ingest documents with --lazy-text first.")
+    if store == "pgvector":
+        index = PGVectorIdIndex(build_vector_store(store, collection, embeddings, lazy_text=False))
+    elif store == "chroma":
+        import chromadb
+
+        persist_dir = persist_dir or DEFAULT_CHROMA_DIR
+        persist_dir.mkdir(parents=True, exist_ok=True)
+        index = ChromaIdIndex(chromadb.PersistentClient(path=str(persist_dir)).get_or_create_collection(collection))
+    else:
+        raise ValueError(f"Unknown vector store '{store}'.")
+    if new_text_store and not index.is_empty():
+        raise RuntimeError(
+            f"Collection '{collection}' already stores chunk text; use a new collection for --lazy-text."
+        )
+    return LazyTextVectorStore(index, ChunkTextStore(text_path, text_compression), embeddings, namespace=collection)
+
+
+def describe_store(store: StoreName, collection: str, persist_dir: Optional[Path] = None) -> str:
+    from sharding import ShardManifest
+
+    manifest = ShardManifest.load(store, collection, persist_dir)
+    shards = f", {manifest.shards} shards" if manifest is not None else ""
+    if store == "pgvector":
+        return f"pgvector collection '{collection}'{shards}"
+    return f"Chroma collection '{collection}' (persist dir: {persist_dir or DEFAULT_CHROMA_DIR}{shards})"
 
 
 def resolve_pg_connection_string() -> str:
@@ -84,26 +272,45 @@ def resolve_pg_connection_string() -> str:
     )
 
 
-def load_pdf_documents(pdf_dir: Path) -> List[Document]:
-    docs: List[Document] = []
-    for pdf_path in sorted(pdf_dir.glob("*.pdf")):
-        loader = PyPDFLoader(str(pdf_path))
-        docs.extend(loader.load())
-    if not docs:
-        raise RuntimeError(f"No PDF files found in {pdf_dir}.")
-    return docs
+def load_pdf_documents(
+    pdf_dir: Path,
+    page_cache_dir: Optional[Path] = DEFAULT_PAGE_CACHE_DIR,
+    extractor: str = "auto",
+) -> List[Document]:
+    return list(iter_pdf_pages(pdf_dir, page_cache_dir, extractor=extractor))
 
 
 def chunk_documents(
     documents: Iterable[Document],
     chunk_size: int = 1000,
     chunk_overlap: int = 150,
+    length_unit: LengthUnit = "chars",
+    cross_page: bool = True,
 ) -> List[Document]:
-    splitter = RecursiveCharacterTextSplitter(
+    chunker = StructuredChunker(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
+        length_unit=length_unit,
+        cross_page=cross_page,
     )
-    return splitter.split_documents(list(documents))
+    return list(chunker.split_pages(documents))
+
+
+def _batched(items: Iterable[Document], size: int) -> Iterator[List[Document]]:
+    batch: List[Document] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _count_pages(pages: Iterable[Document], progress: IngestProgress) -> Iterator[Document]:
+    for page in pages:
+        progress.add(pages_parsed=1)
+        yield page
 
 
 def format_documents(docs: Sequence[Document]) -> str:
@@ -118,16 +325,95 @@ def ingest_pdfs(
     pdf_dir: Path,
     chunk_size: int,
     chunk_overlap: int,
-) -> int:
+    length_unit: LengthUnit = "chars",
+    cross_page: bool = True,
+    page_cache_dir: Optional[Path] = DEFAULT_PAGE_CACHE_DIR,
+    extractor: str = "auto",
+    extract_workers: Optional[int] = None,
+    batch_size: int = 64,
+    dedup_threshold: Optional[float] = 0.9,
+    progress: Optional[IngestProgress] = None,
+    before_batch: Optional[Callable[[List[Document]], None]] = None,
+) -> IngestReport:
+    """Chunk the PDFs and add them to the store in batches.
+
+    With `dedup_threshold`, near-duplicate chunks (estimated Jaccard similarity
+    of word shingles at or above it) are dropped before embedding; this needs
+    the whole chunk stream, so chunks are collected before the first batch.
+    `progress` is updated per parsed page and written batch; `before_batch` is
+    called before each batch is stored (to throttle or cancel the ingestion).
+    """
     if not pdf_dir.exists():
         raise FileNotFoundError(f"PDF directory '{pdf_dir}' does not exist.")
     if not pdf_dir.is_dir():
         raise RuntimeError(f"'{pdf_dir}' is not a directory.")
 
-    documents = load_pdf_documents(pdf_dir)
-    chunks = chunk_documents(documents, chunk_size, chunk_overlap)
-    vector_store.add_documents(chunks)
-    return len(chunks)
+    chunker = StructuredChunker(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_unit=length_unit,
+        cross_page=cross_page,
+    )
+    pages: Iterable[Document] = iter_pdf_pages(
+        pdf_dir, page_cache_dir, extractor=extractor, workers=extract_workers
+    )
+    if progress is not None:
+        pages = _count_pages(pages, progress)
+    chunks: Iterable[Document] = chunker.split_pages(pages)
+    stats = None
+    if dedup_threshold:
+        chunks, stats = dedup_chunks(chunks, dedup_threshold)
+    chunk_count = 0
+    for batch in _batched(chunks, batch_size):
+        if before_batch is not None:
+            before_batch(batch)
+        vector_store.add_documents(batch)
+        chunk_count += len(batch)
+        if progress is not None:
+            progress.add(chunks_written=len(batch))
+    return IngestReport(chunk_count, batch_size, stats)
+
+
+def ingest_from_args(
+    args: IngestArgs,
+    embeddings: Optional[Embeddings] = None,
+    progress: Optional[IngestProgress] = None,
+    before_batch: Optional[Callable[[List[Document]], None]] = None,
+) -> IngestReport:
+    """Open (or create) the target store and ingest `args.pdf_dir` into it."""
+    from sharding import ShardedVectorStore
+
+    vector_store = build_vector_store(
+        args.store,
+        args.collection,
+        embeddings or build_embeddings(),
+        persist_dir=args.persist_dir,
+        create=True,
+        lazy_text=args.lazy_text,
+        text_compression=args.text_compression,
+        shards=args.shards,
+        shard_processes=args.shard_processes,
+    )
+    try:
+        return ingest_pdfs(
+            vector_store=vector_store,
+            pdf_dir=args.pdf_dir,
+            chunk_size=args.chunk_size,
+            chunk_overlap=args.chunk_overlap,
+            length_unit=args.length_unit,
+            cross_page=args.cross_page,
+            page_cache_dir=args.page_cache_dir,
+            extractor=args.extractor,
+            extract_workers=args.extract_workers,
+            batch_size=args.batch_size,
+            dedup_threshold=args.dedup_threshold,
+            progress=progress,
+            before_batch=before_batch,
+        )
+    finally:
+        if isinstance(vector_store, ShardedVectorStore):
+            vector_store.close()
+
 
 def parse_args() -> IngestArgs:
     parser = argparse.ArgumentParser(description="Ingest PDFs into pgvector or Chroma stores")
@@ -141,12 +427,72 @@ def parse_args() -> IngestArgs:
     parser.add_argument("--collection", required=True, help="Target collection name.")
     parser.add_argument("--chunk-size", type=int, default=1000)
     parser.add_argument("--chunk-overlap", type=int, default=150)
+    parser.add_argument(
+        "--length-unit",
+        choices=["chars", "tokens"],
+        default="chars",
+        help="Measure --chunk-size/--chunk-overlap in characters or estimated tokens.",
+    )
+    parser.add_argument(
+        "--no-cross-page",
+        action="store_true",
+        help="Start a new chunk at every page boundary.",
+    )
+    parser.add_argument(
+        "--page-cache-dir",
+        type=Path,
+        default=DEFAULT_PAGE_CACHE_DIR,
+        help=f"Directory caching parsed page text (default: {DEFAULT_PAGE_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--extractor",
+        choices=["auto", *EXTRACTORS],
+        default="auto",
+        help="PDF text extraction backend (auto picks the fastest installed one).",
+    )
+    parser.add_argument(
+        "--extract-workers",
+        type=int,
+        default=None,
+        help="Processes used to extract pages (default: CPU count; 1 disables).",
+    )
     parser.add_argument(
         "--persist-dir",
         type=Path,
         default=DEFAULT_CHROMA_DIR,
         help=f"Directory to persist the Chroma DB (default: {DEFAULT_CHROMA_DIR})",
     )
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=0.9,
+        help="Drop chunks at least this similar (shingle Jaccard) to an earlier chunk.",
+    )
+    parser.add_argument("--no-dedup", action="store_true", help="Store every chunk, duplicates included.")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks embedded and stored per request.")
+    parser.add_argument(
+        "--lazy-text",
+        action="store_true",
+        help="Keep only ids and vectors in the index and chunk text in a memory-mapped chunk store "
+        "(collections that already have one keep using it).",
+    )
+    parser.add_argument(
+        "--text-compression",
+        choices=["zstd", "none"],
+        default=None,
+        help="Chunk store compression for a new --lazy-text collection (default: zstd when installed).",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help="Split a new collection across this many shards (fixed once the collection exists).",
+    )
+    parser.add_argument(
+        "--shard-processes",
+        action="store_true",
+        help="Write each shard of a sharded collection from its own process.",
+    )
     ns = parser.parse_args()
     return IngestArgs(
         store=ns.store,
@@ -155,38 +501,27 @@ def parse_args() -> IngestArgs:
         chunk_size=ns.chunk_size,
         chunk_overlap=ns.chunk_overlap,
         persist_dir=ns.persist_dir,
+        length_unit=ns.length_unit,
+        cross_page=not ns.no_cross_page,
+        page_cache_dir=ns.page_cache_dir,
+        extractor=ns.extractor,
+        extract_workers=ns.extract_workers,
+        dedup_threshold=None if ns.no_dedup else ns.dedup_threshold,
+        batch_size=ns.batch_size,
+        lazy_text=True if ns.lazy_text else None,
+        text_compression=ns.text_compression,
+        shards=ns.shards,
+        shard_processes=ns.shard_processes,
     )
 
 
 def main() -> None:
     args = parse_args()
-    embeddings = build_embeddings()
-
-    if args.store == "pgvector":
-        connection_string = resolve_pg_connection_string()
-        vector_store = PGVector(
-            collection_name=args.collection,
-            connection_string=connection_string,
-            embedding_function=embeddings,
-        )
-        label = f"pgvector collection '{args.collection}'"
-    else:
-        persist_dir = args.persist_dir or DEFAULT_CHROMA_DIR
-        persist_dir.mkdir(parents=True, exist_ok=True)
-        vector_store = Chroma(
-            collection_name=args.collection,
-            embedding_function=embeddings,
-            persist_directory=str(persist_dir),
-        )
-        label = f"Chroma collection '{args.collection}' (persist dir: {persist_dir})"
-
-    chunk_count = ingest_pdfs(
-        vector_store=vector_store,
-        pdf_dir=args.pdf_dir,
-        chunk_size=args.chunk_size,
-        chunk_overlap=args.chunk_overlap,
-    )
-    print(f"Ingestion complete. Stored {chunk_count} chunks in {label}.")
+    report = ingest_from_args(args)
+    label = describe_store(args.store, args.collection, args.persist_dir)
+    print(f"Ingestion complete. Stored {report.chunks_stored} chunks in {label}.")
+    if report.dedup is not None:
+        print(f"Dedup: {report.dedup.describe(report.batch_size)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,173 @@
+"""Retriever used by the RAG chatbots.
+
+`CoalescingRetriever` wraps a vector store retriever so that identical
+concurrent async searches (same question modulo case, spacing and punctuation)
+share one embedding call and one vector search. The sync path is unchanged.
+
+`SpeculativePrefetch` starts a search for the raw user input while the agent's
+first model call is still running; the `pdf_search` tool takes the result
+instead of searching again when the model's query is close enough to the
+input, and the prefetched documents are discarded otherwise.
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from pydantic import ConfigDict, Field
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for `common`
+
+from common.single_flight import SingleFlight, normalize_text
+
+
+class CoalescingRetriever(BaseRetriever):
+    """Single-flight wrapper around another retriever."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    retriever: BaseRetriever
+    flight: SingleFlight = Field(default_factory=SingleFlight, exclude=True)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.retriever.invoke(query)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        documents = await self.flight.do(
+            normalize_text(query), lambda: self.retriever.ainvoke(query)
+        )
+        return list(documents)
+
+
+def build_retriever(vector_store: VectorStore, k: int = 4) -> CoalescingRetriever:
+    return CoalescingRetriever(retriever=vector_store.as_retriever(search_kwargs={"k": k}))
+
+
+def query_overlap(query: str, user_input: str) -> float:
+    """Jaccard similarity of the query's and the user input's word sets.
+
+    Symmetric, so a narrow query (one topic of a long question) scores low and
+    gets its own search rather than the documents found for the whole input.
+    """
+    query_words = set(normalize_text(query).split())
+    input_words = set(normalize_text(user_input).split())
+    if not query_words or not input_words:
+        return 0.0
+    return len(query_words & input_words) / len(query_words | input_words)
+
+
+@dataclass
+class PrefetchStats:
+    turns: int = 0
+    hits: int = 0
+    misses: int = 0
+    unused: int = 0
+    saved_ms: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        served = self.hits + self.misses + self.unused
+        return self.hits / served if served else 0.0
+
+    def describe(self) -> str:
+        return (
+            f"[speculative retrieval: {self.hits}/{self.turns} turns served, hit rate {self.hit_rate:.0%}, "
+            f"{self.misses} mismatched, {self.unused} unused, {self.saved_ms:.0f} ms saved]"
+        )
+
+
+class SpeculativePrefetch:
+    """One speculative search per turn, handed to the first matching `pdf_search` call.
+
+    `start(user_input)` begins the search in a background thread; `take(query)`
+    returns its documents when `query_overlap(query, user_input)` is at least
+    `min_overlap` (waiting for the search if it is still running), else None.
+    Either way the prefetch is used up: later searches in the turn run normally.
+    """
+
+    def __init__(self, retriever: BaseRetriever, min_overlap: float = 0.6):
+        self.retriever = retriever
+        self.min_overlap = min_overlap
+        self.stats = PrefetchStats()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._pending: Optional[Tuple[str, Future]] = None
+
+    def _search(self, user_input: str) -> Tuple[List[Document], float]:
+        start = time.perf_counter()
+        documents = self.retriever.invoke(user_input)
+        return documents, (time.perf_counter() - start) * 1000
+
+    def start(self, user_input: str) -> None:
+        """Begin the speculative search for a new turn, dropping any unused one."""
+        self.finish_turn()
+        with self._lock:
+            self.stats.turns += 1
+            self._pending = (user_input, self._executor.submit(self._search, user_input))
+
+    def _claim(self, query: str) -> Optional[Future]:
+        with self._lock:
+            if self._pending is None:
+                return None
+            user_input, future = self._pending
+            self._pending = None
+            if query_overlap(query, user_input) < self.min_overlap:
+                self.stats.misses += 1
+                return None
+            return future
+
+    def _served(self, result: Tuple[List[Document], float], waited_ms: float) -> List[Document]:
+        documents, search_ms = result
+        with self._lock:
+            self.stats.hits += 1
+            self.stats.saved_ms += max(0.0, search_ms - waited_ms)
+        return documents
+
+    def take(self, query: str) -> Optional[List[Document]]:
+        future = self._claim(query)
+        if future is None:
+            return None
+        start = time.perf_counter()
+        try:
+            result = future.result()
+        except Exception:
+            return None  # the regular search reports the error
+        return self._served(result, (time.perf_counter() - start) * 1000)
+
+    async def atake(self, query: str) -> Optional[List[Document]]:
+        future = self._claim(query)
+        if future is None:
+            return None
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wrap_future(future)
+        except Exception:
+            return None
+        return self._served(result, (time.perf_counter() - start) * 1000)
+
+    def finish_turn(self) -> None:
+        """Discard the turn's prefetch if no tool call used it."""
+        with self._lock:
+            if self._pending is not None:
+                self.stats.unused += 1
+                self._pending = None
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
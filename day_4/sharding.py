@@ -0,0 +1,256 @@
+"""Collections split across several vector stores, searched scatter-gather.
+
+A sharded collection is created with `rag_pipeline.py --shards N` (or
+`build_vector_store(..., shards=N, create=True)`); its shard count is fixed at
+creation and recorded in a manifest next to the shards:
+
+- Chroma: `<persist dir>/shards/<collection>/manifest.json`, each shard a
+  separate persist directory `shard-<i>` holding a collection of the same name
+- pgvector: `day_4/shards/<collection>/manifest.json`, each shard a collection
+  named `<collection>-shard-<i>`
+
+`ShardedVectorStore` embeds documents and queries once, with the caller's
+embeddings, so batching, progress counting and throttling work as for one
+store. Each chunk goes to the shard picked by a hash of its source and text,
+so re-ingesting a document writes its chunks to the same shards. A search
+sends the query vector to every shard concurrently and merges the per-shard
+top-k by distance.
+
+Shards are opened in the calling process and served by a thread each, or with
+`processes=True` each in its own spawned process, so that index search and
+writes of different shards run on different cores.
+"""
+from __future__ import annotations
+
+import hashlib
+import heapq
+import json
+import multiprocessing
+import signal
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+DEFAULT_SHARD_DIR = Path(__file__).resolve().parent / "shards"
+
+
+@dataclass
+class ShardManifest:
+    store: str
+    collection: str
+    shards: int
+    root: Path
+
+    @staticmethod
+    def root_for(store: str, collection: str, persist_dir: Optional[Path] = None) -> Path:
+        if store == "chroma":
+            from rag_pipeline import DEFAULT_CHROMA_DIR
+
+            return (persist_dir or DEFAULT_CHROMA_DIR) / "shards" / collection
+        return DEFAULT_SHARD_DIR / collection
+
+    @classmethod
+    def load(cls, store: str, collection: str, persist_dir: Optional[Path] = None) -> Optional["ShardManifest"]:
+        root = cls.root_for(store, collection, persist_dir)
+        path = root / "manifest.json"
+        if not path.exists():
+            return None
+        return cls(store=store, collection=collection, shards=json.loads(path.read_text())["shards"], root=root)
+
+    @classmethod
+    def create(cls, store: str, collection: str, shards: int, persist_dir: Optional[Path] = None) -> "ShardManifest":
+        if shards < 2:
+            raise ValueError("A sharded collection needs at least 2 shards.")
+        root = cls.root_for(store, collection, persist_dir)
+        root.mkdir(parents=True, exist_ok=True)
+        (root / "manifest.json").write_text(json.dumps({"store": store, "collection": collection, "shards": shards}))
+        return cls(store=store, collection=collection, shards=shards, root=root)
+
+    def shard_specs(self, create: bool, lazy_text: Optional[bool], text_compression: Optional[str]) -> List["ShardSpec"]:
+        specs = []
+        for i in range(self.shards):
+            if self.store == "chroma":
+                collection, persist_dir = self.collection, self.root / f"shard-{i}"
+            else:
+                collection, persist_dir = f"{self.collection}-shard-{i}", None
+            specs.append(ShardSpec(self.store, collection, persist_dir, create, lazy_text, text_compression))
+        return specs
+
+
+@dataclass
+class ShardSpec:
+    """`rag_pipeline.build_vector_store` arguments of one shard."""
+
+    store: str
+    collection: str
+    persist_dir: Optional[Path]
+    create: bool
+    lazy_text: Optional[bool]
+    text_compression: Optional[str]
+
+
+def shard_of(document: Document, shards: int) -> int:
+    key = f"{document.metadata.get('source', '')}\0{document.page_content}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") % shards
+
+
+class PrecomputedEmbeddings(Embeddings):
+    """Hands a shard the vectors its documents were already embedded with."""
+
+    def __init__(self) -> None:
+        self._vectors: Optional[List[List[float]]] = None
+
+    def load(self, vectors: List[List[float]]) -> None:
+        self._vectors = vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors, self._vectors = self._vectors, None
+        if vectors is None or len(vectors) != len(texts):
+            raise RuntimeError("Shard documents must be added with their precomputed vectors.")
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        raise RuntimeError("Shards are searched by vector.")
+
+
+def search_by_vector(store: VectorStore, vector: List[float], k: int) -> List[Tuple[Document, float]]:
+    """(document, distance) of the `k` nearest chunks; lower is nearer for every backend used here."""
+    if hasattr(store, "similarity_search_with_score_by_vector"):
+        return store.similarity_search_with_score_by_vector(vector, k)
+    return store.similarity_search_by_vector_with_relevance_scores(vector, k)  # Chroma: also distances
+
+
+class Shard:
+    def __init__(self, spec: ShardSpec):
+        from rag_pipeline import build_vector_store
+
+        self.embeddings = PrecomputedEmbeddings()
+        self.store = build_vector_store(
+            spec.store,
+            spec.collection,
+            self.embeddings,
+            spec.persist_dir,
+            create=spec.create,
+            lazy_text=spec.lazy_text,
+            text_compression=spec.text_compression,
+        )
+        self._write_lock = threading.Lock()
+
+    def add(self, documents: List[Document], vectors: List[List[float]]) -> List[str]:
+        with self._write_lock:
+            self.embeddings.load(vectors)
+            return self.store.add_documents(documents)
+
+    def search(self, vector: List[float], k: int) -> List[Tuple[Document, float]]:
+        return search_by_vector(self.store, vector, k)
+
+
+# The shard served by this process (process mode).
+_process_shard: Optional[Shard] = None
+
+
+def _init_shard_process(spec: ShardSpec) -> None:
+    global _process_shard
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent shuts shard processes down
+    _process_shard = Shard(spec)
+
+
+def _process_add(documents: List[Document], vectors: List[List[float]]) -> List[str]:
+    return _process_shard.add(documents, vectors)
+
+
+def _process_search(vector: List[float], k: int) -> List[Tuple[Document, float]]:
+    return _process_shard.search(vector, k)
+
+
+class ShardedVectorStore(VectorStore):
+    """Hash-partitioned writes and scatter-gather search over the shards of a `ShardManifest`."""
+
+    def __init__(self, specs: List[ShardSpec], embeddings: Embeddings, processes: bool = False):
+        self.specs = specs
+        self._embeddings = embeddings
+        self.processes = processes
+        if processes:
+            # Spawned, not forked: the calling process may be an API server running threads.
+            context = multiprocessing.get_context("spawn")
+            self._executors: List[Executor] = [
+                ProcessPoolExecutor(1, mp_context=context, initializer=_init_shard_process, initargs=(spec,))
+                for spec in specs
+            ]
+        else:
+            self._shards = [Shard(spec) for spec in specs]
+            self._pool = ThreadPoolExecutor(len(specs), thread_name_prefix="shard")
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embeddings
+
+    def _submit(self, shard: int, method: str, *args: Any) -> Future:
+        if self.processes:
+            function = _process_add if method == "add" else _process_search
+            return self._executors[shard].submit(function, *args)
+        return self._pool.submit(getattr(self._shards[shard], method), *args)
+
+    def add_documents(self, documents: List[Document], **kwargs: Any) -> List[str]:
+        if not documents:
+            return []
+        vectors = self._embeddings.embed_documents([doc.page_content for doc in documents])
+        parts: Dict[int, List[int]] = {}
+        for position, document in enumerate(documents):
+            parts.setdefault(shard_of(document, len(self.specs)), []).append(position)
+        futures = {
+            shard: self._submit(
+                shard, "add", [documents[p] for p in positions], [vectors[p] for p in positions]
+            )
+            for shard, positions in parts.items()
+        }
+        ids: List[str] = [""] * len(documents)
+        for shard, future in futures.items():
+            for position, chunk_id in zip(parts[shard], future.result()):
+                ids[position] = f"{shard}/{chunk_id}"
+        return ids
+
+    def add_texts(
+        self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any
+    ) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        return self.add_documents([Document(page_content=t, metadata=m) for t, m in zip(texts, metadatas)])
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4
+    ) -> List[Tuple[Document, float]]:
+        futures = [self._submit(shard, "search", embedding, k) for shard in range(len(self.specs))]
+        hits: List[Tuple[Document, float]] = []
+        for shard, future in enumerate(futures):
+            for document, distance in future.result():
+                # Ids are only unique within a shard.
+                hits.append((document.model_copy(update={"id": f"{shard}/{document.id}"}), distance))
+        return heapq.nsmallest(k, hits, key=lambda hit: hit[1])
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embeddings.embed_query(query), k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def close(self) -> None:
+        """Stop the shard threads or processes."""
+        if self.processes:
+            for executor in self._executors:
+                executor.shutdown(cancel_futures=True)
+        else:
+            self._pool.shutdown(cancel_futures=True)
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, **kwargs: Any):
+        raise NotImplementedError("Open sharded collections with rag_pipeline.build_vector_store.")
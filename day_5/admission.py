@@ -0,0 +1,283 @@
+"""Admission control and load shedding for the API.
+
+Requests are sorted into priority classes by path prefix (e.g. cheap `/echo`
+calls ahead of expensive `/weather` agent runs). Each class has its own
+concurrency limit and bounded FIFO queue, and all classes share a global
+in-flight limit that is handed out highest priority first. Instead of letting
+every request get slower under overload, the middleware rejects early:
+
+- 429 when the class queue is full;
+- 503 when the expected queue wait (queued requests x recent service time /
+  concurrency) exceeds the class `target_wait`, or a queued request has
+  already waited that long.
+
+Both carry a `Retry-After` header. Paths outside every class (health,
+readiness, metrics, docs) are never queued. `snapshot()` backs the `/ready`
+endpoint with queue depth and wait times per class.
+
+Work fanned out by an admitted request (the items of a batch) takes slots of
+another class with `background_slot`: it counts against that class's
+concurrency, waits behind the class's own queued requests and is never shed.
+
+`AdmissionMiddleware` is a plain ASGI middleware (no per-request task group as
+with `@app.middleware("http")`), and holds the slot until the response body,
+streamed or not, has been sent.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from common.tracing import get_tracer
+
+EWMA_ALPHA = 0.2
+
+
+@dataclass
+class PriorityClass:
+    name: str
+    prefixes: Tuple[str, ...]
+    priority: int = 0  # lower is served first
+    concurrency: int = 8
+    max_queue: int = 32
+    target_wait: float = 1.0  # seconds
+
+
+class Rejected(Exception):
+    def __init__(self, status: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _ClassState:
+    def __init__(self, spec: PriorityClass):
+        self.spec = spec
+        self.in_flight = 0
+        self.waiters: Deque[Tuple[float, asyncio.Future]] = deque()
+        self.background: Deque[asyncio.Future] = deque()  # `background_slot` waiters, served last
+        self.service_ewma = 0.0
+        self.wait_ewma = 0.0
+        self.admitted = 0
+        self.rejected: Dict[int, int] = {429: 0, 503: 0}
+
+    def expected_wait(self) -> float:
+        return (len(self.waiters) + 1) * self.service_ewma / self.spec.concurrency
+
+    def oldest_wait(self, now: float) -> float:
+        return now - self.waiters[0][0] if self.waiters else 0.0
+
+    def shedding(self, now: float) -> bool:
+        return (
+            len(self.waiters) >= self.spec.max_queue
+            or (bool(self.waiters) and self.expected_wait() > self.spec.target_wait)
+            or self.oldest_wait(now) > self.spec.target_wait
+        )
+
+
+class AdmissionController:
+    """Priority-aware concurrency limiter usable as an HTTP middleware."""
+
+    def __init__(self, classes: Sequence[PriorityClass], max_in_flight: int = 64):
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self._states = sorted((_ClassState(c) for c in classes), key=lambda s: s.spec.priority)
+
+    def class_named(self, name: str) -> _ClassState:
+        for state in self._states:
+            if state.spec.name == name:
+                return state
+        raise KeyError(f"No admission class named {name!r}")
+
+    def classify(self, path: str) -> Optional[_ClassState]:
+        """The class with the longest prefix matching `path`."""
+        best, best_length = None, -1
+        for state in self._states:
+            for prefix in state.spec.prefixes:
+                matches = path == prefix or path.startswith(prefix.rstrip("/") + "/")
+                if matches and len(prefix) > best_length:
+                    best, best_length = state, len(prefix)
+        return best
+
+    def _can_run(self, state: _ClassState) -> bool:
+        return state.in_flight < state.spec.concurrency and self.in_flight < self.max_in_flight
+
+    def _start(self, state: _ClassState) -> None:
+        state.in_flight += 1
+        state.admitted += 1
+        self.in_flight += 1
+
+    def _dispatch(self) -> None:
+        """Hand free slots to queued requests, highest priority class first."""
+        for state in self._states:
+            while state.waiters and self._can_run(state):
+                _, future = state.waiters.popleft()
+                if future.done():  # timed out or cancelled while queued
+                    continue
+                self._start(state)
+                future.set_result(None)
+            while state.background and not state.waiters and self._can_run(state):
+                future = state.background.popleft()
+                if future.done():  # cancelled while queued
+                    continue
+                self._start(state)
+                future.set_result(None)
+
+    def _higher_priority_waiting(self, state: _ClassState) -> bool:
+        return any(
+            other.waiters and other.in_flight < other.spec.concurrency
+            for other in self._states
+            if other.spec.priority < state.spec.priority
+        )
+
+    def _reject(self, state: _ClassState, status: int, reason: str) -> Rejected:
+        state.rejected[status] += 1
+        retry_after = max(1.0, state.expected_wait())
+        get_tracer().observe("queue", state.spec.name, 0.0, error=f"rejected_{status}")
+        return Rejected(status, reason, retry_after)
+
+    async def acquire(self, state: _ClassState) -> float:
+        """Wait for a slot in `state`'s class; return the queue wait in seconds."""
+        if not state.waiters and self._can_run(state) and not self._higher_priority_waiting(state):
+            self._start(state)
+            return 0.0
+        if len(state.waiters) >= state.spec.max_queue:
+            raise self._reject(state, 429, f"{state.spec.name} queue is full")
+        if state.expected_wait() > state.spec.target_wait:
+            raise self._reject(state, 503, f"{state.spec.name} queue wait exceeds target")
+
+        entered = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        state.waiters.append((entered, future))
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=state.spec.target_wait)
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.cancel()
+                _discard(state.waiters, future)
+                raise self._reject(state, 503, f"{state.spec.name} request waited past target") from None
+            # Granted just as the timer fired: keep the slot.
+        except asyncio.CancelledError:
+            if future.done():
+                self._free(state)
+            else:
+                future.cancel()
+                _discard(state.waiters, future)
+            raise
+        wait = time.monotonic() - entered
+        state.wait_ewma += EWMA_ALPHA * (wait - state.wait_ewma)
+        return wait
+
+    @asynccontextmanager
+    async def background_slot(self, name: str) -> AsyncIterator[None]:
+        """Hold a slot of class `name` for work started by an already admitted request.
+
+        Waits without a queue limit or timeout, behind the class's queued
+        requests, so the fan-out shares the class concurrency without starving it.
+        """
+        state = self.class_named(name)
+        if (
+            not state.waiters
+            and not state.background
+            and self._can_run(state)
+            and not self._higher_priority_waiting(state)
+        ):
+            self._start(state)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            state.background.append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self._free(state)
+                elif future in state.background:
+                    state.background.remove(future)
+                raise
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(state, time.perf_counter() - start)
+
+    def _free(self, state: _ClassState) -> None:
+        state.in_flight -= 1
+        self.in_flight -= 1
+        self._dispatch()
+
+    def release(self, state: _ClassState, service_time: float) -> None:
+        state.service_ewma += EWMA_ALPHA * (service_time - state.service_ewma)
+        self._free(state)
+
+    @property
+    def overloaded(self) -> bool:
+        now = time.monotonic()
+        return any(state.shedding(now) for state in self._states)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        classes: List[Dict[str, Any]] = [
+            {
+                "name": state.spec.name,
+                "priority": state.spec.priority,
+                "in_flight": state.in_flight,
+                "concurrency": state.spec.concurrency,
+                "queue_depth": len(state.waiters),
+                "background_waiting": len(state.background),
+                "max_queue": state.spec.max_queue,
+                "oldest_wait_ms": round(state.oldest_wait(now) * 1000, 1),
+                "avg_wait_ms": round(state.wait_ewma * 1000, 1),
+                "avg_service_ms": round(state.service_ewma * 1000, 1),
+                "target_wait_ms": state.spec.target_wait * 1000,
+                "admitted": state.admitted,
+                "rejected": dict(state.rejected),
+                "shedding": state.shedding(now),
+            }
+            for state in self._states
+        ]
+        return {"in_flight": self.in_flight, "max_in_flight": self.max_in_flight, "classes": classes}
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an `AdmissionController` to HTTP requests."""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        state = self.controller.classify(scope["path"]) if scope["type"] == "http" else None
+        if state is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            wait = await self.controller.acquire(state)
+        except Rejected as exc:
+            response = JSONResponse(
+                {"detail": exc.reason},
+                status_code=exc.status,
+                headers={"Retry-After": str(math.ceil(exc.retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+        get_tracer().observe("queue", state.spec.name, wait * 1000)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(state, time.perf_counter() - start)
+
+
+def _discard(waiters: Deque[Tuple[float, asyncio.Future]], future: asyncio.Future) -> None:
+    for entry in waiters:
+        if entry[1] is future:
+            waiters.remove(entry)
+            return
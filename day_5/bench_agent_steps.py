@@ -0,0 +1,94 @@
+"""End-to-end latency of a multi-city weather question for different agent loop shapes.
+
+Runs `chat_with_agent` offline with `ScriptedToolCallingModel` (each model call
+sleeps `--llm-ms`) and a weather provider that sleeps `--tool-ms` per lookup,
+for a question naming `--cities` cities:
+
+- sequential: the model asks for one city per turn (N+1 model calls, N
+  tool rounds), as a model that does not batch tool calls would
+- parallel: the model asks for every city in one turn and the tool calls run
+  concurrently (2 model calls, 1 tool round)
+- prefetch: the fast path looks all cities up concurrently before the agent
+  runs (1 model call)
+- sequential, budget: as sequential, with AGENT_MAX_STEPS=`--max-steps`; the
+  run ends early with a partial answer
+
+    python bench_agent_steps.py
+    python bench_agent_steps.py --cities 5 --llm-ms 400 --max-steps 3
+"""
+
+import argparse
+import os
+import statistics
+import time
+from typing import Dict, List, Optional
+
+os.environ.setdefault("SESSION_BACKEND", "memory")
+
+from generation import agent
+from generation.fakes import ScriptedToolCallingModel
+from generation.weather import WEATHER_FIXTURES, FixtureWeatherProvider
+
+CITY_NAMES = ["Paris", "Tokyo", "London", "Dubai", "New York"]
+
+
+class SlowWeatherProvider(FixtureWeatherProvider):
+    """Fixture data behind a fixed per-lookup delay, like a remote weather API."""
+
+    def __init__(self, delay: float):
+        super().__init__(WEATHER_FIXTURES)
+        self.delay = delay
+
+    def lookup(self, city: str) -> Optional[str]:
+        time.sleep(self.delay)
+        return super().lookup(city)
+
+
+def run_scenario(
+    tool_calls: str, fast_path: bool, max_steps: int, question: str, runs: int, llm_s: float
+) -> Dict[str, object]:
+    agent.FAST_PATH_ENABLED = fast_path
+    os.environ["AGENT_MAX_STEPS"] = str(max_steps)
+    agent.set_llm_factory(lambda: ScriptedToolCallingModel(latency=llm_s, tool_calls=tool_calls))
+    timings: List[float] = []
+    reply = ""
+    for i in range(runs):
+        start = time.perf_counter()
+        reply = agent.chat_with_agent(question, session_id=f"bench-{tool_calls}-{fast_path}-{max_steps}-{i}")
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"p50_ms": statistics.median(timings), "reply": reply}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Multi-city weather agent latency by loop shape")
+    parser.add_argument("--cities", type=int, default=4, choices=range(1, len(CITY_NAMES) + 1))
+    parser.add_argument("--llm-ms", type=float, default=150.0)
+    parser.add_argument("--tool-ms", type=float, default=100.0)
+    parser.add_argument("--max-steps", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=5)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    agent.set_weather_provider(SlowWeatherProvider(args.tool_ms / 1000))
+    question = "What's the weather in " + ", ".join(CITY_NAMES[: args.cities]) + "?"
+    unlimited = 2 * len(CITY_NAMES) + 2
+    scenarios = {
+        "sequential": ("sequential", False, unlimited),
+        "parallel": ("parallel", False, unlimited),
+        "prefetch": ("parallel", True, unlimited),
+        "sequential, budget": ("sequential", False, args.max_steps),
+    }
+    print(f"question: {question}")
+    print(f"{'scenario':<22}{'p50 ms':>9}  reply")
+    for label, (tool_calls, fast_path, max_steps) in scenarios.items():
+        result = run_scenario(tool_calls, fast_path, max_steps, question, args.runs, args.llm_ms / 1000)
+        reply = " ".join(str(result["reply"]).split())
+        print(f"{label:<22}{result['p50_ms']:>9.0f}  {reply[:90]}")
+    agent.set_llm_factory(None)
+    os.environ.pop("AGENT_MAX_STEPS", None)
+
+
+if __name__ == "__main__":
+    main()
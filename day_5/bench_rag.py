@@ -0,0 +1,169 @@
+"""Cold vs. warm latency of the `/rag` routes, offline.
+
+Ingests the day_4 synthetic corpus into a throwaway local Chroma collection,
+with every Gemini call served by the local fake server (GEMINI_FAKE): each new
+connection costs `--connect-ms` (standing in for TCP and TLS setup), each call
+`--latency-ms`, and streamed answers arrive at `--tokens-per-s`.
+
+Every run is a fresh process, so imports, client construction, opening the
+collection and connection setup are really cold. Requests go straight to the
+ASGI app, after the app's lifespan hook:
+
+- cold: RAG_WARMUP=0, the resources are built by the first request
+- warm: the lifespan hook builds the resources and warms them (dummy search
+  and embedding) before the first request
+
+For each mode it reports the lifespan startup time, the first request and the
+median of the following `--requests` requests (total time for `/rag/query`,
+time to the first answer chunk for `/rag/query/stream`).
+
+    python bench_rag.py
+    python bench_rag.py --route stream --connect-ms 300 --runs 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+HERE = Path(__file__).resolve().parent
+DAY_4_DIR = HERE.parent / "day_4"
+COLLECTION = "bench-rag"
+ROUTES = {"query": "/rag/query", "stream": "/rag/query/stream"}
+MODES = {"cold": "0", "warm": "1"}
+
+
+def fake_spec(args: argparse.Namespace) -> str:
+    return f"connect_ms={args.connect_ms},latency_ms={args.latency_ms},tokens_per_s={args.tokens_per_s}"
+
+
+def build_collection(persist_dir: Path) -> List[str]:
+    """Ingest the synthetic corpus with the fake embeddings; returns its questions."""
+    os.environ["GEMINI_FAKE"] = "1"
+    sys.path.insert(0, str(DAY_4_DIR))
+    from bench_retrieval import synthetic_corpus
+    from rag_pipeline import build_embeddings, build_vector_store
+
+    documents, queries = synthetic_corpus(pages=200, facts_per_page=4)
+    store = build_vector_store("chroma", COLLECTION, build_embeddings(), persist_dir, create=True)
+    store.add_documents(documents)
+    return [query.question for query in queries]
+
+
+async def post(app, path: str, payload: dict) -> Tuple[int, float]:
+    """Send one request through the ASGI app; returns (status, ms to the full body or first answer chunk)."""
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+    }
+    received = False
+    status = 0
+    first_chunk: Optional[float] = None
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.sleep(3600)  # no disconnect while the response is sent
+
+    async def send(message):
+        nonlocal status, first_chunk
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and first_chunk is None and b'"delta"' in message.get("body", b""):
+            first_chunk = time.perf_counter()
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    end = first_chunk if first_chunk is not None else time.perf_counter()
+    return status, (end - start) * 1000
+
+
+async def child_run(route: str, questions: List[str], requests: int) -> Dict[str, object]:
+    from main import app
+
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        startup_ms = (time.perf_counter() - start) * 1000
+        latencies: List[float] = []
+        for i in range(requests + 1):
+            status, ms = await post(app, ROUTES[route], {"question": questions[i % len(questions)]})
+            if status != 200:
+                raise RuntimeError(f"{ROUTES[route]} returned {status}")
+            latencies.append(ms)
+    return {"startup_ms": startup_ms, "first_ms": latencies[0], "next_p50_ms": statistics.median(latencies[1:])}
+
+
+def run_child(mode: str, persist_dir: Path, questions_file: Path, args: argparse.Namespace) -> Dict[str, float]:
+    env = {k: v for k, v in os.environ.items() if k != "GEMINI_API_KEY"}
+    env.update(
+        GEMINI_FAKE=fake_spec(args),
+        RAG_COLLECTION=COLLECTION,
+        RAG_PERSIST_DIR=str(persist_dir),
+        RAG_WARMUP=MODES[mode],
+        SESSION_BACKEND="memory",
+    )
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", str(questions_file), "--route", args.route, "--requests", str(args.requests)],
+        cwd=HERE,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{mode} run failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Cold vs. warm latency of the /rag routes")
+    parser.add_argument("--route", choices=sorted(ROUTES), default="query")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes per mode (medians are reported).")
+    parser.add_argument("--requests", type=int, default=10, help="Requests after the first one, per run.")
+    parser.add_argument("--connect-ms", type=float, default=150.0)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--tokens-per-s", type=float, default=200.0)
+    parser.add_argument("--child", type=Path, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.child is not None:
+        questions = json.loads(args.child.read_text())
+        print(json.dumps(asyncio.run(child_run(args.route, questions, args.requests))))
+        return
+
+    with tempfile.TemporaryDirectory(prefix="bench-rag-") as tmp:
+        persist_dir = Path(tmp) / "chroma"
+        questions_file = Path(tmp) / "questions.json"
+        questions_file.write_text(json.dumps(build_collection(persist_dir)))
+        print(f"route: {ROUTES[args.route]}  fake Gemini: {fake_spec(args)}")
+        print(f"{'mode':<6}{'startup ms':>12}{'first ms':>10}{'next p50 ms':>13}")
+        for mode in MODES:
+            runs = [run_child(mode, persist_dir, questions_file, args) for _ in range(args.runs)]
+            row = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+            print(f"{mode:<6}{row['startup_ms']:>12.0f}{row['first_ms']:>10.0f}{row['next_p50_ms']:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
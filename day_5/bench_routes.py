@@ -0,0 +1,166 @@
+"""Micro-benchmark for the API routes, run in-process.
+
+Requests are sent straight to the ASGI app (no sockets, no HTTP client), so
+the numbers reflect routing, middleware, validation and serialization cost
+only. `/weather/chat` uses the offline fake LLM with zero latency, so it
+measures the agent plumbing around the model call.
+
+For each route it reports requests/sec, median latency, the peak memory
+allocated while serving one request (tracemalloc) and the number of
+generation-0 garbage collections per 1,000 requests, a proxy for how many
+container objects a request churns through.
+
+    python bench_routes.py
+    python bench_routes.py --requests 20000 --route echo
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+os.environ.setdefault("WEATHER_AGENT_LLM", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "0")
+
+ROUTES: Dict[str, Tuple[str, str, Optional[Callable[[int], dict]]]] = {
+    "health": ("GET", "/health", None),
+    "echo": ("POST", "/echo", lambda i: {"message": f"hello {i}"}),
+    "weather_chat": (
+        "POST",
+        "/weather/chat",
+        lambda i: {"message": "What's the weather in Paris?", "session_id": f"bench-{i}"},
+    ),
+}
+
+
+@dataclass
+class RouteResult:
+    route: str
+    requests: int
+    requests_per_sec: float
+    p50_us: float
+    peak_kib_per_request: float
+    gen0_collections_per_1k: float
+
+
+async def call(app, method: str, path: str, payload: Optional[dict]) -> int:
+    """Send one request through the ASGI app and return the status code."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+    }
+    received = False
+    status = 0
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.sleep(3600)  # no disconnect while the response is sent
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def call_ok(app, method: str, path: str, payload: Optional[dict]) -> None:
+    """`call`, failing the benchmark on any non-200 (e.g. a 429/503 rejection), which would skew the numbers."""
+    status = await call(app, method, path, payload)
+    if status != 200:
+        raise RuntimeError(f"{method} {path} returned {status}")
+
+
+async def bench_route(app, name: str, requests: int, warmup: int) -> RouteResult:
+    method, path, make_payload = ROUTES[name]
+    payload = (lambda i: make_payload(i)) if make_payload else (lambda i: None)
+    for i in range(warmup):
+        await call_ok(app, method, path, payload(i))
+
+    latencies: List[float] = []
+    gen0_before = gc.get_stats()[0]["collections"]
+    start = time.perf_counter()
+    for i in range(requests):
+        t0 = time.perf_counter()
+        await call_ok(app, method, path, payload(i))
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    gen0 = gc.get_stats()[0]["collections"] - gen0_before
+
+    # Allocation pass, separate from timing: tracemalloc slows everything down.
+    samples = min(requests, 200)
+    peaks: List[int] = []
+    tracemalloc.start()
+    for i in range(samples):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        await call_ok(app, method, path, payload(i))
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    return RouteResult(
+        route=name,
+        requests=requests,
+        requests_per_sec=requests / elapsed,
+        p50_us=statistics.median(latencies) * 1e6,
+        peak_kib_per_request=statistics.median(peaks) / 1024,
+        gen0_collections_per_1k=gen0 * 1000 / requests,
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="In-process benchmark of the day_5 API routes")
+    parser.add_argument("--route", choices=sorted(ROUTES), action="append", help="Repeatable; default: all.")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--json", type=Path, default=None, help="Write results to this JSON file.")
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace) -> List[RouteResult]:
+    from main import app
+
+    results = []
+    for name in args.route or list(ROUTES):
+        requests = args.requests if name != "weather_chat" else max(1, args.requests // 10)
+        results.append(await bench_route(app, name, requests, args.warmup))
+    return results
+
+
+def main() -> None:
+    args = parse_args()
+    results = asyncio.run(run(args))
+    print(f"{'route':<14} {'requests':>8} {'req/s':>9} {'p50 us':>9} {'peak KiB/req':>13} {'gen0 gc/1k':>11}")
+    for r in results:
+        print(
+            f"{r.route:<14} {r.requests:>8} {r.requests_per_sec:>9.0f} {r.p50_us:>9.0f} "
+            f"{r.peak_kib_per_request:>13.1f} {r.gen0_collections_per_1k:>11.1f}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps([asdict(r) for r in results], indent=2))
+
+
+if __name__ == "__main__":
+    main()
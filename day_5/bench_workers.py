@@ -0,0 +1,227 @@
+"""Throughput scaling benchmark for the multi-worker serving mode.
+
+Starts `main.py --workers N` for each worker count with the offline fake LLM
+(`WEATHER_AGENT_LLM=fake`, CPU-bound latency so one process saturates) and a
+throwaway SQLite session database, then drives multi-turn conversations from
+concurrent clients. Every reply carries the turn number the model saw, so a
+lost or mixed-up history shows up as a continuity error even though requests
+of one conversation land on different workers. After the load, a burst of
+chats is sent and the server is stopped mid-burst to check that in-flight
+requests are drained rather than dropped.
+
+    python bench_workers.py
+    python bench_workers.py --workers 1 2 4 8 --sessions 64 --turns 5
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+HERE = Path(__file__).resolve().parent
+CITIES = ["Paris", "London", "Tokyo", "Dubai", "New York"]
+
+
+@dataclass
+class WorkerResult:
+    workers: int
+    requests: int
+    seconds: float
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    errors: int
+    continuity_errors: int
+    drained: int
+    dropped: int
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def post_chat(port: int, session_id: str, message: str, timeout: float = 60.0) -> Tuple[int, str]:
+    body = json.dumps({"message": message, "session_id": session_id}).encode()
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/weather/chat",
+        data=body,
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read())["response"]
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.read().decode(errors="replace")
+    except OSError as exc:
+        return 0, str(exc)
+
+
+def wait_until_healthy(port: int, proc: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited with code {proc.returncode} during startup.")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("Server did not become healthy in time.")
+
+
+def start_server(workers: int, port: int, db_path: Path, args: argparse.Namespace) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update(
+        WEATHER_AGENT_LLM="fake",
+        FAKE_LLM_MODE=args.llm_mode,
+        FAKE_LLM_LATENCY_MS=str(args.llm_latency_ms),
+        SESSION_BACKEND="sqlite",
+        SESSION_DB_PATH=str(db_path),
+    )
+    env.pop("GEMINI_API_KEY", None)
+    proc = subprocess.Popen(
+        [sys.executable, "main.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+        cwd=HERE,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    wait_until_healthy(port, proc)
+    return proc
+
+
+def run_conversation(port: int, session_id: str, turns: int, latencies: List[float]) -> Tuple[int, int]:
+    """Play one conversation turn by turn; return (errors, continuity errors)."""
+    errors = continuity_errors = 0
+    for turn in range(1, turns + 1):
+        city = CITIES[(hash(session_id) + turn) % len(CITIES)]
+        start = time.perf_counter()
+        status, text = post_chat(port, session_id, f"What's the weather in {city}?")
+        latencies.append((time.perf_counter() - start) * 1000)
+        if status != 200:
+            errors += 1
+        elif not text.startswith(f"[turn {turn}]"):
+            continuity_errors += 1
+    return errors, continuity_errors
+
+
+def check_drain(port: int, proc: subprocess.Popen, burst: int, delay: float) -> Tuple[int, int]:
+    """Stop the server while `burst` chats are in flight; return (completed, dropped)."""
+    with ThreadPoolExecutor(max_workers=burst) as pool:
+        futures = [pool.submit(post_chat, port, f"drain-{i}", "Weather in Paris?") for i in range(burst)]
+        time.sleep(delay)
+        proc.send_signal(signal.SIGINT)
+        statuses = [future.result()[0] for future in futures]
+    proc.wait(timeout=60)
+    completed = sum(status == 200 for status in statuses)
+    return completed, burst - completed
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def bench_workers(workers: int, args: argparse.Namespace, tmp_dir: Path) -> WorkerResult:
+    port = free_port()
+    proc = start_server(workers, port, tmp_dir / f"sessions-{workers}.sqlite3", args)
+    try:
+        # Warm every worker (agent construction happens on first request).
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(lambda i: post_chat(port, f"warmup-{i}", "hello"), range(workers * 4)))
+
+        latencies: List[float] = []
+        lock = threading.Lock()
+        totals = [0, 0]
+
+        def worker(index: int) -> None:
+            local: List[float] = []
+            errors, continuity = run_conversation(port, f"s{workers}-{index}", args.turns, local)
+            with lock:
+                latencies.extend(local)
+                totals[0] += errors
+                totals[1] += continuity
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(worker, range(args.sessions)))
+        seconds = time.perf_counter() - start
+
+        drained, dropped = check_drain(port, proc, args.drain_burst, args.llm_latency_ms / 1000)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+    return WorkerResult(
+        workers=workers,
+        requests=len(latencies),
+        seconds=seconds,
+        throughput=len(latencies) / seconds,
+        p50_ms=percentile(latencies, 50),
+        p95_ms=percentile(latencies, 95),
+        errors=totals[0],
+        continuity_errors=totals[1],
+        drained=drained,
+        dropped=dropped,
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark day_5 API throughput by worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--sessions", type=int, default=32, help="Concurrent conversations.")
+    parser.add_argument("--turns", type=int, default=4, help="Turns per conversation.")
+    parser.add_argument("--concurrency", type=int, default=32, help="Client threads.")
+    parser.add_argument("--llm-latency-ms", type=float, default=20.0)
+    parser.add_argument(
+        "--llm-mode",
+        choices=["cpu", "sleep"],
+        default="cpu",
+        help="'cpu' holds the worker's GIL like real request processing; 'sleep' mimics remote I/O.",
+    )
+    parser.add_argument("--drain-burst", type=int, default=8, help="Chats in flight when the server is stopped.")
+    parser.add_argument("--json", type=Path, default=None, help="Write results to this JSON file.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    results: List[WorkerResult] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            results.append(bench_workers(workers, args, Path(tmp)))
+
+    baseline: Optional[float] = results[0].throughput / results[0].workers if results else None
+    print(f"CPU cores: {os.cpu_count()} (scaling beyond the core count is not expected in cpu mode)")
+    print(
+        f"{'workers':>7} {'req':>6} {'req/s':>8} {'scaling':>8} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'errors':>6} {'history':>7} {'drained':>8}"
+    )
+    for result in results:
+        efficiency = result.throughput / (baseline * result.workers) if baseline else 0.0
+        print(
+            f"{result.workers:>7} {result.requests:>6} {result.throughput:>8.1f} {efficiency:>7.0%} "
+            f"{result.p50_ms:>8.1f} {result.p95_ms:>8.1f} {result.errors:>6} {result.continuity_errors:>7} "
+            f"{result.drained:>4}/{result.drained + result.dropped:<3}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps([asdict(r) for r in results], indent=2))
+
+
+if __name__ == "__main__":
+    main()
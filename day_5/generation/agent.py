@@ -1,29 +1,111 @@
-"""Weather agent implementation using LangChain."""
+"""Weather agent implementation using LangChain.
 
+The LLM and the agent graph are built on first use rather than at import time,
+so workers boot quickly and the module can be imported without an API key.
+`set_llm_factory` swaps in a different chat model (e.g. a fake for tests).
+
+Conversation history is loaded and saved around each agent run. Concurrent
+async turns with the same normalized message and the same history (typically
+identical first questions under burst traffic) share a single agent run, and
+each caller appends the resulting messages, led by its own message text, to its
+own session.
+
+Tool calls the model emits in one turn run concurrently (one LangGraph task
+each), and every run is capped by a step and latency budget
+(`generation.budget`).
+"""
+
+import hashlib
+import json
 import os
-from typing import List, Dict, Any, Union
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Dict, Any, Optional, Union
 from dotenv import load_dotenv
 
-from langchain.agents import create_agent
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.tools import tool
-from langchain_core.messages import HumanMessage, BaseMessage
-from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain_core.chat_history import InMemoryChatMessageHistory
+from langchain_core.tools import tool
+from langchain_core.messages import AIMessage, HumanMessage, BaseMessage, ToolMessage
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.language_models import BaseChatModel
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root, for `common`
+
+from common.context_cache import maybe_cache_prefix
+from common.gemini_client import gemini_api_key, get_chat_model
+from common.single_flight import SingleFlight, normalize_text
+from common.tracing import TracingCallbackHandler, get_tracer
+from generation.session_store import SessionStore
+from generation.weather import (
+    DEFAULT_CONDITIONS,
+    CityIndex,
+    FixtureWeatherProvider,
+    TTLCachedWeatherProvider,
+    WeatherProvider,
+    normalize_city,
+)
 
 # Load environment variables
 load_dotenv()
 
-API_KEY = os.getenv("GEMINI_API_KEY")
-if not API_KEY:
-    raise RuntimeError("Please set GEMINI_API_KEY in your .env file.")
 
-# Initialize LLM
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    google_api_key=API_KEY,
-    temperature=0.3,
-)
+def build_llm() -> BaseChatModel:
+    """The shared Gemini chat model used by the agent (see `common.gemini_client`)."""
+    api_key = gemini_api_key()
+    if not api_key:
+        raise RuntimeError("Please set GEMINI_API_KEY in your .env file.")
+    return get_chat_model("gemini-2.5-flash", api_key=api_key, temperature=0.3)
+
+
+def _default_llm_factory() -> BaseChatModel:
+    """Gemini, or the offline fake when WEATHER_AGENT_LLM=fake (benchmarks, load tests).
+
+    With GEMINI_CONTEXT_CACHE=1 the system prompt and tool schemas are served
+    from a Gemini context cache when they are large enough to be cached.
+    """
+    if os.getenv("WEATHER_AGENT_LLM") == "fake":
+        from generation.fakes import FakeWeatherChatModel
+
+        return FakeWeatherChatModel.from_env()
+    return maybe_cache_prefix(build_llm())
+
+
+_llm_factory: Callable[[], BaseChatModel] = _default_llm_factory
+
+
+def set_llm_factory(factory: Optional[Callable[[], BaseChatModel]]) -> None:
+    """Use `factory` to build the agent's LLM (None restores Gemini) and drop the cached agent."""
+    global _llm_factory, _agent_instance
+    _llm_factory = factory or _default_llm_factory
+    _agent_instance = None
+
+
+# Weather data source; swap with set_weather_provider() to use a real API.
+_weather_provider: WeatherProvider = TTLCachedWeatherProvider(FixtureWeatherProvider())
+_city_index: Optional[CityIndex] = None
+
+# Resolve the cities a question names before calling the agent (WEATHER_FAST_PATH=0 disables).
+FAST_PATH_ENABLED = os.getenv("WEATHER_FAST_PATH", "1") != "0"
+
+
+def set_weather_provider(provider: WeatherProvider) -> None:
+    """Replace the weather data source used by `check_weather` and the fast path."""
+    global _weather_provider, _city_index
+    _weather_provider = provider
+    _city_index = None
+
+
+def get_city_index() -> CityIndex:
+    global _city_index
+    if _city_index is None:
+        _city_index = CityIndex(_weather_provider.known_cities())
+    return _city_index
+
+
+def describe_weather(location: str) -> str:
+    conditions = _weather_provider.lookup(normalize_city(location))
+    return f"Weather in {location}: " + (conditions or DEFAULT_CONDITIONS)
 
 
 @tool
@@ -32,53 +114,81 @@ def check_weather(location: str) -> str:
     Return a simplified, hardcoded weather description for a specific city.
     The location must be a single city name (e.g., 'Paris', 'New York').
     """
-    weather_data = {
-        "paris": "Cloudy, 12°C, light rain expected",
-        "new york": "Sunny, 18°C, clear skies",
-        "london": "Rainy, 8°C, heavy rain",
-        "dubai": "Hot and sunny, 35°C, no rain",
-        "tokyo": "Cool, 15°C, partly cloudy",
-    }
-    
-    city = location.strip().lower()
-    return f"Weather in {location}: " + weather_data.get(
-        city,
-        "Mild, 15-20°C, partly cloudy"
-    )
+    return describe_weather(location)
 
 
-# Session store for agent memory
-SESSION_STORE: Dict[str, InMemoryChatMessageHistory] = {}
+def _lookup_all(locations: List[str]) -> List[str]:
+    """`describe_weather` for each location, concurrently when there are several."""
+    if len(locations) == 1:
+        return [describe_weather(locations[0])]
+    with ThreadPoolExecutor(max_workers=len(locations)) as pool:
+        return list(pool.map(describe_weather, locations))
 
 
-def get_session_history(session_id: str) -> InMemoryChatMessageHistory:
-    """Retrieves or creates an InMemoryChatMessageHistory object for a given session ID."""
-    if session_id not in SESSION_STORE:
-        SESSION_STORE[session_id] = InMemoryChatMessageHistory()
-    return SESSION_STORE[session_id]
+def build_turn_messages(message: str) -> List[BaseMessage]:
+    """Messages sent to the agent for one user turn.
+
+    When the message names known cities, the `check_weather` calls the model
+    would make are performed up front (concurrently) and appended as one
+    completed parallel tool call, so the model can answer in a single round trip.
+    """
+    human = HumanMessage(content=message)
+    if not FAST_PATH_ENABLED:
+        return [human]
+    cities = get_city_index().find(message)
+    if not cities:
+        return [human]
+
+    locations = [city.title() for city in cities]
+    call_ids = [f"call_{uuid.uuid4().hex}" for _ in locations]
+    with get_tracer().span("tool", "check_weather_prefetch", cities=len(locations)):
+        observations = _lookup_all(locations)
+    tool_calls = [
+        {"name": check_weather.name, "args": {"location": location}, "id": call_id}
+        for location, call_id in zip(locations, call_ids)
+    ]
+    return [
+        human,
+        AIMessage(content="", tool_calls=tool_calls),
+        *(
+            ToolMessage(content=observation, tool_call_id=call_id, name=check_weather.name)
+            for observation, call_id in zip(observations, call_ids)
+        ),
+    ]
+
+
+# Session store for agent memory (SESSION_BACKEND=sqlite shares it across worker processes)
+SESSION_STORE = SessionStore.from_env()
+
+# Share one agent run between identical concurrent turns (WEATHER_COALESCE=0 disables).
+COALESCE_ENABLED = os.getenv("WEATHER_COALESCE", "1") != "0"
+_turn_flight: SingleFlight[List[BaseMessage]] = SingleFlight()
+
+
+def get_session_history(session_id: str) -> BaseChatMessageHistory:
+    """Retrieves or creates the chat message history for a given session ID."""
+    return SESSION_STORE.get(session_id)
 
 
 def _create_agent():
     """Create and configure the weather agent."""
-    agent_executor = create_agent(
-        model=llm,
+    from langchain.agents import create_agent
+
+    from generation.budget import TurnBudgetMiddleware
+
+    return create_agent(
+        model=_llm_factory(),
         tools=[check_weather],
+        middleware=[TurnBudgetMiddleware.from_env()],
         system_prompt=(
             "you are a helpful assistant that provides weather information and clothing suggestions. "
             "suggest appropriate clothing based on the weather conditions you provide. "
             "ask if the user has any specific preferences or needs. "
             "if the user has any specific preferences, take them into account when suggesting clothing. "
-            "always provide both the weather information and clothing suggestions in your responses."
+            "always provide both the weather information and clothing suggestions in your responses. "
+            "when the user asks about several cities, call check_weather for all of them at once, in a single turn."
         ),
     )
-    
-    agent_with_memory = RunnableWithMessageHistory(
-        agent_executor,
-        get_session_history,
-        input_messages_key="messages",
-    )
-    
-    return agent_with_memory
 
 
 # Singleton agent instance
@@ -109,6 +219,33 @@ def extract_clean_text(result: dict) -> str:
     return str(final_message_content)
 
 
+def turn_key(message: str, history: List[BaseMessage]) -> str:
+    """Coalescing key: the normalized message plus a digest of the history it answers."""
+    digest = hashlib.sha256(
+        json.dumps([(m.type, m.content) for m in history], default=str).encode("utf-8")
+    ).hexdigest()
+    return f"{normalize_text(message)}|{digest}"
+
+
+def _agent_config() -> dict:
+    return {"callbacks": [TracingCallbackHandler(get_tracer())]}
+
+
+def _run_turn(history: List[BaseMessage], message: str) -> List[BaseMessage]:
+    """Run the agent on `history` plus the new message; return this turn's messages."""
+    result = get_weather_agent().invoke(
+        {"messages": [*history, *build_turn_messages(message)]}, config=_agent_config()
+    )
+    return result["messages"][len(history):]
+
+
+async def _arun_turn(history: List[BaseMessage], message: str) -> List[BaseMessage]:
+    result = await get_weather_agent().ainvoke(
+        {"messages": [*history, *build_turn_messages(message)]}, config=_agent_config()
+    )
+    return result["messages"][len(history):]
+
+
 def chat_with_agent(message: str, session_id: str) -> str:
     """
     Chat with the weather agent.
@@ -120,10 +257,42 @@ def chat_with_agent(message: str, session_id: str) -> str:
     Returns:
         Agent's response as a string
     """
-    agent = get_weather_agent()
-    input_message = {"messages": [HumanMessage(content=message)]}
-    config = {"configurable": {"session_id": session_id}}
-    
-    result = agent.invoke(input_message, config=config)
-    return extract_clean_text(result)
+    tracer = get_tracer()
+    session_history = get_session_history(session_id)
+    with tracer.trace("weather_chat", session_id=session_id):
+        with tracer.span("history", "load"):
+            history = session_history.messages
+        new_messages = _run_turn(history, message)
+        with tracer.span("history", "save"):
+            session_history.add_messages(new_messages)
+    return extract_clean_text({"messages": new_messages})
+
+
+def with_own_message(new_messages: List[BaseMessage], message: str) -> List[BaseMessage]:
+    """A shared turn's messages with the leading user message replaced by this caller's `message`.
+
+    Coalesced callers' messages match only after normalization, so each session
+    must record the text its own user sent.
+    """
+    if new_messages and isinstance(new_messages[0], HumanMessage) and new_messages[0].content != message:
+        return [new_messages[0].model_copy(update={"content": message}), *new_messages[1:]]
+    return new_messages
+
 
+async def achat_with_agent(message: str, session_id: str) -> str:
+    """Async `chat_with_agent`; identical concurrent turns share one agent run."""
+    tracer = get_tracer()
+    session_history = get_session_history(session_id)
+    with tracer.trace("weather_chat", session_id=session_id):
+        with tracer.span("history", "load"):
+            history = await session_history.aget_messages()
+        if COALESCE_ENABLED:
+            new_messages = with_own_message(
+                await _turn_flight.do(turn_key(message, history), lambda: _arun_turn(history, message)),
+                message,
+            )
+        else:
+            new_messages = await _arun_turn(history, message)
+        with tracer.span("history", "save"):
+            await session_history.aadd_messages(new_messages)
+    return extract_clean_text({"messages": new_messages})
@@ -0,0 +1,79 @@
+"""Concurrent execution of many weather chat turns.
+
+Items run concurrently up to `max_concurrency`, except that turns of the same
+session run one after another in submission order (each turn needs the
+history written by the previous one). Each agent run also holds a context
+from the optional `slot` factory; the API passes an agent admission slot, so
+batches share its agent concurrency limit instead of adding to it. Results are
+yielded as soon as each item finishes, so one slow conversation does not hold back the others.
+
+    batch = ChatBatch(max_concurrency=16)
+    await batch.feed(items)          # each item starts as soon as it is received
+    async for result in batch.results():
+        ...
+"""
+
+import asyncio
+from contextlib import nullcontext
+from typing import AsyncContextManager, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+
+from generation.agent import achat_with_agent
+from schemas.models import WeatherChatBatchResult, WeatherChatRequest
+
+# An input item, or the validation error message for an unparseable one.
+BatchItem = Tuple[int, Union[WeatherChatRequest, str]]
+
+
+class ChatBatch:
+    """Runs chat turns with a concurrency cap and per-session ordering."""
+
+    def __init__(self, max_concurrency: int = 16, slot: Optional[Callable[[], AsyncContextManager]] = None):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._slot = slot or nullcontext
+        self._results: "asyncio.Queue[WeatherChatBatchResult]" = asyncio.Queue()
+        self._last_turn: Dict[str, asyncio.Task] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.submitted = 0
+
+    async def _run(self, index: int, item: WeatherChatRequest, previous: Optional[asyncio.Task]) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        async with self._semaphore, self._slot():
+            try:
+                response = await achat_with_agent(item.message, item.session_id)
+                result = WeatherChatBatchResult(index=index, session_id=item.session_id, response=response)
+            except Exception as exc:
+                result = WeatherChatBatchResult(index=index, session_id=item.session_id, error=str(exc))
+        self._results.put_nowait(result)
+
+    def submit(self, index: int, item: Union[WeatherChatRequest, str]) -> None:
+        """Start one item (or report its validation error) without waiting for it."""
+        self.submitted += 1
+        if isinstance(item, str):
+            self._results.put_nowait(WeatherChatBatchResult(index=index, error=item))
+            return
+        task = asyncio.create_task(self._run(index, item, self._last_turn.get(item.session_id)))
+        self._last_turn[item.session_id] = task
+        self._tasks.append(task)
+
+    async def feed(self, items: AsyncIterator[BatchItem]) -> None:
+        """Submit every item of `items`; returns once the input is exhausted."""
+        try:
+            async for index, item in items:
+                self.submit(index, item)
+        except BaseException:
+            self.cancel()
+            raise
+
+    async def results(self) -> AsyncIterator[WeatherChatBatchResult]:
+        """Yield every submitted item's result in completion order."""
+        try:
+            for _ in range(self.submitted):
+                yield await self._results.get()
+        finally:
+            # Stops outstanding work if the consumer went away early.
+            self.cancel()
+
+    def cancel(self) -> None:
+        for task in self._tasks:
+            task.cancel()
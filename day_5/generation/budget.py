@@ -0,0 +1,91 @@
+"""Step and latency budget for one weather agent run.
+
+`TurnBudgetMiddleware` counts model calls and wall time from the first model
+call of a run. Once either limit is reached it skips the next model call and
+ends the run with a partial answer built from the tool results gathered so
+far, instead of looping until LangGraph's recursion limit. The check happens
+before each model call, after the tools of the previous step have answered,
+so the saved history always pairs every tool call with its result.
+
+Limits come from AGENT_MAX_STEPS (model calls per turn, default 6) and
+AGENT_MAX_SECONDS (default 30).
+"""
+
+import os
+import time
+from typing import Annotated, Any, Dict, List, Optional
+
+from langchain.agents.middleware import AgentMiddleware, AgentState, hook_config
+from langchain.agents.middleware.types import PrivateStateAttr
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langgraph.channels.untracked_value import UntrackedValue
+from typing_extensions import NotRequired
+
+from common.tracing import get_tracer
+
+
+class TurnBudgetState(AgentState):
+    budget_started_at: NotRequired[Annotated[float, UntrackedValue, PrivateStateAttr]]
+    budget_model_calls: NotRequired[Annotated[int, UntrackedValue, PrivateStateAttr]]
+
+
+def partial_answer(messages: List[BaseMessage], reason: str) -> str:
+    """What can be said from the tool results since the last user message."""
+    observations: List[str] = []
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            break
+        if isinstance(message, ToolMessage):
+            observations.append(str(message.content))
+    text = f"I could not finish this answer within the {reason} budget."
+    if not observations:
+        return text + " Please try again, or ask about fewer cities at once."
+    return text + " Here is what I found so far:\n" + "\n".join(reversed(observations))
+
+
+class TurnBudgetMiddleware(AgentMiddleware):
+    """Ends an agent run gracefully after `max_steps` model calls or `max_seconds`."""
+
+    state_schema = TurnBudgetState
+
+    def __init__(self, max_steps: int = 6, max_seconds: float = 30.0):
+        super().__init__()
+        if max_steps < 1:
+            raise ValueError("max_steps must be at least 1")
+        self.max_steps = max_steps
+        self.max_seconds = max_seconds
+
+    @classmethod
+    def from_env(cls) -> "TurnBudgetMiddleware":
+        return cls(
+            max_steps=int(os.getenv("AGENT_MAX_STEPS", "6")),
+            max_seconds=float(os.getenv("AGENT_MAX_SECONDS", "30")),
+        )
+
+    def _exhausted(self, state: TurnBudgetState) -> Optional[str]:
+        if state.get("budget_model_calls", 0) >= self.max_steps:
+            return "step"
+        if time.monotonic() - state["budget_started_at"] >= self.max_seconds:
+            return "time"
+        return None
+
+    @hook_config(can_jump_to=["end"])
+    def before_model(self, state: TurnBudgetState, runtime: Any) -> Optional[Dict[str, Any]]:
+        if "budget_started_at" not in state:
+            return {"budget_started_at": time.monotonic()}
+        reason = self._exhausted(state)
+        if reason is None:
+            return None
+        elapsed_ms = (time.monotonic() - state["budget_started_at"]) * 1000
+        get_tracer().observe("agent", "budget_exhausted", elapsed_ms, reason=reason)
+        return {"jump_to": "end", "messages": [AIMessage(content=partial_answer(state["messages"], reason))]}
+
+    @hook_config(can_jump_to=["end"])
+    async def abefore_model(self, state: TurnBudgetState, runtime: Any) -> Optional[Dict[str, Any]]:
+        return self.before_model(state, runtime)
+
+    def after_model(self, state: TurnBudgetState, runtime: Any) -> Dict[str, Any]:
+        return {"budget_model_calls": state.get("budget_model_calls", 0) + 1}
+
+    async def aafter_model(self, state: TurnBudgetState, runtime: Any) -> Dict[str, Any]:
+        return self.after_model(state, runtime)
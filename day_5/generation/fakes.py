@@ -0,0 +1,126 @@
+"""Offline chat model for load tests and benchmarks.
+
+`FakeWeatherChatModel` never calls a network API. It waits for a configurable
+latency, either sleeping (like a remote model) or burning CPU (to expose
+worker saturation), and answers with the number of user turns it can see so a
+benchmark can check that conversation history survived across requests.
+Enable it in the API with `WEATHER_AGENT_LLM=fake`.
+
+`ScriptedToolCallingModel` plays the agent's tool-calling side: it asks for
+`check_weather` on every city of the question that has no result yet, either
+all in one turn ("parallel") or one per turn ("sequential"), then answers with
+the results. Benchmarks use it to compare agent loop shapes.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from typing import Any, List, Literal, Optional, Set
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from generation.weather import WEATHER_FIXTURES, CityIndex
+
+
+class FakeWeatherChatModel(BaseChatModel):
+    """Deterministic stand-in for Gemini.
+
+    Replies look like `[turn 3] Weather in Paris: ...`, where the turn number
+    counts the human messages in the prompt (history included).
+    """
+
+    latency: float = 0.05
+    mode: str = "sleep"  # "sleep" or "cpu"
+
+    @classmethod
+    def from_env(cls) -> "FakeWeatherChatModel":
+        """Configure from FAKE_LLM_LATENCY_MS and FAKE_LLM_MODE."""
+        return cls(
+            latency=float(os.getenv("FAKE_LLM_LATENCY_MS", "50")) / 1000,
+            mode=os.getenv("FAKE_LLM_MODE", "sleep"),
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-weather"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeWeatherChatModel":
+        return self
+
+    def _reply(self, messages: List[BaseMessage]) -> ChatResult:
+        turn = sum(isinstance(m, HumanMessage) for m in messages)
+        observation = messages[-1].content if isinstance(messages[-1], ToolMessage) else None
+        text = f"[turn {turn}] " + (observation or "Which city would you like the weather for?")
+        message = AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": sum(len(str(m.content).split()) for m in messages),
+                "output_tokens": len(text.split()),
+                "total_tokens": sum(len(str(m.content).split()) for m in messages) + len(text.split()),
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _busy_wait(self) -> None:
+        deadline = time.perf_counter() + self.latency
+        while time.perf_counter() < deadline:
+            pass
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.mode == "cpu":
+            self._busy_wait()
+        else:
+            time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.mode == "cpu":
+            self._busy_wait()
+        else:
+            await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+
+class ScriptedToolCallingModel(FakeWeatherChatModel):
+    """Calls `check_weather` for each city of the last user message, then summarizes."""
+
+    tool_calls: Literal["parallel", "sequential"] = "parallel"
+
+    def _reply(self, messages: List[BaseMessage]) -> ChatResult:
+        last_human = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+        requested: Set[str] = set()
+        observations: List[str] = []
+        for message in messages[last_human + 1:]:
+            if isinstance(message, AIMessage):
+                requested.update(call["args"]["location"].lower() for call in message.tool_calls)
+            elif isinstance(message, ToolMessage):
+                observations.append(str(message.content))
+        cities = CityIndex(WEATHER_FIXTURES).find(str(messages[last_human].content))
+        pending = [city for city in cities if city not in requested]
+        if not pending:
+            turn = sum(isinstance(m, HumanMessage) for m in messages)
+            text = f"[turn {turn}] " + ("; ".join(observations) or "Which city would you like the weather for?")
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+        if self.tool_calls == "sequential":
+            pending = pending[:1]
+        calls = [
+            {"name": "check_weather", "args": {"location": city.title()}, "id": f"call_{uuid.uuid4().hex}"}
+            for city in pending
+        ]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="", tool_calls=calls))])
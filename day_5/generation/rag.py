@@ -0,0 +1,223 @@
+"""Retrieval-augmented answers over a day_4 collection, for the `/rag` routes.
+
+The day_4 CLIs build the embeddings, vector store and LLM on every launch.
+Here they are built once per worker process from the same `rag_pipeline`
+factories and shared by every request. `startup()` runs in the app's lifespan
+hook: it builds `RagResources` and warms them, so the first request does not
+pay for client construction, connection setup or index loading:
+
+- a dummy query goes through the retriever, which embeds it (opening the
+  embedding connection pool) and searches the store (loading the index, or
+  opening the pgvector connection pool);
+- a dummy question is answered without context, which opens the async
+  connection pool the LLM streams on and builds the request and response
+  types google-genai otherwise builds lazily on the first call (tens of ms).
+  This costs one short LLM call per worker start.
+
+Configured from the environment:
+
+- RAG_COLLECTION: collection to answer from; unset disables the routes (503)
+- RAG_STORE: `chroma` (default) or `pgvector`
+- RAG_PERSIST_DIR: Chroma persist directory (default day_4/chroma_store)
+- RAG_K: passages retrieved per question (default 4)
+- RAG_WARMUP: 0 builds the resources on the first request instead (cold start)
+- RAG_SHARD_PROCESSES: 1 serves each shard of a sharded collection from its
+  own process (default: a thread each, in the worker)
+
+`get_ingest_jobs()` is the worker's `ingest_jobs.IngestJobManager`, which
+runs ingestion jobs on a process pool of INGEST_WORKERS processes (default 1)
+at CPU priority INGEST_NICE (default 10).
+"""
+
+import asyncio
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from common.tracing import get_tracer
+
+if TYPE_CHECKING:
+    from ingest_jobs import IngestJobManager
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import Embeddings
+    from langchain_core.retrievers import BaseRetriever
+    from langchain_core.runnables import Runnable
+    from langchain_core.vectorstores import VectorStore
+
+DAY_4_DIR = Path(__file__).resolve().parents[2] / "day_4"
+WARMUP_QUERY = "warmup"
+
+
+class RagNotConfigured(RuntimeError):
+    """RAG_COLLECTION is not set."""
+
+
+@dataclass
+class RagSettings:
+    collection: str
+    store: str = "chroma"
+    persist_dir: Optional[Path] = None
+    k: int = 4
+    warmup: bool = True
+    shard_processes: bool = False
+
+    @classmethod
+    def from_env(cls) -> Optional["RagSettings"]:
+        collection = os.getenv("RAG_COLLECTION")
+        if not collection:
+            return None
+        persist_dir = os.getenv("RAG_PERSIST_DIR")
+        return cls(
+            collection=collection,
+            store=os.getenv("RAG_STORE", "chroma"),
+            persist_dir=Path(persist_dir) if persist_dir else None,
+            k=int(os.getenv("RAG_K", "4")),
+            warmup=os.getenv("RAG_WARMUP", "1") != "0",
+            shard_processes=os.getenv("RAG_SHARD_PROCESSES", "0") == "1",
+        )
+
+
+def _add_day_4_to_path() -> None:
+    # day_4 modules import each other by bare name; appended so they never shadow day_5 modules.
+    if str(DAY_4_DIR) not in sys.path:
+        sys.path.append(str(DAY_4_DIR))
+
+
+def source_list(documents: List["Document"]) -> List[Dict[str, Any]]:
+    """File name and page of each retrieved passage, in rank order."""
+    return [
+        {"source": Path(str(doc.metadata.get("source", "?"))).name, "page": doc.metadata.get("page")}
+        for doc in documents
+    ]
+
+
+@dataclass
+class RagResources:
+    """Everything a RAG request needs, built once and shared."""
+
+    settings: RagSettings
+    embeddings: "Embeddings"
+    vector_store: "VectorStore"
+    retriever: "BaseRetriever"
+    chain: "Runnable"  # {"context", "question"} -> answer text
+    warm_ms: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, settings: RagSettings) -> "RagResources":
+        _add_day_4_to_path()
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.prompts import ChatPromptTemplate
+
+        from common.context_cache import maybe_cache_prefix
+        from rag_chatbot import RAG_QUESTION_PROMPT, RAG_SYSTEM_PROMPT
+        from rag_pipeline import build_embeddings, build_llm, build_vector_store
+        from retrieval import build_retriever
+
+        with get_tracer().span("rag", "build", store=settings.store):
+            embeddings = build_embeddings()
+            vector_store = build_vector_store(
+                settings.store,
+                settings.collection,
+                embeddings,
+                settings.persist_dir,
+                shard_processes=settings.shard_processes,
+            )
+            prompt = ChatPromptTemplate.from_messages(
+                [("system", RAG_SYSTEM_PROMPT), ("human", RAG_QUESTION_PROMPT)]
+            )
+            chain = prompt | maybe_cache_prefix(build_llm()) | StrOutputParser()
+        return cls(
+            settings=settings,
+            embeddings=embeddings,
+            vector_store=vector_store,
+            retriever=build_retriever(vector_store, k=settings.k),
+            chain=chain,
+        )
+
+    async def warm(self) -> Dict[str, float]:
+        """Open the connection pools and load the index; returns milliseconds per step."""
+        steps = (
+            ("search", lambda: self.retriever.ainvoke(WARMUP_QUERY)),
+            ("generation", lambda: self.chain.ainvoke({"context": "", "question": WARMUP_QUERY})),
+        )
+        for name, step in steps:
+            start = time.perf_counter()
+            await step()
+            self.warm_ms[name] = (time.perf_counter() - start) * 1000
+            get_tracer().observe("rag", f"warm_{name}", self.warm_ms[name])
+        return self.warm_ms
+
+    async def retrieve(self, question: str) -> List["Document"]:
+        return await self.retriever.ainvoke(question)
+
+    def _inputs(self, question: str, documents: List["Document"]) -> Dict[str, str]:
+        from rag_pipeline import format_documents
+
+        return {"context": format_documents(documents), "question": question}
+
+    async def answer(self, question: str) -> Tuple[str, List["Document"]]:
+        documents = await self.retrieve(question)
+        return await self.chain.ainvoke(self._inputs(question, documents)), documents
+
+    def astream(self, question: str, documents: List["Document"]) -> AsyncIterator[str]:
+        """Answer text chunks for `question` grounded in already retrieved `documents`."""
+        return self.chain.astream(self._inputs(question, documents))
+
+
+_resources: Optional[RagResources] = None
+_lock = asyncio.Lock()
+_ingest_jobs: Optional["IngestJobManager"] = None
+
+
+async def get_rag_resources() -> RagResources:
+    """The shared resources, built on first use if the lifespan hook did not build them."""
+    global _resources
+    if _resources is None:
+        settings = RagSettings.from_env()
+        if settings is None:
+            raise RagNotConfigured("RAG is not configured: set RAG_COLLECTION to a day_4 collection.")
+        async with _lock:
+            if _resources is None:
+                _resources = await asyncio.to_thread(RagResources.build, settings)
+    return _resources
+
+
+async def startup() -> Optional[RagResources]:
+    """Build and warm the resources (lifespan hook); a no-op without RAG_COLLECTION or with RAG_WARMUP=0."""
+    settings = RagSettings.from_env()
+    if settings is None or not settings.warmup:
+        return None
+    resources = await get_rag_resources()
+    await resources.warm()
+    return resources
+
+
+def get_ingest_jobs() -> "IngestJobManager":
+    """The shared ingestion job queue; its worker processes start with the first job."""
+    global _ingest_jobs
+    if _ingest_jobs is None:
+        _add_day_4_to_path()
+        from ingest_jobs import IngestJobManager
+
+        _ingest_jobs = IngestJobManager(
+            max_workers=int(os.getenv("INGEST_WORKERS", "1")),
+            nice=int(os.getenv("INGEST_NICE", "10")),
+        )
+    return _ingest_jobs
+
+
+def shutdown() -> None:
+    """Drop the shared resources and stop the shard and ingestion workers (running jobs are cancelled)."""
+    global _resources, _ingest_jobs
+    if _resources is not None:
+        from sharding import ShardedVectorStore
+
+        if isinstance(_resources.vector_store, ShardedVectorStore):
+            _resources.vector_store.close()
+    _resources = None
+    if _ingest_jobs is not None:
+        _ingest_jobs.shutdown()
+        _ingest_jobs = None
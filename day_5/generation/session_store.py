@@ -0,0 +1,115 @@
+"""Chat history backends for the weather agent.
+
+The default in-memory store only works with a single server process. The SQLite
+store keeps every session in one database file shared by all workers, so any
+worker can serve any turn of any conversation (no session affinity needed).
+Select it with `SESSION_BACKEND=sqlite` and optionally `SESSION_DB_PATH`.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory, InMemoryChatMessageHistory
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "sessions.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chat_messages_session ON chat_messages (session_id, id);
+"""
+
+_local = threading.local()
+
+
+def _connection(db_path: Path) -> sqlite3.Connection:
+    """One connection per (thread, database); WAL lets workers read while one writes."""
+    connections: Dict[str, sqlite3.Connection] = getattr(_local, "connections", None) or {}
+    _local.connections = connections
+    key = str(db_path)
+    conn = connections.get(key)
+    if conn is None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(key, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        connections[key] = conn
+    return conn
+
+
+class SQLiteChatMessageHistory(BaseChatMessageHistory):
+    """Chat message history stored as one row per message in a SQLite database.
+
+    Messages are serialized with `messages_to_dict` / `messages_from_dict`, like
+    the day_2 file-based history.
+    """
+
+    def __init__(self, session_id: str, db_path: Path = DEFAULT_DB_PATH):
+        self.session_id = session_id
+        self.db_path = Path(db_path)
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        """Retrieve the session's messages in insertion order."""
+        rows = _connection(self.db_path).execute(
+            "SELECT message FROM chat_messages WHERE session_id = ? ORDER BY id",
+            (self.session_id,),
+        ).fetchall()
+        return messages_from_dict([json.loads(row[0]) for row in rows])
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """Append messages atomically so concurrent workers never interleave a turn."""
+        rows = [
+            (self.session_id, json.dumps(data, ensure_ascii=False))
+            for data in messages_to_dict(list(messages))
+        ]
+        conn = _connection(self.db_path)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO chat_messages (session_id, message) VALUES (?, ?)", rows
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def clear(self) -> None:
+        """Delete every message of the session."""
+        _connection(self.db_path).execute(
+            "DELETE FROM chat_messages WHERE session_id = ?", (self.session_id,)
+        )
+
+
+class SessionStore:
+    """Hands out chat histories from the backend selected by `SESSION_BACKEND`."""
+
+    def __init__(self, backend: str = "memory", db_path: Path = DEFAULT_DB_PATH):
+        if backend not in ("memory", "sqlite"):
+            raise ValueError(f"Unknown SESSION_BACKEND '{backend}' (expected 'memory' or 'sqlite').")
+        self.backend = backend
+        self.db_path = Path(db_path)
+        self._memory: Dict[str, InMemoryChatMessageHistory] = {}
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        return cls(
+            backend=os.getenv("SESSION_BACKEND", "memory"),
+            db_path=Path(os.getenv("SESSION_DB_PATH", str(DEFAULT_DB_PATH))),
+        )
+
+    def get(self, session_id: str) -> BaseChatMessageHistory:
+        if self.backend == "sqlite":
+            return SQLiteChatMessageHistory(session_id, self.db_path)
+        if session_id not in self._memory:
+            self._memory[session_id] = InMemoryChatMessageHistory()
+        return self._memory[session_id]
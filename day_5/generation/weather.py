@@ -0,0 +1,137 @@
+"""Weather data providers and city lookup for the weather agent.
+
+`check_weather` reads from a `WeatherProvider`. The default is the local
+fixture data wrapped in a bounded TTL cache, so swapping in a provider backed
+by a real API only means implementing `lookup`. `CityIndex` resolves city names mentioned
+in free text (case, accents and small typos are tolerated), which lets the
+agent answer single-city questions without a tool-call round trip.
+"""
+
+import difflib
+import re
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+WEATHER_FIXTURES: Dict[str, str] = {
+    "paris": "Cloudy, 12°C, light rain expected",
+    "new york": "Sunny, 18°C, clear skies",
+    "london": "Rainy, 8°C, heavy rain",
+    "dubai": "Hot and sunny, 35°C, no rain",
+    "tokyo": "Cool, 15°C, partly cloudy",
+}
+
+DEFAULT_CONDITIONS = "Mild, 15-20°C, partly cloudy"
+
+
+def normalize_city(text: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    ascii_text = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", ascii_text.lower()).split())
+
+
+class WeatherProvider(ABC):
+    """Source of current conditions keyed by normalized city name."""
+
+    @abstractmethod
+    def lookup(self, city: str) -> Optional[str]:
+        """Return conditions for a normalized city name, or None if unknown."""
+
+    @abstractmethod
+    def known_cities(self) -> Iterable[str]:
+        """Normalized names of the cities this provider can resolve."""
+
+
+class FixtureWeatherProvider(WeatherProvider):
+    """Serves the hardcoded demo data."""
+
+    def __init__(self, data: Optional[Dict[str, str]] = None):
+        self._data = {normalize_city(k): v for k, v in (data or WEATHER_FIXTURES).items()}
+
+    def lookup(self, city: str) -> Optional[str]:
+        return self._data.get(city)
+
+    def known_cities(self) -> Iterable[str]:
+        return self._data.keys()
+
+
+class TTLCachedWeatherProvider(WeatherProvider):
+    """Caches another provider's answers (including misses) for `ttl` seconds.
+
+    City names are normalized before lookup, and at most `max_size` cities are
+    kept: expired entries are dropped when seen, and the least recently used
+    city is evicted when the cache is full.
+    """
+
+    def __init__(self, inner: WeatherProvider, ttl: float = 300.0, max_size: int = 1024):
+        self.inner = inner
+        self.ttl = ttl
+        self.max_size = max_size
+        self._cache: "OrderedDict[str, Tuple[float, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, city: str) -> Optional[str]:
+        city = normalize_city(city)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(city)
+            if cached is not None:
+                if cached[0] > now:
+                    self._cache.move_to_end(city)
+                    return cached[1]
+                del self._cache[city]
+        value = self.inner.lookup(city)
+        with self._lock:
+            self._cache[city] = (now + self.ttl, value)
+            self._cache.move_to_end(city)
+            # Trim the least recently used end: expired entries there, then any over max_size.
+            # The order is by use, not expiry, so expired entries further in wait until read.
+            while self._cache:
+                oldest, (expires_at, _) = next(iter(self._cache.items()))
+                if expires_at > now and len(self._cache) <= self.max_size:
+                    break
+                del self._cache[oldest]
+        return value
+
+    def known_cities(self) -> Iterable[str]:
+        return self.inner.known_cities()
+
+
+class CityIndex:
+    """Finds known city names inside a user message.
+
+    Exact n-gram matches are tried first (longest first, so "new york" wins over
+    "york"); remaining words of 4+ letters are fuzzy matched against single-word
+    city names to tolerate typos such as "Pariss" or "Londn".
+    """
+
+    def __init__(self, cities: Iterable[str], cutoff: float = 0.85):
+        self.cities = {normalize_city(c) for c in cities}
+        self.cutoff = cutoff
+        self._max_words = max((len(c.split()) for c in self.cities), default=1)
+        self._single_words = [c for c in self.cities if " " not in c]
+
+    def find(self, message: str) -> List[str]:
+        words = normalize_city(message).split()
+        found: List[str] = []
+        used = [False] * len(words)
+        for size in range(self._max_words, 0, -1):
+            for start in range(len(words) - size + 1):
+                if any(used[start:start + size]):
+                    continue
+                gram = " ".join(words[start:start + size])
+                if gram in self.cities:
+                    found.append(gram)
+                    used[start:start + size] = [True] * size
+        for idx, word in enumerate(words):
+            if used[idx] or len(word) < 4:
+                continue
+            match = difflib.get_close_matches(word, self._single_words, n=1, cutoff=self.cutoff)
+            if match:
+                found.append(match[0])
+                used[idx] = True
+        return list(dict.fromkeys(found))
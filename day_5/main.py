@@ -1,18 +1,106 @@
-"""FastAPI application entry point."""
+"""FastAPI application entry point.
+
+    python main.py                    # single process, in-memory sessions
+    python main.py --workers 4        # N worker processes sharing SQLite sessions
+"""
+
+import argparse
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
 
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # repo root, for `common`
+
+from admission import AdmissionController, AdmissionMiddleware, PriorityClass
+from common.tracing import get_tracer
+from generation import rag
 from routes import router
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build and warm the shared RAG resources before serving (no-op unless RAG_COLLECTION is set).
+    await rag.startup()
+    yield
+    rag.shutdown()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Day 5 AI Training API",
-    description="FastAPI app demonstrating routes, validation, and weather agent",
+    description="FastAPI app demonstrating routes, validation, weather agent and RAG",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Include routers
 app.include_router(router)
 
+# Cheap routes are served ahead of agent runs; excess load is rejected early
+# with 429/503 instead of queueing until clients time out.
+admission = AdmissionController(
+    [
+        PriorityClass("interactive", ("/echo", "/rag/ingest"), priority=0, concurrency=64, max_queue=256, target_wait=0.1),
+        PriorityClass(
+            "agent",
+            ("/weather", "/rag"),
+            priority=1,
+            concurrency=int(os.getenv("AGENT_CONCURRENCY", "8")),
+            max_queue=int(os.getenv("AGENT_MAX_QUEUE", "32")),
+            target_wait=float(os.getenv("AGENT_TARGET_WAIT", "2.0")),
+        ),
+        # A batch holds one slot for its whole stream; its items' agent runs also take "agent" slots.
+        PriorityClass("batch", ("/weather/chat/batch",), priority=2, concurrency=2, max_queue=8, target_wait=5.0),
+    ],
+    max_in_flight=int(os.getenv("MAX_IN_FLIGHT", "64")),
+)
+app.add_middleware(AdmissionMiddleware, controller=admission)
+app.state.admission = admission  # batch items take "agent" slots through it
+
+
+class TraceRequestsMiddleware:
+    """Record an `http` span per request, labelled by route template.
+
+    Plain ASGI rather than `@app.middleware("http")`, which costs a task group
+    and a response stream copy per request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            get_tracer().observe(
+                "http",
+                f"{scope['method']} {getattr(route, 'path', 'unmatched')}",
+                (time.perf_counter() - start) * 1000,
+                status=status,
+            )
+
+
+app.add_middleware(TraceRequestsMiddleware)
+
 
 @app.get("/")
 async def root():
@@ -22,8 +110,14 @@ async def root():
         "endpoints": {
             "echo": "/echo",
             "weather_chat": "/weather/chat",
+            "weather_chat_batch": "/weather/chat/batch",
+            "rag_query": "/rag/query",
+            "rag_query_stream": "/rag/query/stream",
+            "rag_ingest_jobs": "/rag/ingest/jobs",
             "docs": "/docs",
-            "health": "/health"
+            "health": "/health",
+            "ready": "/ready",
+            "metrics": "/metrics"
         }
     }
 
@@ -34,6 +128,62 @@ async def health():
     return {"status": "healthy", "service": "day_5_api"}
 
 
-if __name__ == "__main__":
+@app.get("/ready")
+async def ready():
+    """Readiness: 503 while any priority class is shedding load, with queue stats."""
+    snapshot = admission.snapshot()
+    if admission.overloaded:
+        return JSONResponse({"status": "overloaded", **snapshot}, status_code=503)
+    return {"status": "ready", **snapshot}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus-style span latency histograms and token counters."""
+    return get_tracer().render_prometheus()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve the Day 5 API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes. With more than one, sessions default to the shared SQLite store.",
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=float,
+        default=30.0,
+        help="Seconds to let in-flight requests finish after SIGTERM/SIGINT.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+
+    args = parse_args()
+    if args.workers == 1:
+        uvicorn.run(app, host=args.host, port=args.port, timeout_graceful_shutdown=args.graceful_timeout)
+        return
+
+    # Workers are separate processes: conversation state must live outside them,
+    # so any worker can serve any turn without session affinity.
+    os.environ.setdefault("SESSION_BACKEND", "sqlite")
+    if os.environ["SESSION_BACKEND"] == "memory":
+        raise SystemExit("SESSION_BACKEND=memory cannot be shared between workers; use sqlite.")
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        app_dir=str(Path(__file__).resolve().parent),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""JSON responses for the hot routes.
+
+FastAPI validates and re-serializes whatever a route returns against its
+`response_model`. Routes whose output is built from values they already trust
+can skip that step: build the model with `model_construct` and return
+`model_response(model)`, which encodes it once with orjson (falling back to
+the stdlib encoder when orjson is not installed). The `response_model`
+declared on the route still documents the schema.
+"""
+
+import json
+from typing import Any
+
+from pydantic import BaseModel
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def model_response(model: BaseModel, status_code: int = 200) -> FastJSONResponse:
+    """Encode a flat model of JSON-native fields without re-validating it."""
+    return FastJSONResponse(model.__dict__, status_code=status_code)
@@ -2,6 +2,7 @@
 
 from fastapi import APIRouter
 from routes.echo import router as echo_router
+from routes.rag import router as rag_router
 from routes.weather import router as weather_router
 
 # Create main router
@@ -10,6 +11,7 @@ router = APIRouter()
 # Include sub-routers
 router.include_router(echo_router, tags=["echo"])
 router.include_router(weather_router, tags=["weather"])
+router.include_router(rag_router, tags=["rag"])
 
 __all__ = ["router"]
 
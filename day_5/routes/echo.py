@@ -2,6 +2,7 @@
 
 from datetime import datetime
 from fastapi import APIRouter
+from responses import model_response
 from schemas.models import EchoRequest, EchoResponse
 
 router = APIRouter(prefix="/echo", tags=["echo"])
@@ -14,8 +15,9 @@ async def echo(request: EchoRequest):
     
     Takes a message and returns it along with a timestamp.
     """
-    return EchoResponse(
+    # Both fields come from validated input and our own clock: skip re-validation.
+    return model_response(EchoResponse.model_construct(
         echo=request.message,
         received_at=datetime.now().isoformat()
-    )
+    ))
 
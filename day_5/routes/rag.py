@@ -0,0 +1,160 @@
+"""RAG question answering route endpoints."""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, List
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from responses import FastJSONResponse, dumps, model_response
+from schemas.models import IngestJobRequest, IngestJobResponse, RagQueryRequest, RagQueryResponse
+from generation.rag import (
+    RagNotConfigured,
+    RagResources,
+    RagSettings,
+    get_ingest_jobs,
+    get_rag_resources,
+    source_list,
+)
+
+if TYPE_CHECKING:
+    from ingest_jobs import IngestJob
+
+router = APIRouter(prefix="/rag", tags=["rag"])
+
+
+async def _resources() -> RagResources:
+    try:
+        return await get_rag_resources()
+    except RagNotConfigured as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+
+
+@router.post("/query", response_model=RagQueryResponse)
+async def rag_query(request: RagQueryRequest):
+    """
+    Answer a question from the day_4 collection set in RAG_COLLECTION.
+
+    Returns the answer and the retrieved passages it was grounded in.
+    """
+    resources = await _resources()
+    try:
+        answer, documents = await resources.answer(request.question)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing RAG query: {str(e)}"
+        ) from e
+    return model_response(RagQueryResponse.model_construct(answer=answer, sources=source_list(documents)))
+
+
+@router.post("/query/stream", response_class=StreamingResponse)
+async def rag_query_stream(request: RagQueryRequest):
+    """
+    Answer a question with the answer streamed as it is generated.
+
+    The response is NDJSON: first `{"sources": [...]}`, then `{"delta": "..."}`
+    lines of answer text. A generation failure after streaming has started is
+    reported as a final `{"error": "..."}` line.
+    """
+    resources = await _resources()
+    # Retrieval happens before the response starts, so its failures still get a status code.
+    try:
+        documents = await resources.retrieve(request.question)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing RAG query: {str(e)}"
+        ) from e
+
+    async def lines() -> AsyncIterator[bytes]:
+        yield dumps({"sources": source_list(documents)}) + b"\n"
+        try:
+            async for delta in resources.astream(request.question, documents):
+                if delta:
+                    yield dumps({"delta": delta}) + b"\n"
+        except Exception as e:
+            yield dumps({"error": f"Error generating answer: {e}"}) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _job_response(job: "IngestJob") -> IngestJobResponse:
+    return IngestJobResponse.model_construct(
+        id=job.id,
+        status=job.status,
+        pdf_dir=str(job.spec.pdf_dir),
+        collection=job.spec.collection,
+        pages_parsed=job.pages_parsed,
+        chunks_embedded=job.chunks_embedded,
+        chunks_written=job.chunks_written,
+        duplicates=job.duplicates,
+        error=job.error,
+        submitted_at=job.submitted_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+@router.post("/ingest/jobs", response_model=IngestJobResponse, status_code=202)
+async def submit_ingest_job(request: IngestJobRequest):
+    """
+    Queue a background ingestion job for a server-side PDF directory.
+
+    The job runs in a worker process, throttled to `max_chunks_per_s` so that
+    queries against the same store keep being served. Poll it with
+    `GET /rag/ingest/jobs/{job_id}`.
+    """
+    jobs = get_ingest_jobs()
+    from ingest_jobs import IngestJobSpec
+
+    settings = RagSettings.from_env()
+    collection = request.collection or (settings.collection if settings else None)
+    if not collection:
+        raise HTTPException(status_code=422, detail="collection is required when RAG_COLLECTION is not set.")
+    persist_dir = os.getenv("RAG_PERSIST_DIR")
+    spec = IngestJobSpec(
+        store=request.store or (settings.store if settings else "chroma"),
+        pdf_dir=Path(request.pdf_dir),
+        collection=collection,
+        chunk_size=request.chunk_size,
+        chunk_overlap=request.chunk_overlap,
+        persist_dir=Path(persist_dir) if persist_dir else None,
+        length_unit=request.length_unit,
+        dedup_threshold=request.dedup_threshold,
+        batch_size=request.batch_size,
+        max_chunks_per_s=request.max_chunks_per_s,
+        lazy_text=request.lazy_text,
+        shards=request.shards,
+    )
+    try:
+        # The first job starts the worker processes.
+        job = await asyncio.to_thread(jobs.submit, spec)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return model_response(_job_response(job), status_code=202)
+
+
+@router.get("/ingest/jobs", response_model=List[IngestJobResponse])
+async def list_ingest_jobs():
+    """All ingestion jobs of this worker, oldest first."""
+    return FastJSONResponse([_job_response(job).__dict__ for job in get_ingest_jobs().list()])
+
+
+@router.get("/ingest/jobs/{job_id}", response_model=IngestJobResponse)
+async def get_ingest_job(job_id: str):
+    """Status and progress of one ingestion job."""
+    job = get_ingest_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ingestion job '{job_id}'.")
+    return model_response(_job_response(job))
+
+
+@router.delete("/ingest/jobs/{job_id}", response_model=IngestJobResponse)
+async def cancel_ingest_job(job_id: str):
+    """Cancel a queued job, or stop a running one at its next page or batch."""
+    job = get_ingest_jobs().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ingestion job '{job_id}'.")
+    return model_response(_job_response(job))
@@ -1,11 +1,21 @@
 """Weather agent chat route endpoints."""
 
-from fastapi import APIRouter, HTTPException
+from typing import AsyncIterator, List, Union
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from responses import model_response
 from schemas.models import WeatherChatRequest, WeatherChatResponse
-from generation.agent import chat_with_agent
+from generation.agent import achat_with_agent
+from generation.batch import BatchItem, ChatBatch
 
 router = APIRouter(prefix="/weather", tags=["weather"])
 
+_BATCH_ADAPTER = TypeAdapter(List[WeatherChatRequest])
+_NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-lines")
+_BATCH_ITEMS_SCHEMA = {"type": "array", "items": {"$ref": "#/components/schemas/WeatherChatRequest"}}
+
 
 @router.post("/chat", response_model=WeatherChatResponse)
 async def weather_chat(request: WeatherChatRequest):
@@ -16,15 +26,99 @@ async def weather_chat(request: WeatherChatRequest):
     Maintains conversation context per session_id.
     """
     try:
-        response_text = chat_with_agent(request.message, request.session_id)
+        response_text = await achat_with_agent(request.message, request.session_id)
         
-        return WeatherChatResponse(
+        return model_response(WeatherChatResponse.model_construct(
             response=response_text,
             session_id=request.session_id
-        )
+        ))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error processing weather chat request: {str(e)}"
         ) from e
 
+
+
+def _describe_error(exc: ValidationError) -> str:
+    error = exc.errors(include_url=False)[0]
+    location = ".".join(str(part) for part in error["loc"])
+    return f"Invalid item: {location + ': ' if location else ''}{error['msg']}"
+
+
+def _parse_line(line: bytes) -> Union[WeatherChatRequest, str]:
+    try:
+        return WeatherChatRequest.model_validate_json(line)
+    except ValidationError as exc:
+        return _describe_error(exc)
+
+
+async def _ndjson_items(request: Request) -> AsyncIterator[BatchItem]:
+    """Yield items as their lines arrive."""
+    buffer = b""
+    index = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield index, _parse_line(line)
+                index += 1
+    if buffer.strip():
+        yield index, _parse_line(buffer)
+
+
+async def _list_items(items: List[WeatherChatRequest]) -> AsyncIterator[BatchItem]:
+    for index, item in enumerate(items):
+        yield index, item
+
+
+@router.post(
+    "/chat/batch",
+    response_class=StreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": _BATCH_ITEMS_SCHEMA},
+                "application/x-ndjson": {"schema": _BATCH_ITEMS_SCHEMA},
+            },
+        }
+    },
+)
+async def weather_chat_batch(
+    request: Request,
+    max_concurrency: int = Query(16, ge=1, le=64, description="Agent runs executed at the same time"),
+):
+    """
+    Run many weather chat turns in one request.
+
+    The body is a JSON list of chat requests, or NDJSON (one request per line)
+    when sent as `application/x-ndjson`; NDJSON items start running as their
+    lines arrive. Turns of the same session run in order; everything else runs
+    concurrently. Results are streamed back as NDJSON lines (`index`,
+    `session_id`, `response` or `error`) in completion order.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in _NDJSON_TYPES:
+        items = _ndjson_items(request)
+    else:
+        try:
+            items = _list_items(_BATCH_ADAPTER.validate_json(await request.body()))
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False)) from e
+
+    # Each item's agent run takes an "agent" admission slot, so batches never
+    # exceed the agent concurrency limit that /weather and /rag requests share.
+    admission = getattr(request.app.state, "admission", None)
+    slot = (lambda: admission.background_slot("agent")) if admission is not None else None
+    # The whole body is read before responding: StreamingResponse listens on the
+    # same ASGI receive channel for disconnects once it starts.
+    batch = ChatBatch(max_concurrency=max_concurrency, slot=slot)
+    await batch.feed(items)
+
+    async def lines() -> AsyncIterator[str]:
+        async for result in batch.results():
+            yield result.model_dump_json(exclude_none=True) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -1,6 +1,27 @@
 """Pydantic schemas for request/response validation."""
 
-from schemas.models import EchoRequest, EchoResponse, WeatherChatRequest, WeatherChatResponse
-
-__all__ = ["EchoRequest", "EchoResponse", "WeatherChatRequest", "WeatherChatResponse"]
+from schemas.models import (
+    EchoRequest,
+    EchoResponse,
+    IngestJobRequest,
+    IngestJobResponse,
+    RagQueryRequest,
+    RagQueryResponse,
+    RagSource,
+    WeatherChatBatchResult,
+    WeatherChatRequest,
+    WeatherChatResponse,
+)
 
+__all__ = [
+    "EchoRequest",
+    "EchoResponse",
+    "IngestJobRequest",
+    "IngestJobResponse",
+    "RagQueryRequest",
+    "RagQueryResponse",
+    "RagSource",
+    "WeatherChatBatchResult",
+    "WeatherChatRequest",
+    "WeatherChatResponse",
+]
@@ -1,6 +1,7 @@
 """Pydantic models for API request/response validation."""
 
 import uuid
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -29,3 +30,61 @@ class WeatherChatResponse(BaseModel):
     response: str = Field(..., description="Agent's response")
     session_id: str = Field(..., description="Session ID used for this conversation")
 
+
+
+class WeatherChatBatchResult(BaseModel):
+    """One NDJSON line of the batch chat response."""
+    index: int = Field(..., description="Position of the item in the request")
+    session_id: Optional[str] = Field(default=None, description="Session ID used for this item")
+    response: Optional[str] = Field(default=None, description="Agent's response, if the item succeeded")
+    error: Optional[str] = Field(default=None, description="Error message, if the item failed")
+
+
+class RagQueryRequest(BaseModel):
+    """Request model for a question over the RAG collection."""
+    question: str = Field(..., description="Question to answer from the collection", min_length=1)
+
+
+class RagSource(BaseModel):
+    """A retrieved passage used to answer."""
+    source: str = Field(..., description="File name of the passage")
+    page: Optional[int] = Field(default=None, description="Page of the passage")
+
+
+class RagQueryResponse(BaseModel):
+    """Response model for a RAG question."""
+    answer: str = Field(..., description="Answer grounded in the retrieved passages")
+    sources: List[RagSource] = Field(..., description="Retrieved passages, in rank order")
+
+
+class IngestJobRequest(BaseModel):
+    """Request model for a background ingestion job."""
+    pdf_dir: str = Field(..., description="Directory of PDFs to ingest, on the server", min_length=1)
+    collection: Optional[str] = Field(default=None, description="Target collection (default: RAG_COLLECTION)")
+    store: Optional[Literal["chroma", "pgvector"]] = Field(default=None, description="Vector store (default: RAG_STORE)")
+    chunk_size: int = Field(default=1000, ge=1)
+    chunk_overlap: int = Field(default=150, ge=0)
+    length_unit: Literal["chars", "tokens"] = "chars"
+    dedup_threshold: Optional[float] = Field(default=0.9, gt=0, le=1, description="null stores every chunk")
+    batch_size: int = Field(default=32, ge=1, le=100, description="Chunks embedded and written per batch")
+    max_chunks_per_s: Optional[float] = Field(default=100.0, gt=0, description="Write rate limit; null disables it")
+    lazy_text: Optional[bool] = Field(
+        default=None, description="Keep chunk text in a separate chunk store (null: as the collection already does)"
+    )
+    shards: Optional[int] = Field(default=None, ge=1, description="Shard count of a new collection")
+
+
+class IngestJobResponse(BaseModel):
+    """State and progress of an ingestion job."""
+    id: str = Field(..., description="Job ID")
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"]
+    pdf_dir: str
+    collection: str
+    pages_parsed: int = Field(..., description="PDF pages extracted so far")
+    chunks_embedded: int = Field(..., description="Chunks embedded so far")
+    chunks_written: int = Field(..., description="Chunks written to the vector store so far")
+    duplicates: int = Field(..., description="Near-duplicate chunks dropped (known when the job succeeds)")
+    error: Optional[str] = Field(default=None, description="Error message, if the job failed")
+    submitted_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None